@@ -0,0 +1,64 @@
+"""
+Run the benchmark suites and write one JSON document for comparison across commits.
+
+    cd backend
+    python3 -m benchmarks --sizes 100 1000 10000 50000 --output results.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from . import api, auth, parse_config, pipeline
+
+SUITES = ["parse_config", "pipeline", "api", "auth"]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--suites", nargs="+", default=SUITES, choices=SUITES)
+    parser.add_argument("--storage-modes", nargs="+", default=["single"], choices=["single", "sharded"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per API scenario")
+    parser.add_argument("--output", help="File to write the results to, printed when unset")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "results": {}
+    }
+    for suite in args.suites:
+        print(f"Running {suite}", file=sys.stderr)
+        if suite == "parse_config":
+            report["results"][suite] = parse_config.run(args.sizes, args.repeat)
+        elif suite == "pipeline":
+            report["results"][suite] = pipeline.run(args.sizes, args.storage_modes, args.repeat)
+        elif suite == "api":
+            report["results"][suite] = api.run(args.sizes, args.clients, args.requests)
+        else:
+            report["results"][suite] = auth.run()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
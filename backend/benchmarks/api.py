@@ -0,0 +1,155 @@
+"""
+Measure end-to-end API latency and throughput with concurrent clients against a server backed by stubs.
+
+    cd backend
+    python3 -m benchmarks.api --sizes 100 1000 --clients 16 --requests 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from .fleet import synthetic_config, synthetic_fleet
+from .stubs import StubEnvironment
+from .timing import summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "benchmark"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class Server:
+    def __init__(self, stubs: StubEnvironment):
+        """A uvicorn process serving the app with every external dependency stubbed"""
+        self.stubs = stubs
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    async def __aenter__(self) -> "Server":
+        env = {
+            **os.environ,
+            **self.stubs.settings(),
+            "PASSWORD": PASSWORD,
+            "JWT_SECRET": "benchmark-secret",
+            "TOKEN_EXPIRE_TIMEOUT": "600"
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env
+        )
+        started = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            while True:
+                if self.process.poll() is not None:
+                    raise RuntimeError("Server exited during startup")
+                try:
+                    await client.get(f"{self.url}/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+        self.startup_seconds = time.perf_counter() - started
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+
+async def run_clients(
+    clients: int,
+    requests: int,
+    request: Callable[[int], Awaitable[httpx.Response]]
+) -> dict:
+    """Send `requests` requests from `clients` concurrent clients and summarize them"""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def client_loop():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await request(index)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(clients)))
+    return {**summarize(latencies, time.perf_counter() - started), "errors": errors}
+
+async def run_size(size: int, clients: int, requests: int, provision: int) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        stubs = StubEnvironment(workdir)
+        stubs.write_config(synthetic_config(size))
+        async with Server(stubs) as server:
+            limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+            async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=300) as client:
+                login = await client.post("/api/auth/login", json={"password": PASSWORD})
+                client.headers["Authorization"] = f"Bearer {login.json()['token']}"
+                listing = await client.get("/api/domain/")
+                names = [domain["domain"] for domain in listing.json()]
+                etag = listing.headers.get("etag", "")
+                rng = random.Random(0)
+                updates = synthetic_fleet(requests, seed=3)
+                new_domains = [domain.model_dump(mode="json") for domain in synthetic_fleet(provision, seed=4, start=size)]
+
+                scenarios = {
+                    "list_domains": lambda i: client.get("/api/domain/"),
+                    "list_domains_not_modified": lambda i: client.get("/api/domain/", headers={"If-None-Match": etag}),
+                    "list_domains_page": lambda i: client.get("/api/domain/", params={"offset": i % size, "limit": 50}),
+                    "get_domain": lambda i: client.get(f"/api/domain/{rng.choice(names)}"),
+                    "search_upstream": lambda i: client.get(
+                        "/api/domain/search", params={"upstream": f"127.0.0.1:{3000 + i % 1000}"}
+                    ),
+                    "update_domain": lambda i: client.put(
+                        f"/api/domain/{rng.choice(names)}",
+                        json=[host.model_dump(mode="json") for host in updates[i].hosts]
+                    )
+                }
+                results = {"domains": size, "clients": clients, "startup_seconds": server.startup_seconds}
+                for name, request in scenarios.items():
+                    # Full list responses grow with the fleet, keep their run short on large fleets
+                    count = min(requests, max(clients, 200_000 // size)) if name == "list_domains" else requests
+                    results[name] = await run_clients(clients, count, request)
+
+                started = time.perf_counter()
+                response = await client.post("/api/domain/bulk", json=new_domains)
+                failed = [line for line in response.text.splitlines() if '"success":false' in line]
+                results["bulk_provision"] = {
+                    "domains": provision,
+                    "seconds": time.perf_counter() - started,
+                    "errors": len(failed)
+                }
+                return results
+
+def run(sizes: list[int], clients: int = 16, requests: int = 400, provision: int = 20) -> list[dict]:
+    return [asyncio.run(run_size(size, clients, requests, provision)) for size in sizes]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per scenario")
+    parser.add_argument("--provision", type=int, default=20, help="Domains created through the bulk endpoint")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.clients, args.requests, args.provision), indent=2))
+
+if __name__ == "__main__":
+    main()
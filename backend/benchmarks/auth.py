@@ -0,0 +1,139 @@
+"""
+Measure the per-request cost of authentication: token verification alone and whole requests through the middleware.
+
+    cd backend
+    python3 -m benchmarks.auth --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from fastapi import Depends, FastAPI, HTTPException
+from jose import JWTError, jwt
+from starlette.middleware.sessions import SessionMiddleware
+
+from src.api import PathScopedSessionMiddleware
+from src.config import settings
+from src.db import ApiKeyStore
+from src.dependencies import verify_token
+from src.schemas import ApiKeyCreate, ApiKeyScope, oauth2_scheme
+from src.services import ApiKeyService
+from src.services.jwt_service import create_access_token, token_cache, verify_access_token
+from src.services.token_cache import TokenCache
+
+def uncached_verify_token(token: str = Depends(oauth2_scheme)):
+    """The dependency as it was before caching: a full decode per request, run on the threadpool"""
+    try:
+        return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except (JWTError, ValueError):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+def build_app(dependency, session: str, api_key_service: ApiKeyService) -> FastAPI:
+    """
+    :param dependency: Auth dependency of the probed route, None for no auth.
+    :param session: "all" wraps every request in the session middleware, "web" skips `/api`, "none" leaves it out.
+    """
+    app = FastAPI()
+    app.state.api_key_service = api_key_service
+    dependencies = [Depends(dependency)] if dependency else []
+
+    @app.get("/api/probe", dependencies=dependencies)
+    async def probe():
+        return {}
+
+    if session == "all":
+        app.add_middleware(SessionMiddleware, secret_key="benchmark")
+    elif session == "web":
+        app.add_middleware(PathScopedSessionMiddleware, secret_key="benchmark", exclude_prefixes=("/api/",))
+    return app
+
+async def request(app: FastAPI, headers: list[tuple[bytes, bytes]]) -> int:
+    """Send one GET through the ASGI app without a network stack"""
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/probe", "raw_path": b"/api/probe", "query_string": b"",
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80)
+    }
+    await app(scope, receive, send)
+    return status
+
+async def per_request(app: FastAPI, headers: list[tuple[bytes, bytes]], requests: int) -> float:
+    """Mean microseconds per request, after a warm-up request"""
+    if await request(app, headers) != 200:
+        raise RuntimeError("Probe request was rejected")
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request(app, headers)
+    return (time.perf_counter() - started) / requests * 1e6
+
+def per_call(func, arg, calls: int) -> float:
+    """Mean microseconds per call"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        func(arg)
+    return (time.perf_counter() - started) / calls * 1e6
+
+def run(requests: int = 5000) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        store = ApiKeyStore(os.path.join(workdir, "api_keys.db"))
+        api_key_service = ApiKeyService(store)
+        uncached_keys = ApiKeyService(store, cache=TokenCache(0))
+        token = create_access_token({}).token
+        key = api_key_service.create_key(ApiKeyCreate(name="benchmark", scopes=[ApiKeyScope.Read])).key
+        token_cache.clear()
+
+        verification = {
+            "jwt_decode_us": per_call(
+                lambda value: jwt.decode(value, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]),
+                token, requests
+            ),
+            "jwt_cached_us": per_call(verify_access_token, token, requests),
+            "api_key_lookup_us": per_call(uncached_keys.verify, key, requests),
+            "api_key_cached_us": per_call(api_key_service.verify, key, requests)
+        }
+
+        bearer = [(b"authorization", f"Bearer {token}".encode())]
+        api_key = [(b"authorization", f"Bearer {key}".encode())]
+        scenarios = {
+            "no_auth": (None, "none", []),
+            "before": (uncached_verify_token, "all", bearer),
+            "cached_jwt_with_session": (verify_token, "all", bearer),
+            "cached_jwt": (verify_token, "web", bearer),
+            "cached_api_key": (verify_token, "web", api_key)
+        }
+        results = {}
+        for name, (dependency, session, headers) in scenarios.items():
+            app = build_app(dependency, session, api_key_service)
+            results[name] = asyncio.run(per_request(app, headers, requests))
+        store.close()
+
+    baseline = results["no_auth"]
+    return {
+        "requests": requests,
+        "verification": verification,
+        "request_us": results,
+        "auth_overhead_us": {name: value - baseline for name, value in results.items() if name != "no_auth"},
+        "token_cache": token_cache.stats()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000, help="Calls per measurement")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests), indent=2))
+
+if __name__ == "__main__":
+    main()
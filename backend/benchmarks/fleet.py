@@ -0,0 +1,33 @@
+"""
+Synthetic fleets shared by the benchmarks.
+"""
+import random
+
+from src.domain_helper.constants import NGINX_DEFAUT_CONFIG, NGINX_SERVERS_MARKER
+from src.domain_helper.nginx_config import get_nginx_domain_config
+from src.schemas import Domain, Host, HostOptions, HostType
+
+def synthetic_domain(index: int, rng: random.Random, max_hosts: int = 4) -> Domain:
+    """A domain with one to `max_hosts` hosts of random types, a tenth of them with options"""
+    hosts = []
+    for path in range(rng.randint(1, max_hosts)):
+        options = None
+        if rng.random() < 0.1:
+            options = HostOptions(read_timeout=rng.choice([30, 60, 300]), buffering=rng.random() < 0.5)
+        hosts.append(Host(
+            type=rng.choice([HostType.Default, HostType.WebSocket]),
+            path="/" if path == 0 else f"/service-{path}",
+            host=f"http://127.0.0.1:{3000 + rng.randrange(1000)}",
+            options=options
+        ))
+    return Domain(domain=f"site-{index}.example{index % 100}.com", hosts=hosts)
+
+def synthetic_fleet(size: int, seed: int = 0, start: int = 0) -> list[Domain]:
+    """`size` generated domains, the same for a given seed"""
+    rng = random.Random(seed)
+    return [synthetic_domain(index, rng) for index in range(start, start + size)]
+
+def synthetic_config(size: int, seed: int = 0) -> str:
+    """A main config holding `size` generated domains"""
+    blocks = "".join(get_nginx_domain_config(domain) for domain in synthetic_fleet(size, seed))
+    return NGINX_DEFAUT_CONFIG.replace(NGINX_SERVERS_MARKER, blocks + NGINX_SERVERS_MARKER)
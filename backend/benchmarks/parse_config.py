@@ -0,0 +1,148 @@
+"""
+Compare the tokenizing parser with the regex based parsing of the baseline NginxManager.
+The parser is not faster: it builds a full tree where the baseline scans lines and regex matches blocks,
+and `relative` is its time as a multiple of the baseline's.
+
+    cd backend
+    python3 -m benchmarks.parse_config --sizes 100 1000 10000
+"""
+import argparse
+import json
+import re
+
+from src.domain_helper import NginxManager
+from src.domain_helper.nginx_parser import parse
+from src.schemas import Domain, Host, HostType
+from .fleet import synthetic_config
+from .timing import best_of
+
+def baseline_parse_existing_config(config: str) -> list[Domain]:
+    """`NginxManager.parse_existing_config` of the baseline commit, unchanged apart from taking the text"""
+    def extract_server_blocks(config_text: str) -> list[str]:
+        blocks = []
+        inside_block = False
+        brace_count = 0
+        current_block = []
+
+        lines = config_text.splitlines()
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith("server"):
+                if "{" in stripped:
+                    inside_block = True
+                    brace_count = stripped.count("{") - stripped.count("}")
+                    current_block.append(line)
+                    continue
+
+            if inside_block:
+                current_block.append(line)
+                brace_count += line.count("{") - line.count("}")
+                if brace_count == 0:
+                    block_text = "\n".join(current_block).strip()
+                    if "location" in block_text and "443" in block_text:
+                        blocks.append(block_text)
+                    current_block = []
+                    inside_block = False
+
+        return blocks
+
+    server_blocks = extract_server_blocks(config)
+
+    domains = []
+    for server_block in server_blocks:
+        domain = baseline_extract_domain_from_config(server_block)
+        if domain and not baseline_is_default_server_block(server_block):
+            domains.append(domain)
+
+    return domains
+
+def baseline_is_default_server_block(config: str) -> bool:
+    """`NginxManager.is_default_server_block` of the baseline commit"""
+    return 'default_server' in config or 'server_name _;' in config
+
+def baseline_extract_domain_from_config(config: str) -> Domain:
+    """`NginxManager.extract_domain_from_config` of the baseline commit"""
+    try:
+        server_name_match = re.search(r'server_name\s+(.*?);', config)
+        if not server_name_match:
+            return None
+
+        server_names = server_name_match.group(1).strip().split()
+        primary_domain = None
+        for name in server_names:
+            if not name.startswith('www.'):
+                primary_domain = name
+                break
+
+        if not primary_domain:
+            return None
+
+        hosts = []
+        location_pattern = r'location\s+(.*?)\s*\{(.*?)\}'
+        location_matches = re.findall(location_pattern, config, re.DOTALL)
+
+        for path, location_content in location_matches:
+            path = path.strip()
+
+            proxy_pass_match = re.search(r'proxy_pass\s+(.*?);', location_content)
+            if proxy_pass_match:
+                proxy_host = proxy_pass_match.group(1).strip()
+
+                is_websocket = 'proxy_set_header Upgrade $http_upgrade' in location_content
+                host_type = HostType.WebSocket if is_websocket else HostType.Default
+
+                host = Host(type=host_type, path=path, host=proxy_host)
+                hosts.append(host)
+
+        return Domain(domain=primary_domain, hosts=hosts)
+
+    except Exception as e:
+        print(f"Error extracting domain from config: {e}")
+        return None
+
+def _summary(domains: list[Domain]) -> list[tuple]:
+    """Names and proxied hosts, the part of the model the baseline extracts"""
+    return [(domain.domain, [(host.type, host.path, host.host) for host in domain.hosts]) for domain in domains]
+
+def run(sizes: list[int], repeat: int = 3) -> list[dict]:
+    manager = NginxManager.__new__(NginxManager)
+
+    def segment(text: str) -> list[Domain]:
+        return [domain for _, _, domain in manager._segment_config(text)]
+
+    results = []
+    for size in sizes:
+        text = synthetic_config(size)
+        assert _summary(baseline_parse_existing_config(text)) == _summary(segment(text)), "Parsed domains differ"
+        assert parse(text).render() == text, "Round trip changed the config"
+        results.append({
+            "domains": size,
+            "bytes": len(text),
+            "baseline_seconds": best_of(repeat, baseline_parse_existing_config, text),
+            "tokenize_and_parse_seconds": best_of(repeat, parse, text),
+            "segment_seconds": best_of(repeat, segment, text)
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'domains':>8} {'bytes':>11} {'baseline':>10} {'parse':>10} {'segment':>10} {'relative':>8}")
+    for result in results:
+        print(
+            f"{result['domains']:>8} {result['bytes']:>11} "
+            f"{result['baseline_seconds']:>9.3f}s {result['tokenize_and_parse_seconds']:>9.3f}s "
+            f"{result['segment_seconds']:>9.3f}s {result['segment_seconds'] / result['baseline_seconds']:>7.2f}x"
+        )
+
+if __name__ == "__main__":
+    main()
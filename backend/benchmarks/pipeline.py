@@ -0,0 +1,99 @@
+"""
+Time the config pipeline: loading and parsing, rendering, model changes and saving.
+
+    cd backend
+    python3 -m benchmarks.pipeline --sizes 100 1000 10000
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from src.domain_helper import NginxApplier, NginxManager
+from src.domain_helper.nginx_config import DomainConfigRenderer, get_nginx_domain_config
+from .fleet import synthetic_config, synthetic_fleet
+from .stubs import StubEnvironment
+from .timing import best_of
+
+def per_operation(func, items: list) -> float:
+    """Mean seconds per call of `func` over `items`"""
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - started) / len(items)
+
+def run_size(size: int, storage_mode: str, repeat: int, operations: int) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        stubs = StubEnvironment(workdir)
+        stubs.write_config(synthetic_config(size))
+
+        def load() -> NginxManager:
+            return NginxManager(
+                storage_mode=storage_mode,
+                config_path=stubs.config_path,
+                conf_dir=stubs.conf_dir,
+                applier=NginxApplier(
+                    binary=stubs.nginx_binary,
+                    use_sudo=False,
+                    config_path=stubs.config_path,
+                    conf_dir=stubs.conf_dir
+                )
+            )
+
+        # The first sharded load moves every domain into its own file
+        manager = load()
+        load_seconds = best_of(repeat, load)
+        fleet = manager.get_current_domains()
+
+        renderer = DomainConfigRenderer()
+        for domain in fleet:
+            renderer.render(domain)
+
+        new_domains = synthetic_fleet(operations, seed=1, start=size)
+        updated = synthetic_fleet(operations, seed=2)
+        add_seconds = per_operation(manager.add_domain, new_domains)
+        update_seconds = per_operation(manager.update_domain, updated)
+        write_seconds = best_of(1, manager.save_config, False)
+        remove_seconds = per_operation(manager.remove_domain, [domain.domain for domain in new_domains])
+
+        manager.add_domain(new_domains[0])
+        transaction_seconds = best_of(1, manager.save_config, True)
+        manager.remove_domain(new_domains[0].domain)
+        noop_seconds = best_of(repeat, manager.save_config, True)
+
+        return {
+            "domains": size,
+            "storage_mode": storage_mode,
+            "hosts": sum(len(domain.hosts) for domain in fleet),
+            "load_seconds": load_seconds,
+            "parse_existing_config_seconds": best_of(repeat, manager.parse_existing_config),
+            "get_nginx_domain_config_seconds": best_of(
+                repeat, lambda: [get_nginx_domain_config(domain) for domain in fleet]
+            ),
+            "cached_render_seconds": best_of(repeat, lambda: [renderer.render(domain) for domain in fleet]),
+            "add_domain_us": add_seconds * 1e6,
+            "update_domain_us": update_seconds * 1e6,
+            "remove_domain_us": remove_seconds * 1e6,
+            "save_config_write_seconds": write_seconds,
+            "save_config_transaction_seconds": transaction_seconds,
+            "save_config_unchanged_seconds": noop_seconds
+        }
+
+def run(sizes: list[int], storage_modes: list[str], repeat: int = 3, operations: int = 100) -> list[dict]:
+    return [
+        run_size(size, storage_mode, repeat, operations)
+        for storage_mode in storage_modes
+        for size in sizes
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--storage-modes", nargs="+", default=["single"], choices=["single", "sharded"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--operations", type=int, default=100, help="Domains added, updated and removed per size")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.storage_modes, args.repeat, args.operations), indent=2))
+
+if __name__ == "__main__":
+    main()
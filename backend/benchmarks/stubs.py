@@ -0,0 +1,102 @@
+"""
+Local stand-ins for Nginx, certbot and the DNS provider, so benchmarks run unprivileged and offline.
+"""
+import os
+import stat
+import sys
+
+NGINX_STUB = """#!/bin/sh
+# `-t -c <file>` succeeds when the file is readable, anything else (e.g. `-s reload`) succeeds
+if [ "$1" = "-t" ]; then exec test -r "$3"; fi
+exit 0
+"""
+
+CERTBOT_STUB = """#!{python}
+# Writes a self-signed certificate for every `-d` name into the lineage given by `--cert-name`
+import datetime, os, sys
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+args = sys.argv[1:]
+names = [args[i + 1] for i, arg in enumerate(args) if arg == "-d"]
+lineage = os.path.join({live_dir!r}, args[args.index("--cert-name") + 1])
+key = ec.generate_private_key(ec.SECP256R1())
+subject = x509.Name([x509.NameAttribute(x509.NameOID.COMMON_NAME, names[0])])
+now = datetime.datetime.now(datetime.timezone.utc)
+cert = (
+    x509.CertificateBuilder()
+    .subject_name(subject).issuer_name(subject).public_key(key.public_key())
+    .serial_number(x509.random_serial_number())
+    .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=90))
+    .add_extension(x509.SubjectAlternativeName([x509.DNSName(name) for name in names]), critical=False)
+    .sign(key, hashes.SHA256())
+)
+os.makedirs(lineage, exist_ok=True)
+pem = cert.public_bytes(serialization.Encoding.PEM)
+for file_name in ("cert.pem", "fullchain.pem"):
+    with open(os.path.join(lineage, file_name), "wb") as f:
+        f.write(pem)
+with open(os.path.join(lineage, "privkey.pem"), "wb") as f:
+    f.write(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+"""
+
+class StubEnvironment:
+    def __init__(self, workdir: str):
+        """
+        Lay out config, certificate, zone and database paths under `workdir` and write the stub executables.
+        """
+        self.workdir = os.path.abspath(workdir)
+        self.config_path = os.path.join(self.workdir, "nginx", "nginx.conf")
+        self.conf_dir = os.path.join(self.workdir, "nginx", "conf.d")
+        self.live_dir = os.path.join(self.workdir, "letsencrypt", "live")
+        self.webroot = os.path.join(self.workdir, "webroot")
+        self.zone_dir = os.path.join(self.workdir, "zones")
+        self.history_dir = os.path.join(self.workdir, "history")
+        self.db_path = os.path.join(self.workdir, "domain_manager.db")
+        for directory in (self.conf_dir, self.live_dir, self.webroot, self.zone_dir):
+            os.makedirs(directory, exist_ok=True)
+        self.nginx_binary = self._write_executable("nginx", NGINX_STUB)
+        self.certbot_binary = self._write_executable(
+            "certbot",
+            CERTBOT_STUB.format(python=sys.executable, live_dir=self.live_dir)
+        )
+
+    def _write_executable(self, name: str, content: str) -> str:
+        path = os.path.join(self.workdir, "bin", name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        return path
+
+    def write_config(self, text: str):
+        with open(self.config_path, "w") as f:
+            f.write(text)
+
+    def settings(self) -> dict[str, str]:
+        """Environment variables pointing the app at the stubs"""
+        return {
+            "NGINX_CONFIG_PATH": self.config_path,
+            "NGINX_CONF_DIR": self.conf_dir,
+            "NGINX_BINARY": self.nginx_binary,
+            "NGINX_USE_SUDO": "false",
+            "NGINX_HISTORY_DIR": self.history_dir,
+            "CERTBOT_BINARY": self.certbot_binary,
+            "CERTBOT_USE_SUDO": "false",
+            "CERT_CHALLENGE_MODE": "webroot",
+            "ACME_WEBROOT": self.webroot,
+            "CERT_LIVE_DIR": self.live_dir,
+            "DNS_PROVIDER": "local",
+            "DNS_ZONE_DIR": self.zone_dir,
+            "PUBLIC_IP": "127.0.0.1",
+            "JOB_DB_PATH": self.db_path,
+            "DOMAIN_DB_PATH": self.db_path,
+            "IDEMPOTENCY_DB_PATH": self.db_path,
+            "API_KEY_DB_PATH": self.db_path,
+            "HEALTH_CHECK_ENABLED": "false",
+            "RECONCILE_ENABLED": "false",
+            "LOG_LEVEL": "WARNING"
+        }
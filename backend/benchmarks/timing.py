@@ -0,0 +1,31 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+import time
+
+def best_of(repeat: int, func, *args) -> float:
+    """Fastest of `repeat` runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Throughput and latency percentiles in milliseconds of a list of request durations in seconds"""
+    if not latencies:
+        return {'requests': 0}
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'requests': len(ordered),
+        'throughput': len(ordered) / elapsed if elapsed else None,
+        'p50_ms': percentile(0.5),
+        'p90_ms': percentile(0.9),
+        'p99_ms': percentile(0.99),
+        'max_ms': ordered[-1] * 1000
+    }
@@ -1,12 +1,44 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import uvicorn
-from starlette.middleware.sessions import SessionMiddleware
-from src.api import api_router
+from src.api import IdempotencyMiddleware, PathScopedSessionMiddleware, api_router
 from src.config import settings
+from src.db import ApiKeyStore, DomainStore, IdempotencyStore, JobStore
+from src.metrics import DOMAIN_COUNT, MetricsMiddleware, metrics_endpoint, setup_logging
+from src.services import ApiKeyService, DomainService, JobService
 
-app = FastAPI(title=settings.PROJECT_NAME)
-app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    domain_store = DomainStore(settings.DOMAIN_DB_PATH)
+    app.state.domain_service = DomainService(store=domain_store)
+    app.state.domain_service.start()
+    DOMAIN_COUNT.set_function(app.state.domain_service.count_domains)
+    job_store = JobStore(settings.JOB_DB_PATH)
+    app.state.job_service = JobService(job_store, app.state.domain_service)
+    await app.state.job_service.start()
+    app.state.idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_DB_PATH, ttl=settings.IDEMPOTENCY_TTL)
+    api_key_store = ApiKeyStore(settings.API_KEY_DB_PATH)
+    app.state.api_key_service = ApiKeyService(api_key_store)
+    yield
+    api_key_store.close()
+    app.state.idempotency_store.close()
+    await app.state.job_service.stop()
+    job_store.close()
+    await app.state.domain_service.aclose()
+    domain_store.close()
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+app.add_middleware(
+    PathScopedSessionMiddleware,
+    secret_key=settings.SECRET_KEY,
+    exclude_prefixes=("/api/",) if settings.SESSION_EXCLUDE_API else ()
+)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router, prefix="/api")
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 @app.get("/health")
 async def health_check():
@@ -17,4 +49,4 @@ if __name__ == "__main__":
         app,
         port=settings.SERVER_PORT,
         reload=False
-    )
\ No newline at end of file
+    )
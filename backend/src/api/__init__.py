@@ -1,5 +1,9 @@
+from .idempotency import IdempotencyMiddleware
 from .routers import api_router
+from .session import PathScopedSessionMiddleware
 
 __all__ = [
+    "IdempotencyMiddleware",
+    "PathScopedSessionMiddleware",
     "api_router"
 ]
\ No newline at end of file
@@ -1,7 +1,9 @@
 from .auth import auth_router
 from .domain import domain_router
+from .job import job_router
 
 __all__ = [
     "auth_router",
-    "domain_router"
+    "domain_router",
+    "job_router"
 ]
\ No newline at end of file
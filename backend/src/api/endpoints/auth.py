@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from src.dependencies import get_auth_service
-from src.services import AuthService
-from src.schemas import Auth, Token
+from src.dependencies import get_api_key_service, get_auth_service, verify_token
+from src.services import ApiKeyService, AuthService
+from src.schemas import ApiKey, ApiKeyCreate, ApiKeyCreated, Auth, Token
 
 auth_router = APIRouter()
 
@@ -16,4 +16,46 @@ async def login(
     if not auth_service.validate_password(auth.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    return auth_service.generate_token()
\ No newline at end of file
+    return auth_service.generate_token()
+
+def _require_login(payload: dict):
+    # API keys cannot manage API keys
+    if not payload or "scopes" in payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+
+@auth_router.post("/keys", response_model=ApiKeyCreated, status_code=201)
+async def create_api_key(
+    request: ApiKeyCreate,
+    payload: dict = Depends(verify_token),
+    api_key_service: ApiKeyService = Depends(get_api_key_service)
+):
+    """
+    Endpoint to create a long-lived API key for a machine client.
+    The key is only returned in this response.
+    """
+    _require_login(payload)
+    return api_key_service.create_key(request)
+
+@auth_router.get("/keys", response_model=list[ApiKey])
+async def list_api_keys(
+    payload: dict = Depends(verify_token),
+    api_key_service: ApiKeyService = Depends(get_api_key_service)
+):
+    """
+    Endpoint to list API keys without their secrets.
+    """
+    _require_login(payload)
+    return api_key_service.list_keys()
+
+@auth_router.delete("/keys/{key_id}", status_code=204)
+async def revoke_api_key(
+    key_id: str,
+    payload: dict = Depends(verify_token),
+    api_key_service: ApiKeyService = Depends(get_api_key_service)
+):
+    """
+    Endpoint to revoke an API key, effective immediately.
+    """
+    _require_login(payload)
+    if not api_key_service.revoke_key(key_id):
+        raise HTTPException(status_code=404, detail="API key not found")
@@ -1,21 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
-from src.dependencies import get_domain_service, verify_token
-from src.services import DomainService
-from src.schemas import Domain, Host
+from typing import AsyncIterator, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from src.dependencies import get_domain_service, get_job_service, verify_token
+from src.services import DomainService, JobService
+from src.schemas import Domain, DomainHealth, DomainPlan, DomainRecord, DomainResult, Host, HostType, JobCreated
 
 domain_router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def _ndjson(results: AsyncIterator[DomainResult]) -> AsyncIterator[str]:
+    async for result in results:
+        yield result.model_dump_json() + "\n"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def _validate_unique(domains: list[str]):
+    seen = set()
+    duplicates = sorted({domain for domain in domains if domain in seen or seen.add(domain)})
+    if duplicates:
+        raise HTTPException(status_code=422, detail=f"Duplicate domains: {', '.join(duplicates)}")
+
 @domain_router.get("/", response_model=list[Domain])
 async def list_domains(
+    request: Request,
+    prefix: Optional[str] = None,
+    host_type: Optional[HostType] = None,
+    upstream: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
     payload: dict = Depends(verify_token),
     domain_service: DomainService = Depends(get_domain_service)
 ):
     """
-    Endpoint to list all domains.
+    Endpoint to list domains, optionally filtered by name prefix, host type and upstream and paged.
+    The response carries an `ETag` and the number of matching domains in `X-Total-Count`;
+    a request whose `If-None-Match` matches the current list gets an empty 304.
     """
     try:
         if payload:
-            return await domain_service.get_all_domains()
+            etag = await domain_service.get_domain_list_etag()
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            page = await domain_service.get_domain_page(prefix, host_type, upstream, offset, limit)
+            headers["ETag"] = page.etag
+            headers["X-Total-Count"] = str(page.total)
+            return Response(page.body, media_type="application/json", headers=headers)
         else:
             raise HTTPException(status_code=403, detail="Unauthorized access")
     except HTTPException:
@@ -23,18 +58,220 @@ async def list_domains(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@domain_router.post("/")
+@domain_router.get("/search", response_model=list[Domain])
+async def search_domains(
+    upstream: Optional[str] = None,
+    primary_domain: Optional[str] = None,
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to find the domains proxying to an upstream (e.g. `localhost:8081`)
+    and/or sharing a primary domain. Both filters combine.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    if upstream is None and primary_domain is None:
+        raise HTTPException(status_code=422, detail="Either upstream or primary_domain is required")
+    return await domain_service.search_domains(upstream=upstream, primary_domain=primary_domain)
+
+@domain_router.get("/upstreams")
+async def get_upstreams(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get the number of domains proxying to each upstream.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return await domain_service.get_upstreams()
+
+@domain_router.get("/reloads")
+async def get_reload_stats(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get Nginx reload batching statistics.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return domain_service.get_reload_stats()
+
+@domain_router.get("/transactions")
+async def get_transaction_stats(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get Nginx apply transactions with their render, validate, swap and reload timings.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return domain_service.get_transaction_stats()
+
+@domain_router.get("/cert-stats")
+async def get_cert_stats(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get certificate issuance, reuse and renewal counters.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return domain_service.get_cert_stats()
+
+@domain_router.get("/dns-stats")
+async def get_dns_stats(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get DNS provider throttling, retry and batching counters.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return domain_service.get_dns_stats()
+
+@domain_router.get("/health-stats")
+async def get_health_stats(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get upstream health check counters.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return domain_service.get_health_stats()
+
+@domain_router.get("/reconcile-stats")
+async def get_reconcile_stats(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get reconciliation counters and the most recent passes.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return domain_service.get_reconcile_stats()
+
+@domain_router.post("/reconcile")
+async def reconcile(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to run a reconciliation pass now.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return await domain_service.reconcile()
+
+@domain_router.get("/export")
+async def export_domains(
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to stream all domains as NDJSON.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return StreamingResponse(domain_service.export_domains(), media_type=NDJSON_MEDIA_TYPE)
+
+@domain_router.post("/bulk")
+async def bulk_create_domains(
+    domains: list[Domain],
+    dry_run: bool = False,
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to create many domains with a single config write and reload.
+    Streams one NDJSON result per domain, or returns the plan without applying it on a dry run.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    _validate_unique([domain.domain for domain in domains])
+    if dry_run:
+        return await domain_service.plan_changes({domain.domain: domain for domain in domains})
+    return StreamingResponse(
+        _ndjson(domain_service.bulk_add_domains(domains)),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+@domain_router.put("/bulk")
+async def bulk_update_domains(
+    domains: list[Domain],
+    dry_run: bool = False,
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to update many domains with a single config write and reload.
+    Streams one NDJSON result per domain, or returns the plan without applying it on a dry run.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    _validate_unique([domain.domain for domain in domains])
+    if dry_run:
+        return await domain_service.plan_changes({domain.domain: domain for domain in domains}, existing_only=True)
+    return StreamingResponse(
+        _ndjson(domain_service.bulk_update_domains(domains)),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+@domain_router.delete("/bulk")
+async def bulk_delete_domains(
+    domains: list[str],
+    dry_run: bool = False,
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to delete many domains with a single config write and reload.
+    Streams one NDJSON result per domain, or returns the plan without applying it on a dry run.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    _validate_unique(domains)
+    if dry_run:
+        return await domain_service.plan_changes({domain: None for domain in domains})
+    return StreamingResponse(
+        _ndjson(domain_service.bulk_remove_domains(domains)),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+@domain_router.post(
+    "/",
+    response_model=Union[JobCreated, DomainPlan],
+    status_code=202,
+    responses={200: {"model": DomainPlan, "description": "Plan of a dry run"}}
+)
 async def create_domain(
     domain: Domain,
+    response: Response,
+    dry_run: bool = False,
     payload: dict = Depends(verify_token),
+    job_service: JobService = Depends(get_job_service),
     domain_service: DomainService = Depends(get_domain_service)
 ):
     """
     Endpoint to create a new domain.
+    Provisioning (DNS, certificate, Nginx) runs as a background job; poll `/api/jobs/{job_id}`.
+    A dry run returns the config plan instead with a 200, without starting a job.
     """
     try:
-        if payload:
-            await domain_service.add_domain(domain.domain, domain.hosts)
+        if payload and dry_run:
+            response.status_code = 200
+            return await domain_service.plan_changes({domain.domain: domain})
+        elif payload:
+            job = await job_service.enqueue(domain)
+            return JobCreated(job_id=job.id)
         else:
             raise HTTPException(status_code=403, detail="Unauthorized access")
     except HTTPException:
@@ -42,18 +279,52 @@ async def create_domain(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@domain_router.delete("/{domain}")
+@domain_router.get("/{domain}", response_model=DomainRecord)
+async def get_domain(
+    domain: str,
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get a single domain with its DNS and certificate status.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    result = await domain_service.get_domain(domain)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Domain {domain} not found")
+    return result
+
+@domain_router.get("/{domain}/health", response_model=DomainHealth)
+async def get_domain_health(
+    domain: str,
+    payload: dict = Depends(verify_token),
+    domain_service: DomainService = Depends(get_domain_service)
+):
+    """
+    Endpoint to get the latest health check result of every host of a domain.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    result = await domain_service.get_domain_health(domain)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Domain {domain} not found")
+    return result
+
+@domain_router.delete("/{domain}", response_model=DomainPlan)
 async def delete_domain(
     domain: str,
+    dry_run: bool = False,
     payload: dict = Depends(verify_token),
     domain_service: DomainService = Depends(get_domain_service)
 ):
     """
     Endpoint to delete a domain.
+    Returns the plan of what changed, or what would change on a dry run.
     """
     try:
         if payload:
-            await domain_service.remove_domain(domain)
+            return await domain_service.remove_domain(domain, dry_run)
         else:
             raise HTTPException(status_code=403, detail="Unauthorized access")
     except HTTPException:
@@ -61,19 +332,21 @@ async def delete_domain(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@domain_router.put("/{domain}")
+@domain_router.put("/{domain}", response_model=DomainPlan)
 async def update_domain(
     domain: str,
     hosts: list[Host],
+    dry_run: bool = False,
     payload: dict = Depends(verify_token),
     domain_service: DomainService = Depends(get_domain_service)
 ):
     """
     Endpoint to update an existing domain.
+    Returns the plan of what changed, or what would change on a dry run. Unchanged hosts write and reload nothing.
     """
     try:
         if payload:
-            await domain_service.update_domain(domain, hosts)
+            return await domain_service.update_domain(domain, hosts, dry_run)
         else:
             raise HTTPException(status_code=403, detail="Unauthorized access")
     except HTTPException:
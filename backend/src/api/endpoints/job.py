@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from src.dependencies import get_job_service, verify_token
+from src.services import JobService
+from src.schemas import Job
+
+job_router = APIRouter()
+
+@job_router.get("/{job_id}", response_model=Job)
+async def get_job(
+    job_id: str,
+    payload: dict = Depends(verify_token),
+    job_service: JobService = Depends(get_job_service)
+):
+    """
+    Endpoint to get the state and per-stage timings of a provisioning job.
+    """
+    if not payload:
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    job = job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,133 @@
+import hashlib
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.db import IdempotencyStore
+from src.dependencies import authenticate
+from src.domain_helper.process_helper import run_in_io_executor
+from src.schemas import IdempotencyState
+from src.services.auth_service import ADMIN_SUBJECT
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# Larger responses are passed through without being stored
+MAX_STORED_BODY = 1024 * 1024
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp):
+        """
+        Pure ASGI middleware answering retried mutating requests from the stored response of the first one.
+        Applies to authenticated requests carrying an `Idempotency-Key` header, with the store found at
+        `app.state.idempotency_store`. Keys are scoped to the API key that sent them, or to the admin for
+        password logins, so a retry with a refreshed login token is still answered from the store.
+        A key reused for a different method, path or body is rejected, one whose request is still running
+        gets a 409. Responses with a 5xx status, streamed responses (e.g. NDJSON bulk results) and bodies
+        over `MAX_STORED_BODY` bytes are not stored, so those requests are run again when retried.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        store: Optional[IdempotencyStore] = getattr(scope["app"].state, "idempotency_store", None)
+        if store is None:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key", b"").decode("latin-1").strip()
+        principal = self._principal(scope, headers.get(b"authorization", b"").decode("latin-1")) if key else None
+        if principal is None:
+            # Unauthenticated requests are rejected by the endpoint, never answered from the store
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "Idempotency key is too long"}, status_code=400)(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope["query_string"], body])
+        ).hexdigest()
+
+        record = await run_in_io_executor(store.claim, principal, key, fingerprint)
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                response = JSONResponse(
+                    {"detail": "Idempotency key was already used for a different request"}, status_code=422
+                )
+            elif record.state == IdempotencyState.Pending:
+                response = JSONResponse(
+                    {"detail": "A request with this idempotency key is in progress"}, status_code=409
+                )
+            else:
+                response = Response(
+                    record.body,
+                    status_code=record.status_code,
+                    media_type=record.media_type,
+                    headers={"Idempotency-Replayed": "true"}
+                )
+            await response(scope, receive, send)
+            return
+
+        replayed = False
+        status = 500
+        media_type = None
+        chunks = []
+        size = 0
+        storable = True
+
+        async def receive_body() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_and_capture(message: Message):
+            nonlocal status, media_type, size, storable
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        media_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body" and storable:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if message.get("more_body", False) or size > MAX_STORED_BODY:
+                    storable = False
+                    chunks.clear()
+                else:
+                    chunks.append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_capture)
+        except BaseException:
+            await run_in_io_executor(store.release, principal, key)
+            raise
+        if status < 500 and storable:
+            await run_in_io_executor(store.complete, principal, key, status, media_type, b"".join(chunks))
+        else:
+            await run_in_io_executor(store.release, principal, key)
+
+    @staticmethod
+    def _principal(scope: Scope, authorization: str) -> Optional[str]:
+        """The API key or the admin login a request is authenticated as; None when it is not"""
+        scheme, _, token = authorization.partition(" ")
+        token = token.strip()
+        if scheme.lower() != "bearer" or not token:
+            return None
+        payload = authenticate(HTTPConnection(scope), token)
+        if not payload:
+            return None
+        # Login tokens issued without a subject still belong to the admin
+        return payload.get("sub") or ADMIN_SUBJECT
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from src.api.endpoints import auth_router, domain_router
+from src.api.endpoints import auth_router, domain_router, job_router
 
 api_router = APIRouter()
 
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
-api_router.include_router(domain_router, prefix="/domain", tags=["domain"])
\ No newline at end of file
+api_router.include_router(domain_router, prefix="/domain", tags=["domain"])
+api_router.include_router(job_router, prefix="/jobs", tags=["jobs"])
\ No newline at end of file
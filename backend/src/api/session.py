@@ -0,0 +1,17 @@
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+class PathScopedSessionMiddleware(SessionMiddleware):
+    def __init__(self, app: ASGIApp, secret_key: str, exclude_prefixes: tuple[str, ...] = (), **kwargs):
+        """
+        Session middleware skipped on paths under `exclude_prefixes`, so token authenticated API
+        requests neither decode nor sign a session cookie.
+        """
+        super().__init__(app, secret_key, **kwargs)
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] in ("http", "websocket") and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -8,10 +8,69 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "your-secret-key"
     JWT_ALGORITHM: str = "HS256"
     TOKEN_EXPIRE_TIMEOUT: int = 120
+    TOKEN_CACHE_SIZE: int = 1024
+    API_KEY_DB_PATH: str = "domain_manager.db"
+    API_KEY_CACHE_TTL: float = 300.0
+    SESSION_EXCLUDE_API: bool = True
     PASSWORD: str = "your_password"
     SERVER_PORT: int = 8001
     PROJECT_NAME: str = "Domain Manager"
     SECRET_KEY: str = "your_secret_key"
+    NGINX_STORAGE_MODE: str = "single"
+    NGINX_CONFIG_PATH: str = "/etc/nginx/nginx.conf"
+    NGINX_CONF_DIR: str = "/etc/nginx/conf.d"
+    NGINX_RELOAD_WINDOW: float = 0.5
+    NGINX_BINARY: str = "nginx"
+    NGINX_USE_SUDO: bool = True
+    NGINX_HISTORY_DIR: str = "history"
+    NGINX_HISTORY_SIZE: int = 5
+    JOB_CONCURRENCY: int = 2
+    JOB_DB_PATH: str = "domain_manager.db"
+    DOMAIN_DB_PATH: str = "domain_manager.db"
+    IDEMPOTENCY_DB_PATH: str = "domain_manager.db"
+    IDEMPOTENCY_TTL: float = 86400.0
+    CERT_CHALLENGE_MODE: str = "standalone"
+    CERTBOT_BINARY: str = "certbot"
+    CERTBOT_USE_SUDO: bool = True
+    ACME_WEBROOT: str = "/var/www/letsencrypt"
+    ACME_SERVER: str = ""
+    CERT_LIVE_DIR: str = "/etc/letsencrypt/live"
+    CERT_MAX_NAMES: int = 100
+    CERT_RENEW_BEFORE_DAYS: int = 30
+    CERT_RENEW_CHECK_INTERVAL: float = 3600.0
+    CERT_RENEWALS_PER_CHECK: int = 5
+    CERT_RENEW_SPREAD: float = 60.0
+    CERT_BATCH_WINDOW: float = 1.0
+    DNS_PROVIDER: str = "godaddy"
+    DNS_ZONE_DIR: str = ""
+    GODADDY_API_URL: str = "https://api.ote-godaddy.com"
+    DNS_HTTP_TIMEOUT: float = 10.0
+    DNS_HTTP_MAX_CONNECTIONS: int = 20
+    DNS_HTTP_MAX_KEEPALIVE: int = 10
+    PUBLIC_IP: str = ""
+    PUBLIC_IP_URL: str = "https://api.ipify.org"
+    PUBLIC_IP_TTL: float = 300.0
+    DNS_RATE_LIMIT: float = 1.0
+    DNS_RATE_BURST: int = 5
+    DNS_MAX_RETRIES: int = 5
+    DNS_BACKOFF_BASE: float = 0.5
+    DNS_BACKOFF_MAX: float = 30.0
+    DNS_BATCH_WINDOW: float = 0.05
+    DNS_BULK_CONCURRENCY: int = 10
+    HEALTH_CHECK_ENABLED: bool = True
+    HEALTH_CHECK_INTERVAL: float = 30.0
+    HEALTH_CHECK_UNHEALTHY_INTERVAL: float = 10.0
+    HEALTH_CHECK_TIMEOUT: float = 5.0
+    HEALTH_CHECK_CONCURRENCY: int = 100
+    HEALTH_CHECK_PATH: str = "/"
+    RECONCILE_ENABLED: bool = False
+    RECONCILE_INTERVAL: float = 300.0
+    RECONCILE_DNS_CONCURRENCY: int = 10
+    RECONCILE_DNS_SWEEP: int = 100
+    RECONCILE_CERT_BATCH: int = 50
+    RECONCILE_RETRY_INTERVAL: float = 3600.0
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
 
     class Config:
         env_file = ".env"
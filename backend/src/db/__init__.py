@@ -0,0 +1,11 @@
+from .api_key_store import ApiKeyStore
+from .domain_store import DomainStore
+from .idempotency_store import IdempotencyStore
+from .job_store import JobStore
+
+__all__ = [
+    "ApiKeyStore",
+    "DomainStore",
+    "IdempotencyStore",
+    "JobStore"
+]
@@ -0,0 +1,100 @@
+import json
+import threading
+from datetime import datetime
+from typing import Optional
+
+from src.schemas import ApiKey, ApiKeyScope
+from .sqlite import connect
+
+class ApiKeyStore:
+    def __init__(self, path: str):
+        """
+        Long-lived API keys for machine clients. Only a hash of each key is stored.
+        """
+        self.connection = connect(path)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS api_keys (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    key_hash TEXT NOT NULL UNIQUE,
+                    scopes TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    expires_at TEXT,
+                    revoked_at TEXT
+                )
+            """)
+
+    def save(self, api_key: ApiKey, key_hash: str):
+        """Insert a key"""
+        with self.lock:
+            self.connection.execute(
+                """
+                INSERT INTO api_keys (id, name, key_hash, scopes, created_at, expires_at, revoked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    api_key.id,
+                    api_key.name,
+                    key_hash,
+                    json.dumps([scope.value for scope in api_key.scopes]),
+                    api_key.created_at.isoformat(),
+                    api_key.expires_at.isoformat() if api_key.expires_at else None,
+                    api_key.revoked_at.isoformat() if api_key.revoked_at else None
+                )
+            )
+
+    def get_by_hash(self, key_hash: str) -> Optional[ApiKey]:
+        """Get a key by the hash of its secret"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, name, scopes, created_at, expires_at, revoked_at FROM api_keys WHERE key_hash = ?",
+                (key_hash,)
+            ).fetchone()
+        return self._api_key(*row) if row else None
+
+    def list_keys(self) -> list[ApiKey]:
+        """Get every key, revoked ones included, oldest first"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, name, scopes, created_at, expires_at, revoked_at FROM api_keys ORDER BY created_at"
+            ).fetchall()
+        return [self._api_key(*row) for row in rows]
+
+    def revoke(self, key_id: str) -> Optional[str]:
+        """
+        Mark a key as revoked.
+        :return: The hash of the key, None when there is no such key.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT key_hash FROM api_keys WHERE id = ?", (key_id,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE api_keys SET revoked_at = COALESCE(revoked_at, ?) WHERE id = ?",
+                (datetime.now().isoformat(), key_id)
+            )
+        return row[0]
+
+    @staticmethod
+    def _api_key(
+        key_id: str,
+        name: str,
+        scopes: str,
+        created_at: str,
+        expires_at: Optional[str],
+        revoked_at: Optional[str]
+    ) -> ApiKey:
+        return ApiKey(
+            id=key_id,
+            name=name,
+            scopes=[ApiKeyScope(scope) for scope in json.loads(scopes)],
+            created_at=datetime.fromisoformat(created_at),
+            expires_at=datetime.fromisoformat(expires_at) if expires_at else None,
+            revoked_at=datetime.fromisoformat(revoked_at) if revoked_at else None
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
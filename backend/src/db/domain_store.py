@@ -0,0 +1,234 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from src.domain_helper import split_domain
+from src.domain_helper.domain_index import normalize_upstream
+from src.schemas import Domain, DomainRecord, Host, HostOptions, HostType, ProvisioningState
+from .sqlite import connect
+
+class DomainStore:
+    def __init__(self, path: str):
+        """
+        Registry of domains and their hosts, the source the Nginx config is rendered from.
+        Rows created by a status update before the domain is configured stay inactive
+        and are not rendered until the domain is saved.
+        """
+        self.connection = connect(path)
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.lock = threading.Lock()
+        # Incremented on every write, so readers can tell when the registry changed
+        self.revision = 0
+        # Incremented on writes to domains and hosts only, status updates leave it alone
+        self.domains_revision = 0
+        with self.lock:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS domains (
+                    name TEXT PRIMARY KEY,
+                    primary_domain TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    active INTEGER NOT NULL DEFAULT 0,
+                    dns_status TEXT NOT NULL DEFAULT 'unknown',
+                    cert_status TEXT NOT NULL DEFAULT 'unknown',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS domains_active_position ON domains (active, position);
+                CREATE INDEX IF NOT EXISTS domains_primary_domain ON domains (primary_domain);
+                CREATE TABLE IF NOT EXISTS hosts (
+                    domain TEXT NOT NULL REFERENCES domains (name) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    host TEXT NOT NULL,
+                    upstream TEXT NOT NULL,
+                    options TEXT,
+                    PRIMARY KEY (domain, position)
+                );
+                CREATE INDEX IF NOT EXISTS hosts_upstream ON hosts (upstream);
+            """)
+
+    @contextmanager
+    def _transaction(self, domains_changed: bool = True) -> Iterator[sqlite3.Connection]:
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+            self.revision += 1
+            if domains_changed:
+                self.domains_revision += 1
+
+    def save(self, domains: Iterable[Domain]):
+        """
+        Insert or replace domains with their hosts in one transaction.
+        New domains are appended after the existing ones, updated domains keep their position.
+        """
+        now = datetime.now().isoformat()
+        with self._transaction() as connection:
+            position = connection.execute("SELECT COALESCE(MAX(position), 0) FROM domains").fetchone()[0]
+            for domain in domains:
+                position += 1
+                connection.execute(
+                    """
+                    INSERT INTO domains (name, primary_domain, position, active, created_at, updated_at)
+                    VALUES (?, ?, ?, 1, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET active = 1, updated_at = excluded.updated_at
+                    """,
+                    (domain.domain, split_domain(domain.domain)[1], position, now, now)
+                )
+                connection.execute("DELETE FROM hosts WHERE domain = ?", (domain.domain,))
+                connection.executemany(
+                    "INSERT INTO hosts (domain, position, type, path, host, upstream, options) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            domain.domain, index, host.type.value, host.path, host.host,
+                            normalize_upstream(host.host),
+                            host.options.model_dump_json(exclude_none=True) if host.options else None
+                        )
+                        for index, host in enumerate(domain.hosts)
+                    ]
+                )
+
+    def deactivate(self, names: Iterable[str]):
+        """Stop rendering domains, keeping their statuses"""
+        now = datetime.now().isoformat()
+        with self._transaction() as connection:
+            for name in names:
+                connection.execute("DELETE FROM hosts WHERE domain = ?", (name,))
+                connection.execute("UPDATE domains SET active = 0, updated_at = ? WHERE name = ?", (now, name))
+
+    def delete(self, names: Iterable[str]):
+        """Delete domains with their hosts and statuses"""
+        with self._transaction() as connection:
+            connection.executemany("DELETE FROM domains WHERE name = ?", [(name,) for name in names])
+
+    def set_status(
+        self,
+        name: str,
+        dns_status: Optional[ProvisioningState] = None,
+        cert_status: Optional[ProvisioningState] = None
+    ):
+        """Record the DNS and/or certificate state of a domain, creating an inactive row if needed"""
+        now = datetime.now().isoformat()
+        with self._transaction(domains_changed=False) as connection:
+            connection.execute(
+                """
+                INSERT INTO domains (name, primary_domain, position, created_at, updated_at)
+                VALUES (?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM domains), ?, ?)
+                ON CONFLICT (name) DO NOTHING
+                """,
+                (name, split_domain(name)[1], now, now)
+            )
+            connection.execute(
+                """
+                UPDATE domains SET
+                    dns_status = COALESCE(?, dns_status),
+                    cert_status = COALESCE(?, cert_status),
+                    updated_at = ?
+                WHERE name = ?
+                """,
+                (
+                    dns_status.value if dns_status else None,
+                    cert_status.value if cert_status else None,
+                    now,
+                    name
+                )
+            )
+
+    def get(self, name: str) -> Optional[DomainRecord]:
+        """Get a domain with its statuses, configured or not"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT name, active, dns_status, cert_status, created_at, updated_at FROM domains WHERE name = ?",
+                (name,)
+            ).fetchone()
+            if row is None:
+                return None
+            hosts = self.connection.execute(
+                "SELECT type, path, host, options FROM hosts WHERE domain = ? ORDER BY position",
+                (name,)
+            ).fetchall()
+        return DomainRecord(
+            domain=row[0],
+            hosts=[self._host(*host) for host in hosts],
+            configured=bool(row[1]),
+            dns_status=ProvisioningState(row[2]),
+            cert_status=ProvisioningState(row[3]),
+            created_at=datetime.fromisoformat(row[4]),
+            updated_at=datetime.fromisoformat(row[5])
+        )
+
+    def list_domains(self) -> list[Domain]:
+        """Get every configured domain in config order"""
+        return self._select("d.active = 1", (), "d.position")
+
+    def find(self, upstream: Optional[str] = None, primary_domain: Optional[str] = None) -> list[Domain]:
+        """
+        Get the configured domains proxying to an upstream and/or under a primary domain, sorted by name.
+        """
+        conditions = ["d.active = 1"]
+        parameters = []
+        if upstream is not None:
+            conditions.append("d.name IN (SELECT domain FROM hosts WHERE upstream = ?)")
+            parameters.append(normalize_upstream(upstream))
+        if primary_domain is not None:
+            conditions.append("d.primary_domain = ?")
+            parameters.append(primary_domain.lower())
+        return self._select(" AND ".join(conditions), tuple(parameters), "d.name")
+
+    def upstreams(self) -> dict[str, int]:
+        """Number of configured domains per upstream"""
+        with self.lock:
+            rows = self.connection.execute(
+                """
+                SELECT h.upstream, COUNT(DISTINCT h.domain)
+                FROM hosts h JOIN domains d ON d.name = h.domain
+                WHERE d.active = 1
+                GROUP BY h.upstream
+                """
+            ).fetchall()
+        return dict(rows)
+
+    def count(self) -> int:
+        """Number of rows, configured or not"""
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM domains").fetchone()[0]
+
+    def _select(self, condition: str, parameters: tuple, order: str) -> list[Domain]:
+        with self.lock:
+            rows = self.connection.execute(
+                f"""
+                SELECT d.name, h.type, h.path, h.host, h.options
+                FROM domains d LEFT JOIN hosts h ON h.domain = d.name
+                WHERE {condition}
+                ORDER BY {order}, h.position
+                """,
+                parameters
+            ).fetchall()
+        domains: dict[str, Domain] = {}
+        for name, *host in rows:
+            domain = domains.get(name)
+            if domain is None:
+                domain = domains[name] = Domain(domain=name, hosts=[])
+            if host[0] is not None:
+                domain.hosts.append(self._host(*host))
+        return list(domains.values())
+
+    @staticmethod
+    def _host(host_type: str, path: str, host: str, options: Optional[str]) -> Host:
+        return Host(
+            type=HostType(host_type),
+            path=path,
+            host=host,
+            options=HostOptions.model_validate_json(options) if options else None
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.schemas import IdempotencyRecord, IdempotencyState
+from .sqlite import connect
+
+class IdempotencyStore:
+    def __init__(self, path: str, ttl: float = 86400.0):
+        """
+        Responses of mutating requests by idempotency key, so retried requests are answered without redoing the work.
+        Keys are scoped to the principal that sent them, so callers cannot replay each other's responses.
+        Keys still pending when the store is opened belong to requests cut off by a restart and are dropped.
+        :param ttl: Seconds a key is remembered.
+        """
+        self.connection = connect(path)
+        self.ttl = timedelta(seconds=ttl)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    status_code INTEGER,
+                    media_type TEXT,
+                    body BLOB,
+                    created_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idempotency_keys_created_at ON idempotency_keys (created_at);
+            """)
+            self.connection.execute(
+                "DELETE FROM idempotency_keys WHERE state = ?", (IdempotencyState.Pending.value,)
+            )
+
+    @staticmethod
+    def _row_key(principal: str, key: str) -> str:
+        return f"{principal}:{key}"
+
+    def claim(self, principal: str, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        """
+        Record a principal's key as pending unless it is known, expired keys being forgotten first.
+        :return: None when the key was claimed, otherwise the existing record.
+        """
+        row_key = self._row_key(principal, key)
+        now = datetime.now()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    "DELETE FROM idempotency_keys WHERE created_at < ?", ((now - self.ttl).isoformat(),)
+                )
+                row = self.connection.execute(
+                    """
+                    SELECT key, fingerprint, state, status_code, media_type, body, created_at
+                    FROM idempotency_keys WHERE key = ?
+                    """,
+                    (row_key,)
+                ).fetchone()
+                if row is None:
+                    self.connection.execute(
+                        "INSERT INTO idempotency_keys (key, fingerprint, state, created_at) VALUES (?, ?, ?, ?)",
+                        (row_key, fingerprint, IdempotencyState.Pending.value, now.isoformat())
+                    )
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        if row is None:
+            return None
+        return IdempotencyRecord(
+            key=key,
+            fingerprint=row[1],
+            state=IdempotencyState(row[2]),
+            status_code=row[3],
+            media_type=row[4],
+            body=row[5],
+            created_at=datetime.fromisoformat(row[6])
+        )
+
+    def complete(self, principal: str, key: str, status_code: int, media_type: Optional[str], body: bytes):
+        """Store the response of a claimed key"""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE idempotency_keys SET state = ?, status_code = ?, media_type = ?, body = ? WHERE key = ?",
+                (IdempotencyState.Completed.value, status_code, media_type, body, self._row_key(principal, key))
+            )
+
+    def release(self, principal: str, key: str):
+        """Forget a claimed key, so the request can be retried"""
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM idempotency_keys WHERE key = ?", (self._row_key(principal, key),)
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,47 @@
+import threading
+from typing import Optional
+
+from src.schemas import Job, JobState
+from .sqlite import connect
+
+class JobStore:
+    def __init__(self, path: str):
+        self.connection = connect(path)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+
+    def save(self, job: Job):
+        """Insert or update a job"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, state, created_at, data) VALUES (?, ?, ?, ?)",
+                (job.id, job.state.value, job.created_at.isoformat(), job.model_dump_json())
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id"""
+        with self.lock:
+            row = self.connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def list_unfinished(self) -> list[Job]:
+        """Get queued and running jobs in creation order"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT data FROM jobs WHERE state IN (?, ?) ORDER BY created_at",
+                (JobState.Queued.value, JobState.Running.value)
+            ).fetchall()
+        return [Job.model_validate_json(row[0]) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
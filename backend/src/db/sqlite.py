@@ -0,0 +1,12 @@
+import sqlite3
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection tuned for a single long-lived process:
+    WAL journal so readers never block the writer, and relaxed fsync on commit.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
@@ -1,9 +1,14 @@
+from .api_key_service import get_api_key_service
 from .auth_service import get_auth_service
 from .domain_service import get_domain_service
-from .jwt_service import verify_token
+from .job_service import get_job_service
+from .jwt_service import authenticate, verify_token
 
 __all__ = [
+    "get_api_key_service",
     "get_auth_service",
     "get_domain_service",
+    "get_job_service",
+    "authenticate",
     "verify_token"
 ]
\ No newline at end of file
@@ -0,0 +1,5 @@
+from fastapi import Request
+from src.services import ApiKeyService
+
+def get_api_key_service(request: Request) -> ApiKeyService:
+    return request.app.state.api_key_service
@@ -1,4 +1,5 @@
+from fastapi import Request
 from src.services import DomainService
 
-def get_domain_service() -> DomainService:
-    return DomainService()
\ No newline at end of file
+def get_domain_service(request: Request) -> DomainService:
+    return request.app.state.domain_service
@@ -0,0 +1,5 @@
+from fastapi import Request
+from src.services import JobService
+
+def get_job_service(request: Request) -> JobService:
+    return request.app.state.job_service
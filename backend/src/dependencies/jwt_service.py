@@ -1,16 +1,39 @@
-from fastapi import Depends, HTTPException
-from jose import JWTError, jwt
-from src.schemas import oauth2_scheme
-from src.config import settings
+from typing import Optional
+from fastapi import Depends, HTTPException, Request
+from jose import JWTError
+from starlette.requests import HTTPConnection
+from src.schemas import ApiKeyScope, oauth2_scheme
+from src.services.api_key_service import API_KEY_PREFIX
+from src.services.jwt_service import verify_access_token
 
-def verify_token(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def authenticate(connection: HTTPConnection, token: str) -> Optional[dict]:
+    """
+    Payload of a valid login token or API key, None otherwise.
+    """
+    if token.startswith(API_KEY_PREFIX):
+        return connection.app.state.api_key_service.verify(token)
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload
-    except (JWTError, ValueError) as e:
-        raise credentials_exception
\ No newline at end of file
+        return verify_access_token(token)
+    except (JWTError, ValueError):
+        return None
+
+async def verify_token(request: Request, token: str = Depends(oauth2_scheme)):
+    """
+    Verified on the event loop; repeated tokens are answered from the cache.
+    API keys are limited to their scopes: `read` for safe methods, `write` for the others.
+    """
+    payload = authenticate(request, token)
+    if not payload:
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    scopes = payload.get("scopes")
+    if scopes is not None:
+        required = ApiKeyScope.Read if request.method in READ_METHODS else ApiKeyScope.Write
+        if required.value not in scopes:
+            raise HTTPException(status_code=403, detail="Insufficient scope")
+    return payload
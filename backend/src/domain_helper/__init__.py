@@ -1,10 +1,29 @@
+from .dns_provider import DnsProvider, split_domain
+from .domain_plan import diff_domain, plan_changes
 from .godaddy_manager import GodaddyManager
+from .health_checker import HealthChecker
+from .keyed_locks import KeyedLocks
+from .local_dns_provider import LocalDnsProvider
+from .nginx_applier import NginxApplier, NginxApplyError
 from .nginx_manager import NginxManager
-from .cert_helper import setup_cert, remove_cert
+from .reload_scheduler import ReloadScheduler
+from .cert_helper import issue_cert_async
+from .cert_manager import CertManager, parse_certificate
 
 __all__ = [
+    "DnsProvider",
+    "split_domain",
+    "diff_domain",
+    "plan_changes",
     "GodaddyManager",
+    "HealthChecker",
+    "KeyedLocks",
+    "LocalDnsProvider",
+    "NginxApplier",
+    "NginxApplyError",
     "NginxManager",
-    "setup_cert",
-    "remove_cert"
+    "ReloadScheduler",
+    "issue_cert_async",
+    "CertManager",
+    "parse_certificate"
 ]
\ No newline at end of file
@@ -1,26 +1,74 @@
-import subprocess
-import os
+from typing import Optional
 
-def setup_cert(domain: str, email_address: str):
-    try:
-        if os.path.isdir(f"/etc/letsencrypt/live/{domain}"):
-            return
-        subprocess.run(["sudo", "fuser", "-k", "80/tcp"], stderr=subprocess.DEVNULL)
-        subprocess.run([
-            "sudo", "certbot", "certonly", "--standalone",
-            "-d", domain, "-d", f"www.{domain}",
-            "--non-interactive",
-            "--agree-tos",
-            "--email", email_address,
-            "--expand",
-            "--cert-name", domain,
-            "--force-renewal"
-        ], check=True)
-    except subprocess.CalledProcessError as e:
-        print(e)
+from .constants import ACME_WEBROOT, CERT_CHALLENGE_STANDALONE, CERT_CHALLENGE_WEBROOT
+from .process_helper import run_command
 
-def remove_cert(domain: str):
-    try:
-        subprocess.run(["sudo", "rm", "-r", f"/etc/letsencrypt/live/{domain}"], check=True)
-    except subprocess.CalledProcessError as e:
-        print(e)
\ No newline at end of file
+def _certbot_command(
+    domain: str,
+    email_address: str,
+    challenge_mode: str = CERT_CHALLENGE_STANDALONE,
+    webroot: str = ACME_WEBROOT,
+    acme_server: Optional[str] = None,
+    names: Optional[list[str]] = None,
+    force_renewal: bool = True,
+    binary: str = "certbot",
+    use_sudo: bool = True
+) -> list[str]:
+    """
+    :param domain: Certificate lineage name.
+    :param names: Names to put on the certificate, defaults to the domain and its www alias.
+    :param binary: Certbot executable, replaceable by a stub in tests.
+    """
+    if challenge_mode == CERT_CHALLENGE_WEBROOT:
+        authenticator = ["--webroot", "-w", webroot]
+    elif challenge_mode == CERT_CHALLENGE_STANDALONE:
+        authenticator = ["--standalone"]
+    else:
+        raise ValueError(f"Unknown certificate challenge mode: {challenge_mode}")
+    if names is None:
+        names = [domain, f"www.{domain}"]
+    command = [
+        *(["sudo"] if use_sudo else []), binary, "certonly", *authenticator,
+        *[arg for name in names for arg in ("-d", name)],
+        "--non-interactive",
+        "--agree-tos",
+        "--email", email_address,
+        "--expand",
+        "--cert-name", domain
+    ]
+    if force_renewal:
+        command.append("--force-renewal")
+    if acme_server:
+        command += ["--server", acme_server]
+    return command
+
+async def issue_cert_async(
+    cert_name: str,
+    names: list[str],
+    email_address: str,
+    challenge_mode: str = CERT_CHALLENGE_STANDALONE,
+    webroot: str = ACME_WEBROOT,
+    acme_server: Optional[str] = None,
+    force_renewal: bool = False,
+    binary: str = "certbot",
+    use_sudo: bool = True
+):
+    """
+    Issue or renew a certificate lineage covering `names`, raising `CalledProcessError` on failure.
+    """
+    sudo = ["sudo"] if use_sudo else []
+    if challenge_mode == CERT_CHALLENGE_WEBROOT:
+        await run_command([*sudo, "mkdir", "-p", webroot])
+    else:
+        await run_command([*sudo, "fuser", "-k", "80/tcp"], check=False)
+    await run_command(_certbot_command(
+        cert_name,
+        email_address,
+        challenge_mode,
+        webroot,
+        acme_server,
+        names=names,
+        force_renewal=force_renewal,
+        binary=binary,
+        use_sudo=use_sudo
+    ))
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, Optional
+
+from cryptography import x509
+
+from src.metrics import observe_stage
+from src.schemas import Certificate
+from .cert_helper import issue_cert_async
+from .constants import ACME_WEBROOT, CERT_CHALLENGE_STANDALONE, CERT_LIVE_DIR
+from .file_helper import list_dir, read_file
+from .process_helper import run_in_io_executor
+
+logger = logging.getLogger(__name__)
+
+def parse_certificate(name: str, pem: str) -> Certificate:
+    """
+    Read the names and expiry of a PEM certificate.
+    """
+    cert = x509.load_pem_x509_certificate(pem.encode())
+    try:
+        san = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName).value
+        domains = san.get_values_for_type(x509.DNSName)
+    except x509.ExtensionNotFound:
+        domains = [
+            attribute.value
+            for attribute in cert.subject.get_attributes_for_oid(x509.NameOID.COMMON_NAME)
+        ]
+    return Certificate(name=name, domains=domains, not_after=cert.not_valid_after_utc)
+
+class CertManager:
+    def __init__(
+        self,
+        email_address: str,
+        live_dir: str = CERT_LIVE_DIR,
+        max_names: int = 100,
+        renew_before_days: int = 30,
+        renew_check_interval: float = 3600.0,
+        renewals_per_check: int = 5,
+        renew_spread: float = 60.0,
+        challenge_mode: str = CERT_CHALLENGE_STANDALONE,
+        webroot: str = ACME_WEBROOT,
+        acme_server: Optional[str] = None,
+        on_renewed: Optional[Callable[[], Awaitable]] = None,
+        renewable: Optional[Callable[[str], bool]] = None,
+        certbot_binary: str = "certbot",
+        use_sudo: bool = True
+    ):
+        """
+        Tracks certificate lineages, packs new domains into SAN certificates and renews them gradually.
+        :param max_names: Maximum names per certificate; every domain takes two (itself and www).
+        :param renew_before_days: Certificates expiring sooner are re-issued; later ones are reused.
+        :param renew_check_interval: Seconds between renewal checks.
+        :param renewals_per_check: Maximum lineages renewed per check.
+        :param renew_spread: Seconds to wait between two renewals of the same check.
+        :param on_renewed: Called after renewals so Nginx picks up the new files.
+        :param renewable: Tells whether a domain is still served here. Renewals leave out the other names,
+            so lineages shrink as their domains go away; every name is renewed when unset.
+        :param certbot_binary: Certbot executable, replaceable by a stub in tests.
+        :param use_sudo: Run certbot with sudo.
+        """
+        self.email_address = email_address
+        self.live_dir = live_dir
+        self.max_names = max_names
+        self.renew_before = timedelta(days=renew_before_days)
+        self.renew_check_interval = renew_check_interval
+        self.renewals_per_check = renewals_per_check
+        self.renew_spread = renew_spread
+        self.challenge_mode = challenge_mode
+        self.webroot = webroot
+        self.acme_server = acme_server
+        self.on_renewed = on_renewed
+        self.renewable = renewable
+        self.certbot_binary = certbot_binary
+        self.use_sudo = use_sudo
+        self.certs: dict[str, Certificate] = {}
+        self._covering: dict[str, str] = {}
+        self._issue_lock: Optional[asyncio.Lock] = None
+        self._renewal_task: Optional[asyncio.Task] = None
+        self._live_signature: Optional[tuple] = None
+        # Incremented whenever a lineage is loaded, so callers can tell when coverage may have changed
+        self.revision = 0
+        self.issued = 0
+        self.renewed = 0
+        self.repacked = 0
+        self.skipped = 0
+
+    def load(self):
+        """
+        Index every lineage in the live directory by reading its certificate.
+        """
+        self._live_signature = self._read_live_signature()
+        self.revision += 1
+        self.certs = {}
+        self._covering = {}
+        try:
+            names = list_dir(self.live_dir)
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            return
+        for name in sorted(names):
+            self._load_cert(name)
+
+    def _read_live_signature(self) -> Optional[tuple]:
+        """
+        Modification times of the live directory and its lineages; certbot replaces the links
+        inside a lineage on renewal. None when the directory is only readable with sudo.
+        """
+        try:
+            with os.scandir(self.live_dir) as entries:
+                lineages = sorted((entry.name, entry.stat().st_mtime_ns) for entry in entries)
+            return os.stat(self.live_dir).st_mtime_ns, tuple(lineages)
+        except FileNotFoundError:
+            return ()
+        except PermissionError:
+            return None
+
+    def refresh_if_changed(self, force: bool = False) -> bool:
+        """
+        Load the live directory again if lineages were added, renewed or removed outside of this manager.
+        :param force: Load it even when unchanged or when changes cannot be detected without sudo.
+        :return: True if the lineages were loaded again.
+        """
+        if not force:
+            signature = self._read_live_signature()
+            if signature is None or signature == self._live_signature:
+                return False
+        self.load()
+        return True
+
+    def _load_cert(self, name: str) -> Optional[Certificate]:
+        try:
+            pem = read_file(os.path.join(self.live_dir, name, "cert.pem"))
+            cert = parse_certificate(name, pem)
+        except (FileNotFoundError, NotADirectoryError, subprocess.CalledProcessError, ValueError):
+            return None
+        self._index(cert)
+        return cert
+
+    def _index(self, cert: Certificate):
+        self.revision += 1
+        previous = self.certs.get(cert.name)
+        if previous:
+            for domain in previous.domains:
+                if self._covering.get(domain) == cert.name:
+                    del self._covering[domain]
+        self.certs[cert.name] = cert
+        for domain in cert.domains:
+            current = self.certs.get(self._covering.get(domain))
+            # Prefer the lineage that stays valid the longest
+            if current is None or current.not_after < cert.not_after:
+                self._covering[domain] = cert.name
+
+    def get_cert(self, domain: str) -> Optional[Certificate]:
+        """
+        Get the certificate covering a domain and its www alias.
+        """
+        name = self._covering.get(domain)
+        cert = self.certs.get(name) if name else None
+        if cert and f"www.{domain}" in cert.domains:
+            return cert
+        return None
+
+    def cert_name_for(self, domain: str) -> Optional[str]:
+        """
+        Lineage name whose files Nginx should use for a domain.
+        """
+        cert = self.get_cert(domain)
+        return cert.name if cert else None
+
+    def is_valid(self, domain: str) -> bool:
+        """
+        Check that a domain is covered by a certificate with enough remaining lifetime.
+        """
+        cert = self.get_cert(domain)
+        return bool(cert) and cert.not_after - datetime.now(timezone.utc) > self.renew_before
+
+    async def ensure_certs(self, domains: list[str]) -> dict[str, Exception]:
+        """
+        Make sure every domain is covered by a valid certificate.
+        Expiring lineages are renewed with the requested names and those still served here; domains without a certificate
+        are packed into new SAN certificates of at most `max_names` names.
+        :return: Domains that could not be covered, with the error.
+        """
+        if self._issue_lock is None:
+            self._issue_lock = asyncio.Lock()
+        domains = list(dict.fromkeys(domains))
+        failures = {}
+        # certbot holds a global lock (and port 80 in standalone mode), so issuance is serialized
+        async with self._issue_lock:
+            missing = [domain for domain in domains if not self.is_valid(domain)]
+            self.skipped += len(domains) - len(missing)
+
+            expiring: dict[str, list[str]] = {}
+            uncovered = []
+            for domain in missing:
+                cert = self.get_cert(domain)
+                if cert:
+                    expiring.setdefault(cert.name, []).append(domain)
+                else:
+                    uncovered.append(domain)
+
+            for cert_name, group in expiring.items():
+                try:
+                    await self._renew(self.certs[cert_name], self._renewal_names(self.certs[cert_name], group))
+                except Exception as e:
+                    logger.error("Certificate renewal failed", extra={'cert_name': cert_name, 'error': str(e)})
+                    failures.update({domain: e for domain in group})
+
+            group_size = max(1, self.max_names // 2)
+            for index in range(0, len(uncovered), group_size):
+                group = uncovered[index:index + group_size]
+                names = [name for domain in group for name in (domain, f"www.{domain}")]
+                try:
+                    await self._issue(self._new_cert_name(group[0]), names, force_renewal=False)
+                    self.issued += 1
+                except Exception as e:
+                    logger.error("Certificate issuance failed", extra={'domains': group, 'error': str(e)})
+                    failures.update({domain: e for domain in group})
+
+            for domain in missing:
+                if domain not in failures and not self.is_valid(domain):
+                    failures[domain] = RuntimeError(f"Certificate for {domain} was not issued")
+        return failures
+
+    def _new_cert_name(self, domain: str) -> str:
+        """
+        Lineage name for a new certificate, numbered like certbot when the domain name is taken.
+        """
+        name = domain
+        suffix = 0
+        while name in self.certs:
+            suffix += 1
+            name = f"{domain}-{suffix:04d}"
+        return name
+
+    async def renew_due(self, limit: Optional[int] = None) -> list[str]:
+        """
+        Renew lineages expiring within `renew_before`, soonest first, pausing `renew_spread` between renewals.
+        :return: Renewed lineage names.
+        """
+        now = datetime.now(timezone.utc)
+        expiring = sorted(
+            (cert for cert in self.certs.values() if cert.not_after - now <= self.renew_before),
+            key=lambda cert: cert.not_after
+        )
+        # Lineages none of whose domains are served here any more are left to expire
+        due = [(cert, names) for cert in expiring if (names := self._renewal_names(cert))]
+        due = due[:limit or self.renewals_per_check]
+
+        if self._issue_lock is None:
+            self._issue_lock = asyncio.Lock()
+        renewed = []
+        for index, (cert, names) in enumerate(due):
+            if index:
+                await asyncio.sleep(self.renew_spread)
+            try:
+                async with self._issue_lock:
+                    await self._renew(cert, names)
+                renewed.append(cert.name)
+            except Exception as e:
+                logger.error("Certificate renewal failed", extra={'cert_name': cert.name, 'error': str(e)})
+        if renewed and self.on_renewed:
+            await self.on_renewed()
+        return renewed
+
+    def _renewal_names(self, cert: Certificate, requested: Iterable[str] = ()) -> list[str]:
+        """
+        Names to renew a lineage with: its requested domains and those still served here, with their www aliases.
+        """
+        if self.renewable is None:
+            return cert.domains
+        names = set(cert.domains)
+        kept = set(requested)
+
+        def domain_of(name: str) -> str:
+            domain = name.removeprefix("www.")
+            return domain if domain in names else name
+
+        return [
+            name for name in cert.domains
+            if domain_of(name) in kept or self.renewable(domain_of(name))
+        ]
+
+    async def _renew(self, cert: Certificate, names: list[str]):
+        """Renew a lineage, reissuing it with fewer names when some are no longer served here"""
+        await self._issue(cert.name, names, force_renewal=True)
+        self.renewed += 1
+        if len(names) < len(cert.domains):
+            self.repacked += 1
+            logger.info("Certificate lineage renewed without unused names", extra={
+                'cert_name': cert.name, 'removed': sorted(set(cert.domains) - set(names))
+            })
+
+    async def _issue(self, cert_name: str, names: list[str], force_renewal: bool):
+        with observe_stage("setup_cert", cert_name=cert_name, names=len(names), renewal=force_renewal):
+            await issue_cert_async(
+                cert_name,
+                names,
+                self.email_address,
+                challenge_mode=self.challenge_mode,
+                webroot=self.webroot,
+                acme_server=self.acme_server,
+                force_renewal=force_renewal,
+                binary=self.certbot_binary,
+                use_sudo=self.use_sudo
+            )
+        await run_in_io_executor(self._load_cert, cert_name)
+
+    def start(self):
+        """
+        Start the background renewal loop.
+        """
+        if self._renewal_task is None:
+            self._renewal_task = asyncio.create_task(self._renewal_loop())
+
+    async def stop(self):
+        """
+        Stop the background renewal loop.
+        """
+        if self._renewal_task is not None:
+            self._renewal_task.cancel()
+            await asyncio.gather(self._renewal_task, return_exceptions=True)
+            self._renewal_task = None
+
+    async def _renewal_loop(self):
+        while True:
+            await asyncio.sleep(self.renew_check_interval)
+            try:
+                await self.renew_due()
+            except Exception:
+                logger.exception("Certificate renewal check failed")
+
+    def stats(self) -> dict:
+        """
+        Get certificate counters.
+        """
+        now = datetime.now(timezone.utc)
+        return {
+            'certificates': len(self.certs),
+            'covered_domains': len(self._covering),
+            'due_for_renewal': sum(1 for cert in self.certs.values() if cert.not_after - now <= self.renew_before),
+            'issued': self.issued,
+            'renewed': self.renewed,
+            'repacked': self.repacked,
+            'skipped': self.skipped
+        }
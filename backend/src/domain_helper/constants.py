@@ -83,4 +83,24 @@ http {
     }
 }"""
 
-NGINX_CONFIG_PATH = "/etc/nginx/nginx.conf"
\ No newline at end of file
+NGINX_CONFIG_PATH = "/etc/nginx/nginx.conf"
+
+NGINX_CONF_DIR = "/etc/nginx/conf.d"
+
+NGINX_STORAGE_SINGLE = "single"
+
+NGINX_STORAGE_SHARDED = "sharded"
+
+NGINX_SERVERS_MARKER = "# Add Servers Here"
+
+IO_EXECUTOR_WORKERS = 4
+
+CERT_CHALLENGE_STANDALONE = "standalone"
+
+CERT_CHALLENGE_WEBROOT = "webroot"
+
+ACME_WEBROOT = "/var/www/letsencrypt"
+
+ACME_CHALLENGE_PATH = "/.well-known/acme-challenge/"
+
+CERT_LIVE_DIR = "/etc/letsencrypt/live"
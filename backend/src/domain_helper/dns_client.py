@@ -0,0 +1,191 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import httpx
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        """
+        Token bucket shared by every caller of a client.
+        :param rate: Tokens added per second.
+        :param capacity: Maximum burst size.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while, e.g. after the server sent Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class DnsApiClient:
+    def __init__(
+        self,
+        client: Callable[[], httpx.AsyncClient],
+        rate: float = 1.0,
+        burst: int = 5,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        batch_window: float = 0.05
+    ):
+        """
+        Rate limited DNS provider API client with retries and PATCH batching.
+        :param client: Returns the pooled HTTP client to send requests with.
+        :param rate: Requests per second allowed across all concurrent callers.
+        :param burst: Requests that may be sent back to back before rate limiting kicks in.
+        :param max_retries: Retries after a throttled, failed or unreachable request.
+        :param backoff_base: First backoff delay in seconds, doubled on every retry.
+        :param backoff_max: Upper bound of a single backoff delay in seconds.
+        :param batch_window: Seconds to collect record PATCHes for the same URL into one request.
+        """
+        self.client = client
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.batch_window = batch_window
+        self._batches: dict[str, list[tuple[list[dict], asyncio.Future]]] = {}
+        self._batch_headers: dict[str, dict] = {}
+        self._batch_tasks: dict[str, asyncio.Task] = {}
+        self.requests = 0
+        self.throttled = 0
+        self.retried = 0
+        self.failed = 0
+        self.batched_requests = 0
+        self.batched_records = 0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, honoring Retry-After on 429 and retrying idempotent calls with jittered backoff.
+        Raises `httpx.HTTPStatusError` once retries are exhausted.
+        """
+        method = method.upper()
+        retryable = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            self.requests += 1
+            try:
+                response = await self.client().request(method, url, **kwargs)
+            except httpx.TransportError:
+                if not retryable or attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 429:
+                # The request was rejected before being processed, so it is safe to retry any method
+                self.throttled += 1
+                if attempt < self.max_retries:
+                    attempt += 1
+                    self.retried += 1
+                    delay = self._retry_after(response)
+                    if delay is None:
+                        delay = self._backoff(attempt)
+                    self.bucket.pause(delay)
+                    continue
+            elif response.status_code >= 500 and retryable and attempt < self.max_retries:
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.is_error:
+                self.failed += 1
+            response.raise_for_status()
+            return response
+
+    async def patch_records(self, url: str, records: list[dict], headers: dict) -> httpx.Response:
+        """
+        PATCH records, merged with other PATCHes to the same URL sent within the batch window.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.get(url)
+        if batch is None:
+            batch = self._batches[url] = []
+            self._batch_headers[url] = headers
+            self._batch_tasks[url] = loop.create_task(self._flush_batch(url))
+        batch.append((records, future))
+        return await future
+
+    async def _flush_batch(self, url: str):
+        await asyncio.sleep(self.batch_window)
+        self._batch_tasks.pop(url, None)
+        batch = self._batches.pop(url, [])
+        headers = self._batch_headers.pop(url, {})
+        if not batch:
+            return
+        records = [record for batch_records, _ in batch for record in batch_records]
+        self.batched_requests += 1
+        self.batched_records += len(records)
+        try:
+            response = await self.request("PATCH", url, headers=headers, json=records)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(response)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Parse a Retry-After header given either in seconds or as an HTTP date"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return min(self.backoff_max, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return min(self.backoff_max, max(0.0, retry_at.timestamp() - time.time()))
+
+    def stats(self) -> dict:
+        """Get request, throttling, retry and batching counters"""
+        return {
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'retried': self.retried,
+            'failed': self.failed,
+            'batched_requests': self.batched_requests,
+            'batched_records': self.batched_records
+        }
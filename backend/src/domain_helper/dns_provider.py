@@ -0,0 +1,46 @@
+from typing import Protocol
+
+import tldextract
+
+DEFAULT_RECORD_TYPES = ["A", "CNAME"]
+
+def split_domain(full_domain: str) -> tuple[str, str]:
+    """
+    Split a full domain into subdomain and primary domain.
+    """
+    extracted = tldextract.extract(full_domain)
+    subdomain = extracted.subdomain
+    primary_domain = f"{extracted.domain}.{extracted.suffix}"
+    return subdomain, primary_domain
+
+def build_records(full_domain: str, record_types: list, public_ip: str) -> list[dict]:
+    """
+    Records pointing a domain at this server: A for the name itself and CNAME for its www alias.
+    """
+    subdomain, _ = split_domain(full_domain)
+    return [{
+        "data": public_ip if record_type == "A" else f"{full_domain}.",
+        "name": (subdomain if subdomain else "@") if record_type == "A" else (f"www.{subdomain}" if subdomain else "www"),
+        "type": record_type
+    } for record_type in record_types]
+
+class DnsProvider(Protocol):
+    async def add_records(self, full_domain: str, record_types: list = DEFAULT_RECORD_TYPES):
+        """Point the DNS records of a domain at this server"""
+        ...
+
+    async def remove_records(self, full_domain: str, record_types: list = DEFAULT_RECORD_TYPES):
+        """Remove the DNS records of a domain"""
+        ...
+
+    async def get_records(self, full_domain: str) -> dict[str, str]:
+        """Get the records of a domain and its www alias keyed by record type"""
+        ...
+
+    def stats(self) -> dict:
+        """Provider specific request counters"""
+        ...
+
+    async def aclose(self):
+        """Release connections and other resources"""
+        ...
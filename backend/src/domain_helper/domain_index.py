@@ -0,0 +1,76 @@
+from src.schemas import Domain
+from .dns_provider import split_domain
+
+def normalize_upstream(upstream: str) -> str:
+    """
+    Reduce a `proxy_pass` target to its lowercase `host[:port]`,
+    so `http://localhost:8081/` and `localhost:8081` are the same upstream.
+    """
+    _, separator, rest = upstream.partition("://")
+    if not separator:
+        rest = upstream
+    return rest.split("/", 1)[0].lower()
+
+class DomainIndex:
+    def __init__(self):
+        """
+        Secondary indexes over the domain model, kept up to date by `NginxManager`:
+        primary domain -> domain names and upstream -> domain names.
+        """
+        self._primary: dict[str, set[str]] = {}
+        self._upstream: dict[str, set[str]] = {}
+        # Domain name -> (primary domain, upstreams), to unindex without the previous model
+        self._entries: dict[str, tuple[str, frozenset[str]]] = {}
+
+    def add(self, domain: Domain):
+        """Index a domain, replacing its previous entries"""
+        name = domain.domain
+        upstreams = frozenset(normalize_upstream(host.host) for host in domain.hosts)
+        entry = self._entries.get(name)
+        if entry is not None:
+            if entry[1] == upstreams:
+                return
+            primary = entry[0]
+            self.remove(name)
+        else:
+            _, primary = split_domain(name)
+        self._entries[name] = (primary, upstreams)
+        self._primary.setdefault(primary, set()).add(name)
+        for upstream in upstreams:
+            self._upstream.setdefault(upstream, set()).add(name)
+
+    def remove(self, name: str):
+        """Drop a domain from every index"""
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        primary, upstreams = entry
+        self._discard(self._primary, primary, name)
+        for upstream in upstreams:
+            self._discard(self._upstream, upstream, name)
+
+    def clear(self):
+        self._primary.clear()
+        self._upstream.clear()
+        self._entries.clear()
+
+    @staticmethod
+    def _discard(index: dict[str, set[str]], key: str, name: str):
+        names = index.get(key)
+        if names is None:
+            return
+        names.discard(name)
+        if not names:
+            del index[key]
+
+    def by_primary_domain(self, primary_domain: str) -> set[str]:
+        """Names of the domain and all its subdomains"""
+        return self._primary.get(primary_domain.lower(), set())
+
+    def by_upstream(self, upstream: str) -> set[str]:
+        """Names of the domains with at least one host proxying to an upstream"""
+        return self._upstream.get(normalize_upstream(upstream), set())
+
+    def upstreams(self) -> dict[str, int]:
+        """Number of domains per upstream"""
+        return {upstream: len(names) for upstream, names in self._upstream.items()}
@@ -0,0 +1,64 @@
+from typing import Callable, Optional
+
+from src.schemas import Domain, DomainChange, DomainPlan, Host, HostChange
+from .nginx_config import host_option_values
+
+def host_key(host: Host) -> tuple:
+    """Every field that affects the rendered location, options without any value counting as none"""
+    return host.type, host.path, host.host, host_option_values(host.options)
+
+def diff_domain(current: Domain, desired: Domain) -> Optional[DomainChange]:
+    """
+    Host level changes between two versions of a domain, None when they render the same.
+    Hosts are matched by location path.
+    """
+    current_keys = [host_key(host) for host in current.hosts]
+    desired_keys = [host_key(host) for host in desired.hosts]
+    if current_keys == desired_keys:
+        return None
+    before = {host.path: (key, host) for key, host in zip(current_keys, current.hosts)}
+    after = {host.path: (key, host) for key, host in zip(desired_keys, desired.hosts)}
+    shared_before = [path for path in before if path in after]
+    shared_after = [path for path in after if path in before]
+    return DomainChange(
+        domain=desired.domain,
+        added_hosts=[host for path, (_, host) in after.items() if path not in before],
+        removed_hosts=[host for path, (_, host) in before.items() if path not in after],
+        modified_hosts=[
+            HostChange(path=path, before=before[path][1], after=host)
+            for path, (key, host) in after.items()
+            if path in before and before[path][0] != key
+        ],
+        hosts_reordered=shared_before != shared_after
+    )
+
+def plan_changes(
+    current: Callable[[str], Optional[Domain]],
+    desired: dict[str, Optional[Domain]],
+    cert_changed: Optional[Callable[[str], bool]] = None
+) -> DomainPlan:
+    """
+    Compare desired domains (None meaning removed) with the current ones and list what actually changes.
+    :param current: Returns the currently configured version of a domain, None when it does not exist.
+    :param cert_changed: Tells whether a configured domain would now be rendered with another certificate lineage.
+    """
+    plan = DomainPlan()
+    for name, domain in desired.items():
+        existing = current(name)
+        if domain is None:
+            if existing is None:
+                plan.unchanged.append(name)
+            else:
+                plan.removed.append(name)
+        elif existing is None:
+            plan.added.append(domain)
+        else:
+            change = diff_domain(existing, domain)
+            if cert_changed is not None and cert_changed(name):
+                change = change or DomainChange(domain=name)
+                change.cert_changed = True
+            if change is None:
+                plan.unchanged.append(name)
+            else:
+                plan.modified.append(change)
+    return plan
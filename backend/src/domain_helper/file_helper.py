@@ -0,0 +1,106 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+# Mode of newly created files, matching the privileged path's chmod
+NEW_FILE_MODE = 0o644
+
+def write_file_atomic(path: str, content: str):
+    """
+    Atomically replace a file: write a unique temp file in the same directory and rename it over the target.
+    The file keeps the mode and owner of the one it replaces, a new file is world readable like Nginx's own files.
+    Falls back to elevated privileges when the directory is not writable by the current user.
+    """
+    directory, name = os.path.split(path)
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    except PermissionError:
+        _write_file_privileged(path, content)
+        return
+
+    try:
+        with os.fdopen(fd, 'w') as temp_file:
+            _copy_attributes(path, temp_file.fileno())
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+def _copy_attributes(path: str, fd: int):
+    """Give a temp file the mode and owner of the file it replaces, mkstemp creates it 0600"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        os.fchmod(fd, NEW_FILE_MODE)
+        return
+    os.fchmod(fd, stat.st_mode & 0o7777)
+    if (stat.st_uid, stat.st_gid) != (os.geteuid(), os.getegid()):
+        try:
+            os.fchown(fd, stat.st_uid, stat.st_gid)
+        except PermissionError:
+            pass
+
+def read_file(path: str) -> str:
+    """Read a file, escalating privileges when it is not readable by the current user"""
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except PermissionError:
+        return subprocess.run(["sudo", "cat", path], check=True, capture_output=True, text=True).stdout
+
+def list_dir(path: str) -> list[str]:
+    """List a directory, escalating privileges when it is not readable by the current user"""
+    try:
+        return os.listdir(path)
+    except PermissionError:
+        result = subprocess.run(["sudo", "ls", "-1A", path], check=True, capture_output=True, text=True)
+        return result.stdout.splitlines()
+
+def remove_file(path: str):
+    """Remove a file, ignoring missing files and escalating privileges when needed"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        subprocess.run(["sudo", "rm", "-f", path], check=True)
+
+def make_dir(path: str):
+    """Create a directory and its parents, escalating privileges when needed"""
+    try:
+        os.makedirs(path, exist_ok=True)
+    except PermissionError:
+        subprocess.run(["sudo", "mkdir", "-p", path], check=True)
+
+def remove_dir(path: str):
+    """Remove a directory tree, ignoring a missing one and escalating privileges when needed"""
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        subprocess.run(["sudo", "rm", "-rf", path], check=True)
+
+def _write_file_privileged(path: str, content: str):
+    """Stage the content in /tmp, copy it next to the target with sudo, then rename it into place"""
+    directory, name = os.path.split(path)
+    fd, local_temp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as temp_file:
+            temp_file.write(content)
+        staged_path = os.path.join(directory, f".{os.path.basename(local_temp_path)}")
+        subprocess.run(["sudo", "cp", local_temp_path, staged_path], check=True)
+        if subprocess.run(["sudo", "test", "-e", path]).returncode == 0:
+            # Keep the mode and owner of the replaced file instead of root's defaults
+            subprocess.run(["sudo", "chmod", "--reference", path, staged_path], check=True)
+            subprocess.run(["sudo", "chown", "--reference", path, staged_path], check=True)
+        else:
+            subprocess.run(["sudo", "chmod", f"{NEW_FILE_MODE:o}", staged_path], check=True)
+        subprocess.run(["sudo", "mv", "-f", staged_path, path], check=True)
+    finally:
+        os.unlink(local_temp_path)
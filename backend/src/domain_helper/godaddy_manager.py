@@ -1,19 +1,103 @@
+import asyncio
+import time
+from typing import Optional
+
 import httpx
-import tldextract
+
+from src.metrics import observe_stage
+from .dns_client import DnsApiClient
+from .dns_provider import DEFAULT_RECORD_TYPES, build_records, split_domain
 
 class GodaddyManager:
-    def __init__(self, key: str, secret: str):
+    def __init__(
+        self,
+        key: str,
+        secret: str,
+        api_url: str = "https://api.ote-godaddy.com",
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        public_ip: Optional[str] = None,
+        public_ip_url: str = "https://api.ipify.org",
+        public_ip_ttl: float = 300.0,
+        rate_limit: float = 1.0,
+        rate_burst: int = 5,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        batch_window: float = 0.05
+    ):
         self.key = key
         self.secret = secret
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.public_ip = public_ip
+        self.public_ip_url = public_ip_url
+        self.public_ip_ttl = public_ip_ttl
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cached_ip: Optional[str] = None
+        self._cached_ip_at = 0.0
+        self._ip_lock: Optional[asyncio.Lock] = None
+        self.api = DnsApiClient(
+            lambda: self.client,
+            rate=rate_limit,
+            burst=rate_burst,
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+            batch_window=batch_window
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP/2 client with keep-alive, created on first use.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """
+        Close the pooled HTTP client.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def split_domain(self, full_domain: str):
         """
         Split a full domain into subdomain and primary domain.
         """
-        extracted = tldextract.extract(full_domain)
-        subdomain = extracted.subdomain
-        primary_domain = f"{extracted.domain}.{extracted.suffix}"
-        return subdomain, primary_domain
+        return split_domain(full_domain)
+
+    async def get_public_ip(self) -> str:
+        """
+        Get the public IP of this server: the configured override, or a lookup cached for `public_ip_ttl` seconds.
+        """
+        if self.public_ip:
+            return self.public_ip
+        if self._cached_ip and time.monotonic() - self._cached_ip_at < self.public_ip_ttl:
+            return self._cached_ip
+        if self._ip_lock is None:
+            self._ip_lock = asyncio.Lock()
+        async with self._ip_lock:
+            if self._cached_ip and time.monotonic() - self._cached_ip_at < self.public_ip_ttl:
+                return self._cached_ip
+            ip_response = await self.client.get(self.public_ip_url)
+            ip_response.raise_for_status()
+            self._cached_ip = ip_response.text.strip()
+            self._cached_ip_at = time.monotonic()
+            return self._cached_ip
 
     async def process_records(self, full_domain: str, record_types: list, action: str):
         """
@@ -22,40 +106,60 @@ class GodaddyManager:
         :param record_types: List of record types to process (e.g., ["A", "CNAME"]).
         :param action: Action to perform ("add" or "remove").
         """
+        with observe_stage("process_records", domain=full_domain, action=action):
+            await self._process_records(full_domain, record_types, action)
+
+    async def _process_records(self, full_domain: str, record_types: list, action: str):
         subdomain, primary_domain = self.split_domain(full_domain)
-        
+
         headers = {
             "Authorization": f"sso-key {self.key}:{self.secret}",
             "Content-Type": "application/json"
         }
         if action == "add":
-            async with httpx.AsyncClient() as client:
-                ip_response = await client.get("https://api.ipify.org")
-                ip_response.raise_for_status()
-                public_ip = ip_response.text
-                data = [{
-                    "data": public_ip if record_type == "A" else f"{full_domain}.",
-                    "name": (subdomain if subdomain else "@") if record_type == "A" else (f"www.{subdomain}" if subdomain else "www"),
-                    "type": record_type
-                } for record_type in record_types]
-                url = f"https://api.ote-godaddy.com/v1/domains/{primary_domain}/records"
-                response = await client.patch(url, headers=headers, json=data)
-                response.raise_for_status()
-        for record_type in record_types:
-            if action == "remove":
-                async with httpx.AsyncClient() as client:
-                    url = f"https://api.ote-godaddy.com/v1/domains/{primary_domain}/records/{record_type}/{subdomain if subdomain else '@'}"
-                    response = await client.delete(url, headers=headers)
-                    response.raise_for_status()
-
-    async def add_records(self, full_domain: str, record_types: list = ["A", "CNAME"]):
+            public_ip = await self.get_public_ip()
+            data = build_records(full_domain, record_types, public_ip)
+            url = f"{self.api_url}/v1/domains/{primary_domain}/records"
+            await self.api.patch_records(url, data, headers)
+        elif action == "remove":
+            async def remove_record(record_type: str):
+                url = f"{self.api_url}/v1/domains/{primary_domain}/records/{record_type}/{subdomain if subdomain else '@'}"
+                await self.api.request("DELETE", url, headers=headers)
+
+            await asyncio.gather(*[remove_record(record_type) for record_type in record_types])
+
+    async def get_records(self, full_domain: str) -> dict[str, str]:
+        """
+        Get the records of a domain and its www alias keyed by record type.
+        """
+        _, primary_domain = self.split_domain(full_domain)
+        headers = {"Authorization": f"sso-key {self.key}:{self.secret}"}
+
+        async def get_record(record: dict) -> Optional[str]:
+            url = f"{self.api_url}/v1/domains/{primary_domain}/records/{record['type']}/{record['name']}"
+            response = await self.api.request("GET", url, headers=headers)
+            found = response.json()
+            return found[0]["data"] if found else None
+
+        # The data is not needed to build the names, so the public IP is not looked up
+        records = build_records(full_domain, DEFAULT_RECORD_TYPES, "")
+        found = await asyncio.gather(*[get_record(record) for record in records])
+        return {record["type"]: data for record, data in zip(records, found) if data is not None}
+
+    def stats(self) -> dict:
+        """
+        Get API request, throttling, retry and batching counters.
+        """
+        return self.api.stats()
+
+    async def add_records(self, full_domain: str, record_types: list = DEFAULT_RECORD_TYPES):
         """
         Add DNS records for a domain or subdomain with multiple types.
         """
         return await self.process_records(full_domain, record_types, action="add")
 
-    async def remove_records(self, full_domain: str, record_types: list = ["A", "CNAME"]):
+    async def remove_records(self, full_domain: str, record_types: list = DEFAULT_RECORD_TYPES):
         """
         Remove DNS records for a domain or subdomain with multiple types.
         """
-        return await self.process_records(full_domain, record_types, action="remove")
\ No newline at end of file
+        return await self.process_records(full_domain, record_types, action="remove")
@@ -0,0 +1,222 @@
+import asyncio
+import heapq
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+import httpx
+
+from src.schemas import UpstreamHealth
+from .domain_index import normalize_upstream
+
+logger = logging.getLogger(__name__)
+
+class HealthChecker:
+    def __init__(
+        self,
+        targets: Callable[[], Iterable[str]],
+        revision: Optional[Callable[[], int]] = None,
+        interval: float = 30.0,
+        unhealthy_interval: float = 10.0,
+        timeout: float = 5.0,
+        concurrency: int = 100,
+        path: str = "/",
+        tick: float = 1.0
+    ):
+        """
+        Probes every distinct upstream in the background and caches the latest result per upstream.
+        Upstreams shared by several hosts are probed once; each has its own schedule, spread over the
+        interval so probes do not come in bursts.
+        :param targets: Returns every `proxy_pass` target currently configured.
+        :param revision: Returns a counter that changes whenever the targets change,
+            so they are only collected again after a change. Collected every tick when unset.
+        :param interval: Seconds between probes of a healthy upstream.
+        :param unhealthy_interval: Seconds between probes of an unhealthy upstream.
+        :param timeout: Seconds before a probe counts as failed.
+        :param concurrency: Maximum number of probes in flight, also the connection pool size.
+        :param path: Path requested on every upstream. Any response below 500 counts as healthy.
+        :param tick: Seconds between scheduling passes.
+        """
+        self.targets = targets
+        self.revision = revision
+        self.interval = interval
+        self.unhealthy_interval = unhealthy_interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.path = path
+        self.tick = tick
+        self.results: dict[str, UpstreamHealth] = {}
+        # Upstream -> probed URL
+        self._urls: dict[str, str] = {}
+        self._schedule: list[tuple[float, str]] = []
+        # Upstream -> time of its next probe; heap entries not matching it are stale
+        self._due: dict[str, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: list[asyncio.Task] = []
+        self._synced_revision: Optional[int] = None
+        self.probes = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_lag = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Pooled client shared by every probe. Certificates are not verified, like Nginx does not by default.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                verify=False
+            )
+        return self._client
+
+    def start(self):
+        """
+        Start the scheduler and `concurrency` probe workers.
+        """
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._schedule_loop()))
+        self._tasks.extend(asyncio.create_task(self._worker()) for _ in range(self.concurrency))
+
+    async def stop(self):
+        """
+        Stop probing and close the pooled connections.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def sync(self):
+        """
+        Pick up added and removed upstreams. New upstreams get a random first probe time within the interval.
+        """
+        if self.revision is not None:
+            revision = self.revision()
+            if revision == self._synced_revision:
+                return
+            self._synced_revision = revision
+
+        urls = {}
+        for target in self.targets():
+            if "$" in target:
+                # Resolved per request by Nginx, nothing to probe
+                continue
+            upstream = normalize_upstream(target)
+            if upstream not in urls:
+                scheme = target.partition("://")[0] if "://" in target else "http"
+                urls[upstream] = f"{scheme}://{upstream}{self.path}"
+
+        now = time.monotonic()
+        for upstream in urls.keys() - self._urls.keys():
+            self._push(upstream, now + random.uniform(0, self.interval))
+        for upstream in self._urls.keys() - urls.keys():
+            self.results.pop(upstream, None)
+            self._due.pop(upstream, None)
+        self._urls = urls
+
+    def _push(self, upstream: str, due: float):
+        self._due[upstream] = due
+        heapq.heappush(self._schedule, (due, upstream))
+
+    async def _schedule_loop(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Collecting health check targets failed")
+            now = time.monotonic()
+            while self._schedule and self._schedule[0][0] <= now:
+                due, upstream = heapq.heappop(self._schedule)
+                # Entries of removed or rescheduled upstreams are dropped lazily when they come due
+                if self._due.get(upstream) == due:
+                    self._queue.put_nowait((due, upstream))
+            delay = self._schedule[0][0] - now if self._schedule else self.tick
+            await asyncio.sleep(min(max(delay, 0.0), self.tick))
+
+    async def _worker(self):
+        while True:
+            due, upstream = await self._queue.get()
+            self.max_lag = max(self.max_lag, time.monotonic() - due)
+            url = self._urls.get(upstream)
+            if url is None:
+                continue
+            self.in_flight += 1
+            try:
+                result = await self.probe(upstream, url)
+            finally:
+                self.in_flight -= 1
+            if self._due.get(upstream) != due:
+                continue
+            self.results[upstream] = result
+            interval = self.interval if result.healthy else self.unhealthy_interval
+            self._push(upstream, time.monotonic() + interval)
+
+    async def probe(self, upstream: str, url: str) -> UpstreamHealth:
+        """
+        Request an upstream once without reading the body.
+        """
+        previous = self.results.get(upstream)
+        failures = previous.consecutive_failures if previous else 0
+        self.probes += 1
+        started = time.perf_counter()
+        try:
+            request = self.client.build_request("GET", url)
+            response = await self.client.send(request, stream=True)
+            await response.aclose()
+        except Exception as e:
+            self.failures += 1
+            return UpstreamHealth(
+                upstream=upstream,
+                url=url,
+                healthy=False,
+                latency=time.perf_counter() - started,
+                error=str(e) or type(e).__name__,
+                checked_at=datetime.now(),
+                consecutive_failures=failures + 1
+            )
+        healthy = response.status_code < 500
+        if not healthy:
+            self.failures += 1
+        return UpstreamHealth(
+            upstream=upstream,
+            url=url,
+            healthy=healthy,
+            status_code=response.status_code,
+            latency=time.perf_counter() - started,
+            checked_at=datetime.now(),
+            consecutive_failures=0 if healthy else failures + 1
+        )
+
+    def get(self, target: str) -> Optional[UpstreamHealth]:
+        """
+        Latest result for a `proxy_pass` target, None until it has been probed.
+        """
+        return self.results.get(normalize_upstream(target))
+
+    def stats(self) -> dict:
+        """
+        Get probe counters and the current health of every upstream.
+        """
+        healthy = sum(1 for result in self.results.values() if result.healthy)
+        return {
+            'upstreams': len(self._urls),
+            'healthy': healthy,
+            'unhealthy': len(self.results) - healthy,
+            'pending': len(self._urls) - len(self.results),
+            'probes': self.probes,
+            'failures': self.failures,
+            'in_flight': self.in_flight,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'max_lag': self.max_lag
+        }
@@ -0,0 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+class KeyedLocks:
+    def __init__(self):
+        """
+        Async locks created per key on first use and dropped once nobody holds or waits for them,
+        so work on different domains runs in parallel while work on the same domain is serialized.
+        """
+        # Key -> (lock, number of holders and waiters)
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        self.acquired = 0
+        self.contended = 0
+
+    @asynccontextmanager
+    async def hold(self, *keys: str) -> AsyncIterator[None]:
+        """
+        Hold the locks of every key. They are taken in sorted order, so callers holding
+        overlapping sets of keys cannot deadlock. Not reentrant.
+        """
+        keys = sorted(set(keys))
+        for key in keys:
+            lock, users = self._locks.get(key) or (asyncio.Lock(), 0)
+            self._locks[key] = (lock, users + 1)
+        held = []
+        try:
+            for key in keys:
+                lock = self._locks[key][0]
+                if lock.locked():
+                    self.contended += 1
+                await lock.acquire()
+                held.append(lock)
+                self.acquired += 1
+            yield
+        finally:
+            for lock in held:
+                lock.release()
+            for key in keys:
+                lock, users = self._locks[key]
+                if users == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+    def stats(self) -> dict:
+        """Get lock counters"""
+        return {
+            'keys': len(self._locks),
+            'acquired': self.acquired,
+            'contended': self.contended
+        }
@@ -0,0 +1,94 @@
+import os
+import time
+from typing import Optional
+
+from src.metrics import observe_stage
+from .dns_provider import DEFAULT_RECORD_TYPES, build_records, split_domain
+from .file_helper import write_file_atomic
+from .process_helper import run_in_io_executor
+
+class LocalDnsProvider:
+    def __init__(self, public_ip: str = "127.0.0.1", zone_dir: Optional[str] = None, ttl: int = 600):
+        """
+        DNS provider keeping records in memory, for offline and load testing.
+        :param public_ip: Address the A records point at.
+        :param zone_dir: If set, every change rewrites `<zone_dir>/<primary domain>.zone` as a BIND zone file.
+        :param ttl: Default TTL written to zone files.
+        """
+        self.public_ip = public_ip
+        self.zone_dir = zone_dir
+        self.ttl = ttl
+        self.zones: dict[str, dict[tuple[str, str], str]] = {}
+        self.added = 0
+        self.removed = 0
+
+    async def add_records(self, full_domain: str, record_types: list = DEFAULT_RECORD_TYPES):
+        """
+        Add DNS records for a domain or subdomain with multiple types.
+        """
+        with observe_stage("process_records", domain=full_domain, action="add"):
+            _, primary_domain = split_domain(full_domain)
+            zone = self.zones.setdefault(primary_domain, {})
+            for record in build_records(full_domain, record_types, self.public_ip):
+                zone[(record["name"], record["type"])] = record["data"]
+                self.added += 1
+            await self._write_zone(primary_domain)
+
+    async def remove_records(self, full_domain: str, record_types: list = DEFAULT_RECORD_TYPES):
+        """
+        Remove DNS records for a domain or subdomain with multiple types.
+        """
+        with observe_stage("process_records", domain=full_domain, action="remove"):
+            _, primary_domain = split_domain(full_domain)
+            zone = self.zones.get(primary_domain, {})
+            for record in build_records(full_domain, record_types, self.public_ip):
+                if zone.pop((record["name"], record["type"]), None) is not None:
+                    self.removed += 1
+            await self._write_zone(primary_domain)
+
+    async def get_records(self, full_domain: str) -> dict[str, str]:
+        """
+        Get the records of a domain keyed by record type.
+        """
+        _, primary_domain = split_domain(full_domain)
+        zone = self.zones.get(primary_domain, {})
+        records = {}
+        for record in build_records(full_domain, DEFAULT_RECORD_TYPES, self.public_ip):
+            data = zone.get((record["name"], record["type"]))
+            if data is not None:
+                records[record["type"]] = data
+        return records
+
+    def render_zone(self, primary_domain: str) -> str:
+        """
+        Render a zone as a BIND zone file.
+        """
+        lines = [
+            f"$ORIGIN {primary_domain}.",
+            f"$TTL {self.ttl}",
+            f"@ IN SOA ns1.{primary_domain}. hostmaster.{primary_domain}. "
+            f"({int(time.time())} 3600 600 604800 {self.ttl})",
+            f"@ IN NS ns1.{primary_domain}."
+        ]
+        for (name, record_type), data in sorted(self.zones.get(primary_domain, {}).items()):
+            lines.append(f"{name} IN {record_type} {data}")
+        return "\n".join(lines) + "\n"
+
+    async def _write_zone(self, primary_domain: str):
+        if not self.zone_dir:
+            return
+        path = os.path.join(self.zone_dir, f"{primary_domain}.zone")
+        await run_in_io_executor(write_file_atomic, path, self.render_zone(primary_domain))
+
+    def stats(self) -> dict:
+        """
+        Get record counters.
+        """
+        return {
+            'zones': len(self.zones),
+            'records_added': self.added,
+            'records_removed': self.removed
+        }
+
+    async def aclose(self):
+        pass
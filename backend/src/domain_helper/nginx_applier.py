@@ -0,0 +1,317 @@
+import fnmatch
+import json
+import logging
+import os
+import subprocess
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from src.metrics import STAGE_FAILURES, record_stage
+from .constants import NGINX_CONFIG_PATH, NGINX_CONF_DIR
+from .file_helper import list_dir, make_dir, read_file, remove_dir, remove_file, write_file_atomic
+from .nginx_parser import Directive, NginxParseError, parse
+
+logger = logging.getLogger(__name__)
+
+Changes = list[tuple[str, Optional[str]]]
+
+# Transaction stage -> pipeline stage reported in metrics
+METRIC_STAGES = {
+    "stage": "stage_config",
+    "validate": "validate_config",
+    "swap": "swap_config",
+    "reload": "reload_nginx",
+    "restore": "restore_config"
+}
+
+class NginxApplyError(RuntimeError):
+    def __init__(self, message: str, transaction: dict):
+        super().__init__(message)
+        self.transaction = transaction
+
+class NginxApplier:
+    def __init__(
+        self,
+        binary: str = "nginx",
+        use_sudo: bool = True,
+        config_path: str = NGINX_CONFIG_PATH,
+        conf_dir: str = NGINX_CONF_DIR,
+        history_dir: Optional[str] = None,
+        history_size: int = 5,
+        keep_transactions: int = 50
+    ):
+        """
+        Applies config changes as a transaction: stage, `nginx -t -c`, atomic swap, reload,
+        and restore of the previous files when the reload does not go through.
+        :param binary: Nginx executable, replaceable by a stub in tests.
+        :param use_sudo: Prefix Nginx and systemctl commands with sudo.
+        :param history_dir: Directory keeping the files replaced by the last `history_size` transactions,
+            relative paths being resolved against the directory of `config_path`. Each snapshot is the
+            last known good state, since transactions only swap validated configs, and is listed
+            as `history` on its transaction record.
+        :param keep_transactions: Number of transaction records kept in memory for inspection.
+        """
+        self.binary = binary
+        self.use_sudo = use_sudo
+        self.config_path = config_path
+        self.conf_dir = conf_dir.rstrip("/")
+        # Relative to the config's directory, so history does not depend on the working directory
+        self.history_dir = os.path.join(os.path.dirname(config_path), history_dir) if history_dir else None
+        self.history_size = history_size
+        self.transactions: deque[dict] = deque(maxlen=keep_transactions)
+        self.applied = 0
+        self.invalid = 0
+        self.rolled_back = 0
+
+    def _command(self, *args: str) -> list[str]:
+        return ["sudo", *args] if self.use_sudo else list(args)
+
+    def _run(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(self._command(*args), check=True, capture_output=True, text=True)
+
+    def test_config(self, config_path: Optional[str] = None):
+        """Validate a configuration file, raising `CalledProcessError` with Nginx's output on failure"""
+        self._run(self.binary, "-t", "-c", config_path or self.config_path)
+
+    def reload(self):
+        """
+        Reload Nginx. Only validated configs reach this point, so a failed reload
+        (e.g. Nginx not running) falls back to a restart.
+        """
+        try:
+            self._run(self.binary, "-s", "reload")
+        except subprocess.CalledProcessError as e:
+            logger.warning("Nginx reload failed, restarting", extra={'error': (e.stderr or str(e)).strip()})
+            self._run("systemctl", "restart", "nginx")
+
+    def apply(self, changes: Changes, render_time: float = 0.0) -> dict:
+        """
+        Apply (path, content) changes, content None deleting the file.
+        :param render_time: Seconds spent rendering the changes, recorded with the transaction.
+        :return: The transaction record with per stage timings.
+        Raises `NginxApplyError` if validation fails (nothing is swapped) or the reload fails (files are restored).
+        """
+        transaction = {
+            'id': uuid.uuid4().hex,
+            'started_at': datetime.now().isoformat(),
+            'files': len(changes),
+            'status': "running",
+            'error': None,
+            'timings': {'render': render_time}
+        }
+        self.transactions.append(transaction)
+        if not changes:
+            # Nothing to swap, e.g. renewed certificates: validate the live config and reload
+            try:
+                with self._timed(transaction, "validate"):
+                    self.test_config()
+                with self._timed(transaction, "reload"):
+                    self.reload()
+            except subprocess.CalledProcessError as e:
+                raise self._fail(transaction, "failed", "Nginx reload failed", e)
+            transaction['status'] = "reloaded"
+            return transaction
+
+        staged = []
+        try:
+            with self._timed(transaction, "stage"):
+                staged_main = self._stage(changes, staged)
+            with self._timed(transaction, "validate"):
+                try:
+                    self.test_config(staged_main)
+                except subprocess.CalledProcessError as e:
+                    self.invalid += 1
+                    raise self._fail(transaction, "invalid", "Nginx configuration test failed", e)
+        finally:
+            for path in staged:
+                remove_file(path)
+
+        with self._timed(transaction, "swap"):
+            snapshot = self._snapshot(transaction, changes)
+            self._swap(changes)
+        try:
+            with self._timed(transaction, "reload"):
+                self.reload()
+        except subprocess.CalledProcessError as e:
+            with self._timed(transaction, "restore"):
+                self._swap(snapshot)
+                try:
+                    self.reload()
+                except subprocess.CalledProcessError as restore_error:
+                    logger.error(
+                        "Nginx reload after restore failed",
+                        extra={'error': (restore_error.stderr or str(restore_error)).strip()}
+                    )
+            self.rolled_back += 1
+            raise self._fail(transaction, "rolled_back", "Nginx reload failed, previous config restored", e)
+
+        self.applied += 1
+        transaction['status'] = "applied"
+        logger.info(
+            "Nginx transaction applied",
+            extra={'transaction': transaction['id'], 'files': len(changes), 'timings': transaction['timings']}
+        )
+        return transaction
+
+    def _fail(self, transaction: dict, status: str, message: str, error: subprocess.CalledProcessError) -> NginxApplyError:
+        transaction['status'] = status
+        transaction['error'] = (error.stderr or str(error)).strip()
+        logger.error(message, extra={
+            'transaction': transaction['id'],
+            'status': status,
+            'error': transaction['error'],
+            'timings': transaction['timings']
+        })
+        return NginxApplyError(f"{message}: {transaction['error']}", transaction)
+
+    @contextmanager
+    def _timed(self, transaction: dict, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            STAGE_FAILURES.labels(METRIC_STAGES[stage]).inc()
+            raise
+        finally:
+            duration = transaction['timings'][stage] = time.perf_counter() - started
+            record_stage(METRIC_STAGES[stage], duration)
+
+    def _stage(self, changes: Changes, staged: list[str]) -> str:
+        """
+        Write the changes next to their targets as hidden `.staged` files and build a staged main config
+        including them, so relative includes resolve exactly as they do for the live config.
+        :param staged: Receives every staged path, for cleanup.
+        :return: The staged main config to validate.
+        """
+        pending = dict(changes)
+
+        main = pending.pop(self.config_path, None)
+        if main is None:
+            main = read_file(self.config_path)
+
+        if pending:
+            staged_shards = {}
+            for path, content in pending.items():
+                if content is None:
+                    staged_shards[path] = None
+                    continue
+                staged_path = self._staged_path(path)
+                write_file_atomic(staged_path, content)
+                staged.append(staged_path)
+                staged_shards[path] = staged_path
+            main = self._replace_shard_includes(main, staged_shards)
+
+        staged_main = self._staged_path(self.config_path)
+        write_file_atomic(staged_main, main)
+        staged.append(staged_main)
+        return staged_main
+
+    def _staged_path(self, path: str) -> str:
+        directory, name = os.path.split(path)
+        return os.path.join(directory, f".{name}.staged")
+
+    def _replace_shard_includes(self, main: str, staged_shards: dict[str, Optional[str]]) -> str:
+        """
+        Expand includes of the conf.d directory into one include per file,
+        pointing changed files at their staged copy and leaving deleted ones out.
+        """
+        try:
+            tree = parse(main)
+        except NginxParseError:
+            return main
+        includes = [
+            node for node in tree.walk()
+            if isinstance(node, Directive) and node.name == "include" and node.args
+            and os.path.dirname(node.args[0]).rstrip("/") == self.conf_dir
+        ]
+        if not includes:
+            return main
+        try:
+            existing = set(list_dir(self.conf_dir))
+        except FileNotFoundError:
+            existing = set()
+
+        parts = []
+        position = 0
+        for include in includes:
+            pattern = os.path.basename(include.args[0])
+            files = []
+            for name in sorted(existing | {os.path.basename(path) for path in staged_shards}):
+                if not fnmatch.fnmatch(name, pattern):
+                    continue
+                path = os.path.join(self.conf_dir, name)
+                if path in staged_shards:
+                    path = staged_shards[path]
+                    if path is None:
+                        continue
+                files.append(path)
+            parts.append(main[position:include.start])
+            parts.append(" ".join(f"include {path};" for path in files) or "# no files")
+            position = include.end
+        parts.append(main[position:])
+        return "".join(parts)
+
+    def _snapshot(self, transaction: dict, changes: Changes) -> Changes:
+        """
+        Record the current content of every path about to change, on disk when a history directory is set.
+        """
+        snapshot = []
+        for path, _ in changes:
+            try:
+                snapshot.append((path, read_file(path)))
+            except (FileNotFoundError, subprocess.CalledProcessError):
+                snapshot.append((path, None))
+        if self.history_dir:
+            try:
+                transaction['history'] = self._write_history(transaction['id'], snapshot)
+            except (OSError, subprocess.CalledProcessError) as e:
+                # The in-memory snapshot still covers the restore
+                logger.warning("Nginx history could not be written", extra={
+                    'transaction': transaction['id'], 'error': str(e)
+                })
+        return snapshot
+
+    def _write_history(self, transaction_id: str, snapshot: Changes) -> str:
+        """
+        Write the snapshot with a manifest of the original paths, for restoring by hand.
+        :return: The snapshot directory.
+        """
+        entry_dir = os.path.join(self.history_dir, f"{time.time_ns()}-{transaction_id}")
+        make_dir(entry_dir)
+        files = []
+        for index, (path, content) in enumerate(snapshot):
+            file_name = None
+            if content is not None:
+                file_name = f"{index}.conf"
+                write_file_atomic(os.path.join(entry_dir, file_name), content)
+            files.append({'path': path, 'snapshot': file_name})
+        write_file_atomic(
+            os.path.join(entry_dir, "manifest.json"),
+            json.dumps({'id': transaction_id, 'created_at': datetime.now().isoformat(), 'files': files})
+        )
+
+        entries = sorted(list_dir(self.history_dir))
+        for entry in entries[:-self.history_size] if self.history_size else entries:
+            remove_dir(os.path.join(self.history_dir, entry))
+        return entry_dir
+
+    def _swap(self, changes: Changes):
+        for path, content in changes:
+            if content is None:
+                remove_file(path)
+            else:
+                write_file_atomic(path, content)
+
+    def stats(self) -> dict:
+        """Get transaction counters and the most recent transactions"""
+        return {
+            'applied': self.applied,
+            'invalid': self.invalid,
+            'rolled_back': self.rolled_back,
+            'recent': list(self.transactions)[::-1]
+        }
+
@@ -1,61 +1,274 @@
-from src.schemas import Domain, HostType
+import re
+import time
+from typing import Optional
 
-def get_nginx_domain_config(domain: Domain) -> str:
-    server_config = f"""# {domain.domain} configuration
+from pydantic import ValidationError
+
+from src.metrics import record_stage
+from src.schemas import Domain, Host, HostOptions, HostType
+from .constants import ACME_CHALLENGE_PATH, CERT_LIVE_DIR
+from .template import Template
+
+ACME_CHALLENGE_LOCATION = Template("""location ^~ {path} {{
+            root {webroot};
+            default_type "text/plain";
+        }}""")
+
+HTTP_REDIRECT = Template("""
+        return 301 https://{domain}$request_uri;""")
+
+HTTP_ACME = Template("""
+
+        {acme_location}
+
+        location / {{
+            return 301 https://{domain}$request_uri;
+        }}""")
+
+SERVER_HEAD = Template("""# {domain} configuration
     server {{
         listen 80;
         listen [::]:80;
-        server_name {domain.domain} www.{domain.domain};
-        return 301 https://{domain.domain}$request_uri;
+        server_name {domain} www.{domain};{http_config}
     }}
 
     server {{
         listen 443 ssl http2;
         listen [::]:443 ssl http2;
 
-        server_name {domain.domain} www.{domain.domain};
+        server_name {domain} www.{domain};
         
         # Redirect www to non-www
-        if ($host = www.{domain.domain}) {{
-            return 301 https://{domain.domain}$request_uri;
+        if ($host = www.{domain}) {{
+            return 301 https://{domain}$request_uri;
         }}
 
         client_max_body_size 512M;
 
-        ssl_certificate /etc/letsencrypt/live/{domain.domain}/fullchain.pem;
-        ssl_certificate_key /etc/letsencrypt/live/{domain.domain}/privkey.pem;
+        ssl_certificate {live_dir}/{cert_name}/fullchain.pem;
+        ssl_certificate_key {live_dir}/{cert_name}/privkey.pem;
         
         include /etc/letsencrypt/options-ssl-nginx.conf;
         ssl_dhparam /etc/letsencrypt/ssl-dhparams.pem;
-"""
+""")
 
-    for host in domain.hosts:
-        if host.type == HostType.WebSocket:
-            server_config += f"""
-        location {host.path} {{
-            proxy_pass {host.host};
-            proxy_http_version 1.1;
-            proxy_set_header Upgrade $http_upgrade;
-            proxy_set_header Connection "Upgrade";
+SERVER_TAIL = """    }
+
+    """
+
+LOCATIONS = {
+    HostType.Default: Template("""
+        location {path} {{
+            proxy_pass {host};
             proxy_set_header Host $host;
             proxy_set_header X-Real-IP $remote_addr;
             proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
             proxy_set_header X-Forwarded-Proto $scheme;
-        }}
-"""
-        else:
-            server_config += f"""
-        location {host.path} {{
-            proxy_pass {host.host};
+{options}        }}
+"""),
+    HostType.WebSocket: Template("""
+        location {path} {{
+            proxy_pass {host};
+            proxy_http_version 1.1;
+            proxy_set_header Upgrade $http_upgrade;
+            proxy_set_header Connection "Upgrade";
             proxy_set_header Host $host;
             proxy_set_header X-Real-IP $remote_addr;
             proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
             proxy_set_header X-Forwarded-Proto $scheme;
-        }}
-"""
-    
-    server_config += f"""    }}
+{options}        }}
+""")
+}
+
+# Host option -> Nginx directive, in the order they are rendered
+HOST_OPTION_DIRECTIVES = {
+    "connect_timeout": "proxy_connect_timeout",
+    "read_timeout": "proxy_read_timeout",
+    "send_timeout": "proxy_send_timeout",
+    "buffering": "proxy_buffering",
+    "cache": "proxy_cache",
+    "cache_valid": "proxy_cache_valid",
+    "gzip": "gzip"
+}
+
+# Nginx time unit -> milliseconds, a bare number is seconds
+NGINX_TIME_UNITS = {
+    "ms": 1,
+    "": 1000,
+    "s": 1000,
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+    "M": 2_592_000_000,
+    "y": 31_536_000_000
+}
+NGINX_TIME_PART_PATTERN = re.compile(r"(\d+)(ms|[smhdwMy]?)")
+NGINX_TIME_PATTERN = re.compile(r"(?:\d+(?:ms|[smhdwMy])?\s*)+")
 
+def get_acme_challenge_location(webroot: str) -> str:
     """
-    
-    return server_config
\ No newline at end of file
+    Location answering ACME HTTP-01 challenges from the shared certbot webroot.
+    """
+    return ACME_CHALLENGE_LOCATION.render(path=ACME_CHALLENGE_PATH, webroot=webroot)
+
+def host_option_values(options: Optional[HostOptions]) -> Optional[tuple]:
+    """
+    Values of the rendered options in directive order, None when no option is set.
+    """
+    if options is None:
+        return None
+    values = tuple(getattr(options, field) for field in HOST_OPTION_DIRECTIVES)
+    return values if any(value is not None for value in values) else None
+
+def render_host_options(options: Optional[HostOptions]) -> str:
+    """
+    Render the extra directives of a location, one per line.
+    """
+    if options is None:
+        return ""
+    lines = []
+    for field, directive in HOST_OPTION_DIRECTIVES.items():
+        value = getattr(options, field)
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "on" if value else "off"
+        elif isinstance(value, int):
+            value = f"{value}s"
+        lines.append(f"            {directive} {value};\n")
+    return "".join(lines)
+
+def parse_nginx_time(value: str) -> Optional[int]:
+    """
+    Parse an Nginx time value such as `30`, `2m`, `1h` or `1m30s` into seconds.
+    :return: None when the value is malformed or not a whole number of seconds.
+    """
+    if not NGINX_TIME_PATTERN.fullmatch(value):
+        return None
+    milliseconds = sum(
+        int(number) * NGINX_TIME_UNITS[unit]
+        for number, unit in NGINX_TIME_PART_PATTERN.findall(value)
+    )
+    if milliseconds % 1000:
+        return None
+    return milliseconds // 1000
+
+def parse_host_options(directives: dict[str, str]) -> Optional[HostOptions]:
+    """
+    Read host options back from the directives of a location, None when there are none.
+    """
+    values = {}
+    for field, directive in HOST_OPTION_DIRECTIVES.items():
+        value = directives.get(directive)
+        if value is None:
+            continue
+        annotation = HostOptions.model_fields[field].annotation
+        if annotation == Optional[bool]:
+            values[field] = value == "on"
+        elif annotation == Optional[int]:
+            seconds = parse_nginx_time(value)
+            if seconds is None:
+                # Whole seconds only, e.g. `500ms` cannot be represented and is left out
+                continue
+            values[field] = seconds
+        else:
+            try:
+                HostOptions(**{field: value})
+            except ValidationError:
+                # Rejected by the API as well, e.g. a zone name built from `${variable}`
+                continue
+            values[field] = value
+    return HostOptions(**values) if values else None
+
+def render_location(host: Host) -> str:
+    return LOCATIONS[host.type].render(
+        path=host.path,
+        host=host.host,
+        options=render_host_options(host.options) if host.options else ""
+    )
+
+def get_nginx_domain_config(
+    domain: Domain,
+    acme_webroot: Optional[str] = None,
+    cert_name: Optional[str] = None,
+    live_dir: str = CERT_LIVE_DIR
+) -> str:
+    """
+    :param cert_name: Certificate lineage covering the domain, defaults to a lineage named after the domain.
+    :param live_dir: Directory holding the certificate lineages.
+    """
+    if acme_webroot:
+        http_config = HTTP_ACME.render(
+            acme_location=get_acme_challenge_location(acme_webroot),
+            domain=domain.domain
+        )
+    else:
+        http_config = HTTP_REDIRECT.render(domain=domain.domain)
+
+    parts = [SERVER_HEAD.render(
+        domain=domain.domain,
+        http_config=http_config,
+        cert_name=cert_name or domain.domain,
+        live_dir=live_dir.rstrip("/")
+    )]
+    parts.extend(map(render_location, domain.hosts))
+    parts.append(SERVER_TAIL)
+    return "".join(parts)
+
+class DomainConfigRenderer:
+    def __init__(self, acme_webroot: Optional[str] = None, live_dir: str = CERT_LIVE_DIR):
+        """
+        Renders server blocks, keeping the last block of every domain keyed by a fingerprint of its model,
+        so re-applying an unchanged domain does not render it again.
+        """
+        self.acme_webroot = acme_webroot
+        self.live_dir = live_dir
+        self._cache: dict[str, tuple[tuple, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, domain: Domain, cert_name: Optional[str] = None) -> str:
+        key = self.cache_key(domain, cert_name)
+        cached = self._cache.get(domain.domain)
+        if cached and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        started = time.perf_counter()
+        config = get_nginx_domain_config(
+            domain,
+            acme_webroot=self.acme_webroot,
+            cert_name=cert_name,
+            live_dir=self.live_dir
+        )
+        record_stage("get_nginx_domain_config", time.perf_counter() - started)
+        self._cache[domain.domain] = (key, config)
+        return config
+
+    @staticmethod
+    def cache_key(domain: Domain, cert_name: Optional[str] = None) -> tuple:
+        """Hashable fingerprint of every field that affects the rendered block"""
+        return (
+            cert_name,
+            tuple(
+                (
+                    host.type,
+                    host.path,
+                    host.host,
+                    host_option_values(host.options)
+                )
+                for host in domain.hosts
+            )
+        )
+
+    def forget(self, name: str):
+        """Drop the cached block of a removed domain"""
+        self._cache.pop(name, None)
+
+    def stats(self) -> dict:
+        return {
+            'cached_domains': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
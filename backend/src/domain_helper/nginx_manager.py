@@ -1,165 +1,613 @@
-import subprocess
+import logging
+import os
 import re
-from typing import List
+import time
+from itertools import count
+from typing import Callable, Iterator, List, Optional, Union
 
-from .constants import NGINX_CONFIG_PATH, NGINX_DEFAUT_CONFIG
-from .nginx_config import get_nginx_domain_config
+from .constants import (
+    ACME_CHALLENGE_PATH,
+    CERT_LIVE_DIR,
+    NGINX_CONFIG_PATH,
+    NGINX_CONF_DIR,
+    NGINX_DEFAUT_CONFIG,
+    NGINX_SERVERS_MARKER,
+    NGINX_STORAGE_SHARDED,
+    NGINX_STORAGE_SINGLE
+)
+from .domain_index import DomainIndex
+from .file_helper import list_dir, read_file, remove_file, write_file_atomic
+from .nginx_applier import NginxApplier
+from .nginx_config import DomainConfigRenderer, get_acme_challenge_location, parse_host_options
+from .nginx_parser import Block, Comment, Directive, NginxParseError, find_blocks, parse
+from .process_helper import run_in_io_executor
+from src.metrics import observe_stage
 from src.schemas import Domain, Host, HostType
 
+logger = logging.getLogger(__name__)
+
+# Certificate lineage directory of a rendered block
+SSL_CERTIFICATE_PATTERN = re.compile(r"^[ \t]*ssl_certificate[ \t]+(\S+)/fullchain\.pem;", re.MULTILINE)
+
 class NginxManager:
-    def __init__(self):
+    def __init__(
+        self,
+        storage_mode: str = NGINX_STORAGE_SINGLE,
+        config_path: str = NGINX_CONFIG_PATH,
+        conf_dir: str = NGINX_CONF_DIR,
+        acme_webroot: Optional[str] = None,
+        cert_resolver: Optional[Callable[[str], Optional[str]]] = None,
+        live_dir: str = CERT_LIVE_DIR,
+        applier: Optional[NginxApplier] = None
+    ):
+        """
+        :param storage_mode: "single" keeps every domain in nginx.conf,
+            "sharded" writes each domain to its own `<conf_dir>/<domain>.conf` include file.
+        :param config_path: Main Nginx config file.
+        :param conf_dir: Directory included by the main config, used for sharded storage.
+        :param acme_webroot: When set, port 80 keeps serving and ACME HTTP-01 challenges are
+            answered from this directory, both in generated blocks and in the default server.
+        :param cert_resolver: Returns the certificate lineage covering a domain, for SAN certificates
+            shared by several domains. Lineages named after the domain are used when unset or unknown.
+        :param live_dir: Certificate live directory the generated `ssl_certificate` paths point into.
+        :param applier: Validates, swaps and reloads saved changes as a transaction.
+        """
+        if storage_mode not in (NGINX_STORAGE_SINGLE, NGINX_STORAGE_SHARDED):
+            raise ValueError(f"Unknown nginx storage mode: {storage_mode}")
+        self.storage_mode = storage_mode
+        self.config_path = config_path
+        self.conf_dir = conf_dir
+        self.acme_webroot = acme_webroot
+        self.cert_resolver = cert_resolver
+        self.renderer = DomainConfigRenderer(acme_webroot, live_dir)
+        self.applier = applier or NginxApplier(config_path=config_path, conf_dir=conf_dir)
+        # Incremented on every change of the domain model, including reloads after external edits
+        self.revision = 0
+        self.index = DomainIndex()
+        # Set when Nginx must reload although no file changed, e.g. after certificate renewals
+        self._reload_requested = False
         self.load_existing_config()
-    
+
     def load_existing_config(self):
         """Load existing configuration from Nginx"""
+        self._install_sources(self._read_sources())
+        if self._main_dirty:
+            self.save_config()
+
+    def _read_sources(self) -> tuple:
+        """
+        Read and segment the config files without touching the model, so it can run on the I/O executor.
+        :return: (file signature, main config text, its spans, shards as (file name, text, spans), main config changed)
+        """
+        signature = self._read_file_signature()
+        changed = False
         try:
-            with open(NGINX_CONFIG_PATH, 'r') as f:
-                self.config = f.read()
+            text = read_file(self.config_path)
         except FileNotFoundError:
-            self.config = NGINX_DEFAUT_CONFIG
-            self.save_config()
-    
+            text = NGINX_DEFAUT_CONFIG
+            changed = True
+        if self.acme_webroot:
+            with_challenge = self._with_acme_challenge(text)
+            if with_challenge is not None:
+                text = with_challenge
+                changed = True
+        shards = []
+        if self.storage_mode == NGINX_STORAGE_SHARDED:
+            try:
+                file_names = sorted(list_dir(self.conf_dir))
+            except FileNotFoundError:
+                file_names = []
+            for file_name in file_names:
+                if file_name.endswith(".conf"):
+                    shard = read_file(os.path.join(self.conf_dir, file_name))
+                    shards.append((file_name, shard, self._segment_config(shard)))
+        return signature, text, self._segment_config(text), shards, changed
+
+    def _install_sources(self, sources: tuple):
+        """Replace the model with config files read by `_read_sources`"""
+        signature, text, spans, shards, changed = sources
+        self._build_model(text, spans)
+        self._load_shards(shards)
+        if changed:
+            self._main_dirty = True
+        self._file_signature = signature
+
+    def _read_file_signature(self) -> tuple:
+        """
+        Modification times of the files backing the model.
+        In sharded mode the conf.d directory mtime changes whenever a file is added, removed or renamed into place.
+        """
+        paths = [self.config_path]
+        if self.storage_mode == NGINX_STORAGE_SHARDED:
+            paths.append(self.conf_dir)
+        signature = []
+        for path in paths:
+            try:
+                signature.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Reload the model if the config files were modified outside of this manager.
+        Pending unsaved changes are never discarded.
+        :return: True if the model was reloaded.
+        """
+        if self._main_dirty or self._dirty:
+            return False
+        if self._read_file_signature() == self._file_signature:
+            return False
+        self.load_existing_config()
+        return True
+
+    async def refresh_if_changed_async(self) -> bool:
+        """
+        Like `refresh_if_changed`, but read and parse the files on the I/O executor without blocking the event loop.
+        The result is dropped when the model changed in the meantime; the next call reads the files again.
+        :return: True if the model was reloaded.
+        """
+        if self._main_dirty or self._dirty:
+            return False
+        if await run_in_io_executor(self._read_file_signature) == self._file_signature:
+            return False
+        revision = self.revision
+        sources = await run_in_io_executor(self._read_sources)
+        if self.revision != revision or self._main_dirty or self._dirty:
+            return False
+        self._install_sources(sources)
+        if self._main_dirty:
+            await self.save_config_async()
+        return True
+
+    def _with_acme_challenge(self, text: str) -> Optional[str]:
+        """
+        Answer ACME challenges from the default port 80 server, so domains that have no server block
+        yet can be validated while Nginx keeps listening.
+        :return: The config with the challenge location added, None when it needs none.
+        """
+        for server in find_blocks(parse(text), "server"):
+            listens = list(server.directives("listen"))
+            if (
+                not any("default_server" in listen.args for listen in listens)
+                or not any(listen.args[:1] == ["80"] for listen in listens)
+            ):
+                continue
+            start, end = server.start, server.end
+            block = text[start:end]
+            if ACME_CHALLENGE_PATH in block:
+                return None
+            location = get_acme_challenge_location(self.acme_webroot)
+            new_block, replaced = re.subn(
+                r'\n([ \t]*)return 444;',
+                lambda match: (
+                    f"\n{match.group(1)}{location}\n\n"
+                    f"{match.group(1)}location / {{\n{match.group(1)}    return 444;\n{match.group(1)}}}"
+                ),
+                block,
+                count=1
+            )
+            return text[:start] + new_block + text[end:] if replaced else None
+        return None
+
+    def _load_shards(self, shards: list[tuple[str, str, list[tuple[int, int, Domain]]]]):
+        """Index per-domain include files from the conf.d directory"""
+        for file_name, text, spans in shards:
+            for _, _, domain in spans:
+                if f"{domain.domain}.conf" != file_name:
+                    continue
+                owner = self._owner.get(domain.domain)
+                if owner is not None:
+                    # The include file wins; drop the duplicate from the main config on next save
+                    del owner[domain.domain]
+                    self._main_dirty = True
+                self._shards[domain.domain] = text
+                self._domains[domain.domain] = domain
+                self.index.add(domain)
+                self._owner[domain.domain] = self._shards
+                break
+
     def refresh_config(self):
         """Reload configuration from file"""
         self.load_existing_config()
-    
+
+    @property
+    def config(self) -> str:
+        """Render the full configuration text from the in-memory model"""
+        return "".join(self._head.values()) + "".join(self._tail.values())
+
+    @config.setter
+    def config(self, text: str):
+        self._build_model(text)
+
+    def _build_model(self, text: str, spans: Optional[list[tuple[int, int, Domain]]] = None):
+        """
+        Split the configuration into static chunks and per-domain chunks.
+        Chunks before the servers marker live in `_head` (new domains are appended there),
+        the marker and everything after it live in `_tail`. Domain chunks are keyed by
+        domain name, static chunks by an integer, so both dicts keep file order.
+        :param spans: Spans of `_segment_config(text)` when already computed.
+        """
+        self._static_keys = count()
+        self._head: dict = {}
+        self._tail: dict = {}
+        self._shards: dict[str, str] = {}
+        self._domains: dict[str, Domain] = {}
+        self.index.clear()
+        self._owner: dict[str, dict] = {}
+        self._dirty: set[str] = set()
+        self._main_dirty = False
+        self.revision += 1
+
+        tail_start = text.find(NGINX_SERVERS_MARKER)
+        if tail_start == -1:
+            tail_start = text.rfind("}")
+            if tail_start == -1:
+                tail_start = len(text)
+
+        position = 0
+        if spans is None:
+            spans = self._segment_config(text)
+        for start, end, domain in spans:
+            target = self._head if start < tail_start else self._tail
+            if position < start:
+                self._append_static(text[position:start], tail_start, position)
+            target[domain.domain] = text[start:end]
+            self._domains[domain.domain] = domain
+            self.index.add(domain)
+            self._owner[domain.domain] = target
+            position = end
+        if position < len(text):
+            self._append_static(text[position:], tail_start, position)
+
+    def _append_static(self, chunk: str, tail_start: int, offset: int):
+        """Append a static chunk, splitting it at the servers marker when it spans it"""
+        split = tail_start - offset
+        if split <= 0:
+            self._tail[next(self._static_keys)] = chunk
+        elif split >= len(chunk):
+            self._head[next(self._static_keys)] = chunk
+        else:
+            self._head[next(self._static_keys)] = chunk[:split]
+            self._tail[next(self._static_keys)] = chunk[split:]
+
+    def _segment_config(self, config_text: str) -> list[tuple[int, int, Domain]]:
+        """
+        Locate managed domain blocks in the configuration.
+        Returns (start, end, domain) spans covering the `# <domain> configuration` comment,
+        the port 80 and 443 server blocks and the trailing whitespace, in file order.
+        """
+        try:
+            tree = parse(config_text)
+        except NginxParseError as e:
+            logger.error("Nginx config could not be parsed", extra={'error': str(e)})
+            return []
+
+        spans = []
+        seen = {}
+        for blocks, comment in self._server_groups(tree):
+            managed = [block for block in blocks if self._is_managed_block(block)]
+            if not managed:
+                continue
+            try:
+                domain = self._domain_from_block(managed[-1])
+            except Exception as e:
+                # Kept as static text, so one hand-edited block cannot stop the rest from loading
+                logger.error("Domain could not be extracted from config", extra={
+                    'domain': self._primary_server_name(managed[-1]), 'error': str(e)
+                })
+                continue
+            if not domain:
+                continue
+
+            start = blocks[0].start
+            if comment is not None and comment.text.rstrip() == f"# {domain.domain} configuration":
+                start = comment.start
+
+            end = blocks[-1].end
+            while end < len(config_text) and config_text[end] in " \t\r\n":
+                end += 1
+
+            if domain.domain in seen:
+                spans.remove(seen[domain.domain])
+            span = (start, end, domain)
+            seen[domain.domain] = span
+            spans.append(span)
+        return spans
+
+    def _server_groups(self, container: Block) -> Iterator[tuple[list[Block], Optional[Comment]]]:
+        """
+        Yield runs of adjacent server blocks sharing a primary server name, in file order,
+        each with the comment directly preceding the run.
+        """
+        previous = None
+        current = None
+        for child in container.children:
+            if isinstance(child, Block) and child.name == "server":
+                name = None if self._is_default_server(child) else self._primary_server_name(child)
+                if current is not None and previous is current[0][-1] and current[2] == name:
+                    current[0].append(child)
+                    previous = child
+                    continue
+                if current is not None:
+                    yield current[0], current[1]
+                current = ([child], previous if isinstance(previous, Comment) else None, name) if name else None
+            else:
+                if current is not None:
+                    yield current[0], current[1]
+                    current = None
+                if isinstance(child, Block):
+                    yield from self._server_groups(child)
+            previous = child
+        if current is not None:
+            yield current[0], current[1]
+
+    def _is_default_server(self, block: Block) -> bool:
+        server_name = block.directive("server_name")
+        return (
+            any("default_server" in listen.args for listen in block.directives("listen"))
+            or (server_name is not None and server_name.args == ["_"])
+        )
+
+    def _is_managed_block(self, block: Block) -> bool:
+        """Generated blocks proxy locations over TLS"""
+        return (
+            any("443" in arg for listen in block.directives("listen") for arg in listen.args)
+            and next(find_blocks(block, "location"), None) is not None
+        )
+
+    def _primary_server_name(self, block: Block) -> Optional[str]:
+        """Return the first non-www server name of a server block"""
+        server_name = block.directive("server_name")
+        if server_name is None:
+            return None
+        for name in server_name.args:
+            if not name.startswith('www.'):
+                return name
+        return None
+
+    def get_domain(self, domain: str) -> Optional[Domain]:
+        """Get a single domain by name"""
+        return self._domains.get(domain)
+
+    def count_domains(self) -> int:
+        """Number of configured domains"""
+        return len(self._domains)
+
+    def find_domains(self, names: set[str]) -> List[Domain]:
+        """Get the configured domains among the given names, sorted by name"""
+        return [self._domains[name] for name in sorted(names) if name in self._domains]
+
+    def has_domain(self, domain: str) -> bool:
+        """Check whether a domain is configured"""
+        return domain in self._domains
+
+    def _cert_name(self, domain: str) -> str:
+        """Lineage a domain's block is rendered with"""
+        return (self.cert_resolver(domain) if self.cert_resolver else None) or domain
+
+    def cert_changed(self, domain: str) -> bool:
+        """
+        Whether the block of a configured domain reads its certificate from another lineage than it is
+        rendered with now, e.g. after its names were packed into a SAN certificate.
+        Blocks without a recognizable `ssl_certificate` path are left alone.
+        """
+        target = self._owner.get(domain)
+        if target is None:
+            return False
+        match = SSL_CERTIFICATE_PATTERN.search(target[domain])
+        if match is None:
+            return False
+        return match.group(1) != f"{self.renderer.live_dir.rstrip('/')}/{self._cert_name(domain)}"
+
     def add_domain(self, domain: Domain):
-        """Add a new domain to the proxy"""
-        new_config_block = get_nginx_domain_config(domain)
-        self.config = self.config.replace("# Add Servers Here", f"{new_config_block}# Add Servers Here")
+        """Add a new domain to the proxy, replacing its block in place if it already exists"""
+        config = self.renderer.render(domain, cert_name=self._cert_name(domain.domain))
+        target = self._owner.get(domain.domain)
+        if target is not None and target.get(domain.domain) == config and (
+            self.storage_mode != NGINX_STORAGE_SHARDED or target is self._shards
+        ):
+            # Unchanged block, nothing to write
+            self._domains[domain.domain] = domain
+            self.index.add(domain)
+            return
+        if self.storage_mode == NGINX_STORAGE_SHARDED and target is not self._shards:
+            if target is not None:
+                del target[domain.domain]
+                self._main_dirty = True
+            target = self._shards
+        elif target is None:
+            target = self._head
+        target[domain.domain] = config
+        self._owner[domain.domain] = target
+        self._domains[domain.domain] = domain
+        self.index.add(domain)
+        self._mark_dirty(domain.domain, target)
 
-    def remove_domain(self, domain: Domain):
+    def update_domain(self, domain: Domain):
+        """Re-render the block of an existing domain"""
+        self.add_domain(domain)
+
+    def remove_domain(self, domain: Union[Domain, str]):
         """Remove existing domain config"""
-        config_block = get_nginx_domain_config(domain)
-        self.config = self.config.replace(config_block, "")
-    
-    def save_config(self):
-        """Save configuration to file using elevated privileges"""
-        temp_file_path = "/tmp/nginx_temp_config"
-        with open(temp_file_path, 'w') as temp_file:
-            temp_file.write(self.config)
-        
-        subprocess.run(
-            ["sudo", "mv", "-f", temp_file_path, NGINX_CONFIG_PATH],
-            check=True
-        )
-        if not self.reload_nginx():
-            self.restart_nginx()
-    
-    def reload_nginx(self):
-        """Reload Nginx configuration"""
+        name = domain.domain if isinstance(domain, Domain) else domain
+        target = self._owner.pop(name, None)
+        if target is None:
+            return
+        del target[name]
+        del self._domains[name]
+        self.index.remove(name)
+        self.renderer.forget(name)
+        self._mark_dirty(name, target)
+
+    def _mark_dirty(self, name: str, target: dict):
+        """Remember which file has to be rewritten on the next save"""
+        self.revision += 1
+        if target is self._shards:
+            self._dirty.add(name)
+        else:
+            self._main_dirty = True
+
+    def _shard_path(self, domain: str) -> str:
+        """Path of the include file holding a single domain"""
+        if not domain or domain.startswith(".") or os.sep in domain:
+            raise ValueError(f"Invalid domain name: {domain}")
+        return os.path.join(self.conf_dir, f"{domain}.conf")
+
+    def request_reload(self):
+        """
+        Make the next save reload Nginx even when no file changed.
+        """
+        self._reload_requested = True
+
+    def save_config(self, reload: bool = True):
+        """
+        Write changed files.
+        Without changed files or a requested reload nothing is written, validated or reloaded.
+        :param reload: Apply them as a validated transaction and reload Nginx; False writes them as is.
+        """
+        started = time.perf_counter()
+        changes = self._collect_changes()
+        with observe_stage("save_config", files=len(changes)):
+            if not reload:
+                self._write_changes(changes)
+                return
+            if not self._take_reload(changes):
+                return
+            try:
+                self._apply_transaction(changes, time.perf_counter() - started)
+            except Exception:
+                self._mark_unsaved(changes)
+                raise
+
+    async def save_config_async(self, reload: bool = True) -> Optional[dict]:
+        """
+        Write changed files on the I/O executor without blocking the event loop.
+        :param reload: Apply them as a validated transaction and reload Nginx; False writes them as is.
+        :return: The transaction record when a transaction ran.
+        """
+        started = time.perf_counter()
+        changes = self._collect_changes()
+        render_time = time.perf_counter() - started
+        with observe_stage("save_config", files=len(changes)):
+            if not reload:
+                await run_in_io_executor(self._write_changes, changes)
+                return None
+            if not self._take_reload(changes):
+                return None
+            try:
+                return await run_in_io_executor(self._apply_transaction, changes, render_time)
+            except Exception:
+                self._mark_unsaved(changes)
+                raise
+
+    def _apply_transaction(self, changes: list[tuple[str, Optional[str]]], render_time: float) -> dict:
         try:
-            subprocess.run(["sudo", "nginx", "-s", "reload"], check=True)
-            return True
-        except subprocess.CalledProcessError as e:
-            print(e)
+            return self.applier.apply(changes, render_time)
+        finally:
+            self._file_signature = self._read_file_signature()
+
+    def _take_reload(self, changes: list[tuple[str, Optional[str]]]) -> bool:
+        """Whether a transaction is needed, consuming a requested reload"""
+        if not changes and not self._reload_requested:
             return False
+        self._reload_requested = False
+        return True
 
-    def restart_nginx(self):
-        """Restart Nginx service"""
-        try:
-            subprocess.run(["sudo", "systemctl", "restart", "nginx"])
-        except subprocess.CalledProcessError as e:
-            print(e)
-            raise
+    def _mark_unsaved(self, changes: list[tuple[str, Optional[str]]]):
+        """
+        A failed transaction left the previous files in place (or, on I/O errors, an unknown state);
+        mark them dirty so the next save
+        writes whatever the model holds once callers have rolled back their changes.
+        """
+        if not changes:
+            self._reload_requested = True
+        for path, _ in changes:
+            if path == self.config_path:
+                self._main_dirty = True
+            else:
+                self._dirty.add(os.path.basename(path)[:-len(".conf")])
+
+    def _collect_changes(self) -> list[tuple[str, Optional[str]]]:
+        """
+        Snapshot pending file changes as (path, content) pairs, content None meaning delete.
+        Taken on the caller's thread so the model can keep changing while files are written.
+        """
+        changes = []
+        if self._main_dirty:
+            changes.append((self.config_path, self.config))
+            self._main_dirty = False
+        for name in sorted(self._dirty):
+            changes.append((self._shard_path(name), self._shards.get(name)))
+        self._dirty.clear()
+        return changes
+
+    def _write_changes(self, changes: list[tuple[str, Optional[str]]]):
+        for path, content in changes:
+            if content is None:
+                remove_file(path)
+            else:
+                write_file_atomic(path, content)
+        if changes:
+            self._file_signature = self._read_file_signature()
 
     def get_current_domains(self) -> List[Domain]:
-        """Get current domain settings from Nginx configuration"""
-        return self.parse_existing_config()
+        """Get current domain settings from the in-memory model"""
+        return list(self._domains.values())
 
     def get_hosting_summary(self) -> dict:
         """Get a summary of current hosting settings"""
-        domains = self.get_current_domains()
-        summary = {
-            'total_domains': len(domains),
-            'domains': {}
+        return {
+            'total_domains': len(self._domains),
+            'domains': dict(self._domains)
         }
-        
-        for domain in domains:
-            summary['domains'][domain.domain] = domain
-        
-        return summary
 
     def parse_existing_config(self) -> List[Domain]:
         """Parse the existing Nginx configuration and extract domain settings"""
-        def extract_server_blocks(config_text: str) -> list[str]:
-            blocks = []
-            inside_block = False
-            brace_count = 0
-            current_block = []
-
-            lines = config_text.splitlines()
-            for line in lines:
-                stripped = line.strip()
-                if stripped.startswith("server"):
-                    if "{" in stripped:
-                        inside_block = True
-                        brace_count = stripped.count("{") - stripped.count("}")
-                        current_block.append(line)
-                        continue
-                
-                if inside_block:
-                    current_block.append(line)
-                    brace_count += line.count("{") - line.count("}")
-                    if brace_count == 0:
-                        block_text = "\n".join(current_block).strip()
-                        if "location" in block_text and "443" in block_text:
-                            blocks.append(block_text)
-                        current_block = []
-                        inside_block = False
-
-            return blocks
-        
-        server_blocks = extract_server_blocks(self.config)
-        
-        domains = []
-        for server_block in server_blocks:
-            domain = self.extract_domain_from_config(server_block)
-            if domain and not self.is_default_server_block(server_block):
-                domains.append(domain)
-
-        return domains
+        return [domain for _, _, domain in self._segment_config(self.config)]
 
     def is_default_server_block(self, config: str) -> bool:
         """Check if this is a default server block that should be ignored"""
-        return 'default_server' in config or 'server_name _;' in config
+        server = next(find_blocks(parse(config), "server"), None)
+        return server is not None and self._is_default_server(server)
 
     def extract_domain_from_config(self, config: str) -> Domain:
         """Extract domain information from a config block"""
         try:
-            server_name_match = re.search(r'server_name\s+(.*?);', config)
-            if not server_name_match:
-                return None
-            
-            server_names = server_name_match.group(1).strip().split()
-            primary_domain = None
-            for name in server_names:
-                if not name.startswith('www.'):
-                    primary_domain = name
-                    break
-            
-            if not primary_domain:
-                return None
-            
-            hosts = []
-            location_pattern = r'location\s+(.*?)\s*\{(.*?)\}'
-            location_matches = re.findall(location_pattern, config, re.DOTALL)
-            
-            for path, location_content in location_matches:
-                path = path.strip()
-                
-                proxy_pass_match = re.search(r'proxy_pass\s+(.*?);', location_content)
-                if proxy_pass_match:
-                    proxy_host = proxy_pass_match.group(1).strip()
-                    
-                    is_websocket = 'proxy_set_header Upgrade $http_upgrade' in location_content
-                    host_type = HostType.WebSocket if is_websocket else HostType.Default
-                    
-                    host = Host(type=host_type, path=path, host=proxy_host)
-                    hosts.append(host)
-            
-            return Domain(domain=primary_domain, hosts=hosts)
-            
+            server = next(find_blocks(parse(config), "server"), None)
+            return self._domain_from_block(server) if server else None
         except Exception as e:
-            print(f"Error extracting domain from config: {e}")
-            return None
\ No newline at end of file
+            logger.error("Domain could not be extracted from config", extra={'error': str(e)})
+            return None
+
+    def _domain_from_block(self, server: Block) -> Optional[Domain]:
+        """Build a domain from a parsed server block"""
+        primary_domain = self._primary_server_name(server)
+        if not primary_domain:
+            return None
+
+        hosts = []
+        for location in find_blocks(server, "location"):
+            proxy_pass = location.directive("proxy_pass")
+            if proxy_pass is None or not proxy_pass.args:
+                continue
+
+            is_websocket = any(
+                header.args[:2] == ["Upgrade", "$http_upgrade"]
+                for header in location.directives("proxy_set_header")
+            )
+            host_type = HostType.WebSocket if is_websocket else HostType.Default
+
+            directives = {
+                child.name: " ".join(child.args)
+                for child in location.children
+                if isinstance(child, Directive)
+            }
+            hosts.append(Host(
+                type=host_type,
+                path=" ".join(location.args),
+                host=" ".join(proxy_pass.args),
+                options=parse_host_options(directives)
+            ))
+
+        return Domain(domain=primary_domain, hosts=hosts)
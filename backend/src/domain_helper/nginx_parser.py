@@ -0,0 +1,156 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+# Leading whitespace, then exactly one of: argument (bare or quoted), punctuation, comment or an invalid character.
+# findall() over this pattern walks the source once; offsets are recovered by summing the group lengths.
+TOKEN_PATTERN = re.compile(r"""
+    (\s*)
+    (?:
+        ( (?:[^\s{};"'\\\#$]|\\.|\$\{[^}\s]*\}|\$)(?:[^\s{};\\$]+|\\.|\$\{[^}\s]*\}|\$)*
+        | "(?:[^"\\]|\\.)*"
+        | '(?:[^'\\]|\\.)*'
+        )
+      | ([{};])
+      | (\#[^\n]*)
+      | (\S)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+class NginxParseError(ValueError):
+    def __init__(self, message: str, source: str, position: int):
+        self.line = source.count("\n", 0, position) + 1
+        super().__init__(f"{message} on line {self.line}")
+
+@dataclass(slots=True)
+class Comment:
+    text: str
+    start: int
+    end: int
+
+@dataclass(slots=True)
+class Directive:
+    name: str
+    args: list[str]
+    start: int
+    end: int
+
+@dataclass(slots=True)
+class Block:
+    name: str
+    args: list[str]
+    children: list["Node"] = field(default_factory=list)
+    start: int = 0
+    end: int = 0
+
+    def directives(self, name: str) -> Iterator[Directive]:
+        """Direct child directives with a given name"""
+        return (child for child in self.children if isinstance(child, Directive) and child.name == name)
+
+    def directive(self, name: str) -> Optional[Directive]:
+        """First direct child directive with a given name"""
+        return next(self.directives(name), None)
+
+    def blocks(self, name: str) -> Iterator["Block"]:
+        """Direct child blocks with a given name"""
+        return (child for child in self.children if isinstance(child, Block) and child.name == name)
+
+    def walk(self) -> Iterator["Node"]:
+        """Every node below this block, depth first in file order"""
+        for child in self.children:
+            yield child
+            if isinstance(child, Block):
+                yield from child.walk()
+
+Node = Union[Comment, Directive, Block]
+
+@dataclass(slots=True)
+class NginxConfig(Block):
+    """
+    Parsed configuration. Nodes only record their offsets into `source`, so slicing the
+    source by those offsets reproduces the original text byte for byte, whitespace included.
+    """
+    source: str = ""
+
+    def text(self, node: Node) -> str:
+        """Original text of a node"""
+        return self.source[node.start:node.end]
+
+    def includes(self) -> list[str]:
+        """Paths of every include directive"""
+        return [
+            node.args[0]
+            for node in self.walk()
+            if isinstance(node, Directive) and node.name == "include" and node.args
+        ]
+
+    def render(self) -> str:
+        """Rebuild the text from the node offsets and the gaps between them"""
+        parts = []
+        position = 0
+        for child in self.children:
+            parts.append(self.source[position:child.start])
+            parts.append(self.source[child.start:child.end])
+            position = child.end
+        parts.append(self.source[position:])
+        return "".join(parts)
+
+def parse(source: str) -> NginxConfig:
+    """
+    Parse a configuration into directives, blocks and comments in linear time.
+    """
+    root = NginxConfig(name="", args=[], start=0, end=len(source), source=source)
+    stack: list[Block] = [root]
+    children = root.children
+    args: list[str] = []
+    args_start = 0
+    position = 0
+    for space, argument, punctuation, comment, error in TOKEN_PATTERN.findall(source):
+        start = position + len(space)
+        if argument:
+            if not args:
+                args_start = start
+            args.append(argument)
+            position = start + len(argument)
+        elif punctuation == ";":
+            position = start + 1
+            if not args:
+                raise NginxParseError("Unexpected ';'", source, start)
+            children.append(Directive(args[0], args[1:], args_start, position))
+            args = []
+        elif punctuation == "{":
+            position = start + 1
+            if not args:
+                raise NginxParseError("Block without a name", source, start)
+            block = Block(args[0], args[1:], [], args_start)
+            children.append(block)
+            stack.append(block)
+            children = block.children
+            args = []
+        elif punctuation == "}":
+            position = start + 1
+            if args:
+                raise NginxParseError("Directive not terminated by ';'", source, args_start)
+            if len(stack) == 1:
+                raise NginxParseError("Unexpected '}'", source, start)
+            stack.pop().end = position
+            children = stack[-1].children
+        elif comment:
+            position = start + len(comment)
+            children.append(Comment(comment, start, position))
+        else:
+            raise NginxParseError(f"Unexpected {error!r}", source, start)
+    if args:
+        raise NginxParseError("Directive not terminated by ';'", source, args_start)
+    if len(stack) > 1:
+        raise NginxParseError("Block not closed", source, stack[-1].start)
+    return root
+
+def find_blocks(block: Block, name: str) -> Iterator[Block]:
+    """Blocks with a given name at any depth, without descending into matches"""
+    for child in block.children:
+        if isinstance(child, Block):
+            if child.name == name:
+                yield child
+            else:
+                yield from find_blocks(child, name)
@@ -0,0 +1,37 @@
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from .constants import IO_EXECUTOR_WORKERS
+
+T = TypeVar("T")
+
+io_executor = ThreadPoolExecutor(max_workers=IO_EXECUTOR_WORKERS, thread_name_prefix="domain-io")
+
+async def run_command(args: list[str], check: bool = True) -> subprocess.CompletedProcess:
+    """
+    Run a command without blocking the event loop.
+    Mirrors `subprocess.run(args, capture_output=True, text=True, check=check)`.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    result = subprocess.CompletedProcess(
+        args,
+        process.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace")
+    )
+    if check:
+        result.check_returncode()
+    return result
+
+async def run_in_io_executor(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run blocking file I/O on the bounded I/O executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, partial(func, *args, **kwargs))
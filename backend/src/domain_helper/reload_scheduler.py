@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+class ReloadScheduler:
+    def __init__(self, apply: Callable[[], Awaitable[None]], window: float = 0.5):
+        """
+        Coalesce configuration changes into a single validate + reload.
+        :param apply: Coroutine function that validates and reloads Nginx.
+        :param window: Seconds to wait after the first pending change before applying.
+        """
+        self.apply = apply
+        self.window = window
+        self._pending: list[asyncio.Future] = []
+        self._pending_changes = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._apply_lock: Optional[asyncio.Lock] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.changes_applied = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_duration = 0.0
+
+    async def request_reload(self, changes: int = 1) -> int:
+        """
+        Schedule a reload and wait until it has been applied.
+        :param changes: Number of configuration changes this request accounts for.
+        :return: Number of changes applied by the reload that covered this request.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(future)
+        self._pending_changes += changes
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        """Wait for the coalescing window, then apply everything queued so far"""
+        await asyncio.sleep(self.window)
+        if self._apply_lock is None:
+            self._apply_lock = asyncio.Lock()
+        async with self._apply_lock:
+            futures, changes = self._pending, self._pending_changes
+            self._pending, self._pending_changes = [], 0
+            self._flush_task = None
+
+            started = time.perf_counter()
+            try:
+                await self.apply()
+            except Exception as e:
+                self.failed_reloads += 1
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self.last_duration = time.perf_counter() - started
+
+            self.reloads += 1
+            self.changes_applied += changes
+            self.last_batch_size = changes
+            self.max_batch_size = max(self.max_batch_size, changes)
+            for future in futures:
+                if not future.done():
+                    future.set_result(changes)
+
+    def stats(self) -> dict:
+        """Get reload counters and batching statistics"""
+        return {
+            'reloads': self.reloads,
+            'failed_reloads': self.failed_reloads,
+            'changes_applied': self.changes_applied,
+            'average_batch_size': self.changes_applied / self.reloads if self.reloads else 0,
+            'last_batch_size': self.last_batch_size,
+            'max_batch_size': self.max_batch_size,
+            'last_duration': self.last_duration,
+            'pending_changes': self._pending_changes
+        }
@@ -0,0 +1,26 @@
+from string import Formatter
+
+class Template:
+    def __init__(self, source: str):
+        """
+        Template split once into literal text and slots, so rendering only fills the slots and joins.
+        Uses `str.format` syntax: `{name}` is a slot, `{{` and `}}` are literal braces.
+        """
+        self.source = source
+        self._parts: list[str] = []
+        # (index in _parts, field) of every slot
+        self._slots: list[tuple[int, str]] = []
+        for literal, field, _, _ in Formatter().parse(source):
+            self._parts.append(literal)
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"Unsupported template field: {field!r}")
+                self._slots.append((len(self._parts), field))
+                self._parts.append("")
+        self.fields = frozenset(field for _, field in self._slots)
+
+    def render(self, **values: str) -> str:
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = values[field]
+        return "".join(parts)
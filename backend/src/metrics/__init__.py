@@ -0,0 +1,16 @@
+from .logging import JsonFormatter, setup_logging
+from .metrics import DOMAIN_COUNT, REQUEST_DURATION, STAGE_DURATION, STAGE_FAILURES, observe_stage, record_stage
+from .middleware import MetricsMiddleware, metrics_endpoint
+
+__all__ = [
+    "JsonFormatter",
+    "setup_logging",
+    "DOMAIN_COUNT",
+    "REQUEST_DURATION",
+    "STAGE_DURATION",
+    "STAGE_FAILURES",
+    "observe_stage",
+    "record_stage",
+    "MetricsMiddleware",
+    "metrics_endpoint"
+]
@@ -0,0 +1,61 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_DURATION = Histogram(
+    "domain_manager_stage_duration_seconds",
+    "Duration of provisioning pipeline stages",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+
+STAGE_FAILURES = Counter(
+    "domain_manager_stage_failures_total",
+    "Failed provisioning pipeline stages",
+    ["stage"]
+)
+
+REQUEST_DURATION = Histogram(
+    "domain_manager_http_request_duration_seconds",
+    "HTTP request latency per route",
+    ["method", "route", "status"]
+)
+
+DOMAIN_COUNT = Gauge(
+    "domain_manager_domains",
+    "Domains configured in Nginx"
+)
+
+@contextmanager
+def observe_stage(stage: str, **fields) -> Iterator[None]:
+    """
+    Time a pipeline stage into `STAGE_DURATION`, count failures and log the outcome with its duration.
+    Extra keyword arguments are added to the log record.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        duration = time.perf_counter() - started
+        STAGE_DURATION.labels(stage).observe(duration)
+        STAGE_FAILURES.labels(stage).inc()
+        logger.warning(
+            "Stage failed",
+            extra={'stage': stage, 'duration': duration, 'error': str(e), **fields}
+        )
+        raise
+    duration = time.perf_counter() - started
+    STAGE_DURATION.labels(stage).observe(duration)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Stage completed", extra={'stage': stage, 'duration': duration, **fields})
+
+def record_stage(stage: str, duration: float):
+    """Record a stage timed elsewhere"""
+    STAGE_DURATION.labels(stage).observe(duration)
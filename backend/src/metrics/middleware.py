@@ -0,0 +1,47 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import REQUEST_DURATION
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        """
+        Pure ASGI middleware observing request latency per route template.
+        Labelled children are cached, so a request costs two clock reads and one observe.
+        """
+        self.app = app
+        self._children = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up the series count
+            path = getattr(route, "path", None) or "unmatched"
+            key = (scope["method"], path, status)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = REQUEST_DURATION.labels(scope["method"], path, str(status))
+            child.observe(time.perf_counter() - started)
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Expose every metric in the Prometheus text format"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
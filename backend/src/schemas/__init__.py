@@ -1,12 +1,39 @@
-from .auth import Auth, Token
-from .domain import HostType, Domain, Host
+from .auth import Auth, Token, ApiKeyScope, ApiKeyCreate, ApiKey, ApiKeyCreated
+from .cert import Certificate
+from .domain import HostType, Domain, Host, HostOptions, ProvisioningState, DomainRecord, DomainResult
+from .health import UpstreamHealth, HostHealth, DomainHealth
+from .idempotency import IdempotencyState, IdempotencyRecord
+from .job import JobState, StageState, JobStage, Job, JobCreated
 from .jwt import oauth2_scheme
+from .plan import HostChange, DomainChange, DomainPlan
 
 __all__ = [
     "Auth",
     "Token",
+    "ApiKeyScope",
+    "ApiKeyCreate",
+    "ApiKey",
+    "ApiKeyCreated",
+    "Certificate",
     "HostType",
     "Domain",
     "Host",
+    "HostOptions",
+    "ProvisioningState",
+    "DomainRecord",
+    "DomainResult",
+    "UpstreamHealth",
+    "HostHealth",
+    "DomainHealth",
+    "IdempotencyState",
+    "IdempotencyRecord",
+    "JobState",
+    "StageState",
+    "JobStage",
+    "Job",
+    "JobCreated",
+    "HostChange",
+    "DomainChange",
+    "DomainPlan",
     "oauth2_scheme"
 ]
\ No newline at end of file
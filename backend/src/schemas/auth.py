@@ -1,7 +1,30 @@
-from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel, Field
 
 class Auth(BaseModel):
     password: str
 
 class Token(BaseModel):
-    token: str
\ No newline at end of file
+    token: str
+
+class ApiKeyScope(Enum):
+    Read = "read"
+    Write = "write"
+
+class ApiKeyCreate(BaseModel):
+    name: str
+    scopes: list[ApiKeyScope] = [ApiKeyScope.Read]
+    expires_in_days: Optional[int] = Field(None, gt=0)
+
+class ApiKey(BaseModel):
+    id: str
+    name: str
+    scopes: list[ApiKeyScope]
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+class ApiKeyCreated(ApiKey):
+    key: str
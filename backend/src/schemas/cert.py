@@ -0,0 +1,7 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class Certificate(BaseModel):
+    name: str
+    domains: list[str]
+    not_after: datetime
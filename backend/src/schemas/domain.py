@@ -1,15 +1,46 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from datetime import datetime
 from enum import Enum
+from typing import Optional
 
 class HostType(Enum):
     Default = "default"
     WebSocket = "websocket"
 
+class HostOptions(BaseModel):
+    connect_timeout: Optional[int] = None
+    read_timeout: Optional[int] = None
+    send_timeout: Optional[int] = None
+    buffering: Optional[bool] = None
+    # Written into the config verbatim, so limited to what the directives accept: a zone name (or `off`)
+    # and optional status codes followed by a time, e.g. `200 302 10m`
+    cache: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_.$-]+$")
+    cache_valid: Optional[str] = Field(None, pattern=r"^(?:(?:[1-5][0-9]{2}|any) +)*(?:[0-9]+(?:ms|[smhdwMy])?)+$")
+    gzip: Optional[bool] = None
+
 class Host(BaseModel):
     type: HostType
     path: str
     host: str
+    options: Optional[HostOptions] = None
 
 class Domain(BaseModel):
     domain: str
-    hosts: list[Host]
\ No newline at end of file
+    hosts: list[Host]
+
+class ProvisioningState(Enum):
+    Unknown = "unknown"
+    Ready = "ready"
+    Failed = "failed"
+
+class DomainRecord(Domain):
+    configured: bool = True
+    dns_status: ProvisioningState = ProvisioningState.Unknown
+    cert_status: ProvisioningState = ProvisioningState.Unknown
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class DomainResult(BaseModel):
+    domain: str
+    success: bool
+    error: Optional[str] = None
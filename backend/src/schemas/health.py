@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+class UpstreamHealth(BaseModel):
+    upstream: str
+    url: str
+    healthy: Optional[bool] = None
+    status_code: Optional[int] = None
+    latency: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    consecutive_failures: int = 0
+
+class HostHealth(BaseModel):
+    path: str
+    host: str
+    health: Optional[UpstreamHealth] = None
+
+class DomainHealth(BaseModel):
+    domain: str
+    healthy: Optional[bool] = None
+    hosts: list[HostHealth]
@@ -0,0 +1,17 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+class IdempotencyState(Enum):
+    Pending = "pending"
+    Completed = "completed"
+
+class IdempotencyRecord(BaseModel):
+    key: str
+    fingerprint: str
+    state: IdempotencyState
+    status_code: Optional[int] = None
+    media_type: Optional[str] = None
+    body: Optional[bytes] = None
+    created_at: datetime
@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+from .domain import Domain
+
+class JobState(Enum):
+    Queued = "queued"
+    Running = "running"
+    Succeeded = "succeeded"
+    Failed = "failed"
+
+class StageState(Enum):
+    Pending = "pending"
+    Running = "running"
+    Succeeded = "succeeded"
+    Failed = "failed"
+
+class JobStage(BaseModel):
+    name: str
+    state: StageState = StageState.Pending
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+class Job(BaseModel):
+    id: str
+    domain: Domain
+    state: JobState = JobState.Queued
+    stages: list[JobStage]
+    created_at: datetime
+    updated_at: datetime
+    error: Optional[str] = None
+
+class JobCreated(BaseModel):
+    job_id: str
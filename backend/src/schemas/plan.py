@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+
+from .domain import Domain, Host
+
+class HostChange(BaseModel):
+    path: str
+    before: Host
+    after: Host
+
+class DomainChange(BaseModel):
+    domain: str
+    added_hosts: list[Host] = []
+    removed_hosts: list[Host] = []
+    modified_hosts: list[HostChange] = []
+    hosts_reordered: bool = False
+    cert_changed: bool = False
+
+class DomainPlan(BaseModel):
+    added: list[Domain] = []
+    removed: list[str] = []
+    modified: list[DomainChange] = []
+    unchanged: list[str] = []
+    applied: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.modified)
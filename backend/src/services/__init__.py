@@ -1,7 +1,11 @@
+from .api_key_service import ApiKeyService
 from .auth_service import AuthService
 from .domain_service import DomainService
+from .job_service import JobService
 
 __all__ = [
+    "ApiKeyService",
     "AuthService",
-    "DomainService"
+    "DomainService",
+    "JobService"
 ]
\ No newline at end of file
@@ -0,0 +1,84 @@
+import hashlib
+import secrets
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.config import settings
+from src.db import ApiKeyStore
+from src.schemas import ApiKey, ApiKeyCreate, ApiKeyCreated
+from .jwt_service import token_cache
+from .token_cache import TokenCache
+
+API_KEY_PREFIX = "dmk_"
+
+class ApiKeyService:
+    def __init__(
+        self,
+        store: ApiKeyStore,
+        cache: TokenCache = token_cache,
+        cache_ttl: float = settings.API_KEY_CACHE_TTL
+    ):
+        """
+        :param cache: Verified keys are cached like login tokens; revoking a key drops it from the cache.
+        :param cache_ttl: Seconds a verified key is cached, shortened to its expiry.
+        """
+        self.store = store
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+
+    def create_key(self, request: ApiKeyCreate) -> ApiKeyCreated:
+        """
+        Create a key. The secret is only returned here, the store keeps its hash.
+        """
+        now = datetime.now()
+        key = API_KEY_PREFIX + secrets.token_urlsafe(32)
+        api_key = ApiKey(
+            id=uuid.uuid4().hex,
+            name=request.name,
+            scopes=list(dict.fromkeys(request.scopes)),
+            created_at=now,
+            expires_at=now + timedelta(days=request.expires_in_days) if request.expires_in_days is not None else None
+        )
+        self.store.save(api_key, hashlib.sha256(key.encode()).hexdigest())
+        return ApiKeyCreated(**api_key.model_dump(), key=key)
+
+    def list_keys(self) -> list[ApiKey]:
+        """
+        Get every key without its secret.
+        """
+        return self.store.list_keys()
+
+    def revoke_key(self, key_id: str) -> bool:
+        """
+        Revoke a key, effective immediately.
+        :return: False when there is no such key.
+        """
+        key_hash = self.store.revoke(key_id)
+        if key_hash is None:
+            return False
+        self.cache.discard(bytes.fromhex(key_hash))
+        return True
+
+    def verify(self, key: str) -> Optional[dict]:
+        """
+        Get the payload of a valid key: its subject, scopes and expiry. None for unknown, expired or revoked keys.
+        """
+        payload = self.cache.get(key)
+        if payload is not None:
+            return payload
+        api_key = self.store.get_by_hash(hashlib.sha256(key.encode()).hexdigest())
+        if api_key is None or api_key.revoked_at is not None:
+            return None
+        expires_at = api_key.expires_at.timestamp() if api_key.expires_at else None
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        payload = {
+            'sub': f"api_key:{api_key.id}",
+            'scopes': [scope.value for scope in api_key.scopes],
+            'exp': expires_at
+        }
+        cache_until = time.time() + self.cache_ttl
+        self.cache.put(key, payload, min(cache_until, expires_at) if expires_at else cache_until)
+        return payload
@@ -2,6 +2,9 @@ from src.schemas import Token
 from src.config import settings
 from .jwt_service import create_access_token
 
+# Subject of login tokens: there is a single password, so every login acts as the same admin
+ADMIN_SUBJECT = "admin"
+
 class AuthService:
     def __init__(self, password: str = settings.PASSWORD):
         self.password = password
@@ -10,4 +13,4 @@ class AuthService:
         return self.password == password
 
     def generate_token(self) -> Token:
-        return create_access_token({})
\ No newline at end of file
+        return create_access_token({"sub": ADMIN_SUBJECT})
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from src.schemas import Domain, HostType
+
+@dataclass
+class DomainPage:
+    etag: str
+    total: int
+    body: bytes
+
+class DomainListCache:
+    def __init__(
+        self,
+        domains: Callable[[], list[Domain]],
+        revision: Callable[[], int],
+        by_upstream: Callable[[str], set[str]]
+    ):
+        """
+        Serialized domain list kept in step with its source, the registry or the Nginx model.
+        The source is read once per revision, every domain is serialized once and kept until it changes,
+        the unfiltered list is joined once per revision.
+        :param domains: Every domain, in config order.
+        :param revision: Counter that changes whenever the domains do, after picking up external changes.
+        :param by_upstream: Names of the domains with a host proxying to an upstream.
+        """
+        self.domains = domains
+        self.revision = revision
+        self.by_upstream = by_upstream
+        # Distinguishes revisions of different processes, which all start counting at 1
+        self._instance = os.urandom(4).hex()
+        self._current: Optional[tuple[int, list[Domain]]] = None
+        self._fragments: dict[str, tuple[Domain, bytes]] = {}
+        self._full: Optional[tuple[int, bytes]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def etag(self) -> str:
+        """
+        Entity tag of the current revision.
+        A revision covers every filter and page, since clients key their caches by URL.
+        """
+        return f'"{self._instance}-{self.revision()}"'
+
+    def current(self) -> tuple[int, list[Domain]]:
+        """The current revision with its domains"""
+        revision = self.revision()
+        if self._current is None or self._current[0] != revision:
+            self._current = (revision, self.domains())
+        return self._current
+
+    def page(
+        self,
+        prefix: Optional[str] = None,
+        host_type: Optional[HostType] = None,
+        upstream: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> DomainPage:
+        """
+        Get a JSON array of the domains matching every given filter, in config order.
+        :param prefix: Domain name prefix.
+        :param host_type: Type of at least one host.
+        :param upstream: `proxy_pass` target of at least one host, compared as `host[:port]`.
+        :param offset: Matching domains to skip.
+        :param limit: Maximum number of domains returned, all when None.
+        :return: The page with the number of matching domains before paging.
+        """
+        revision, domains = self.current()
+        etag = f'"{self._instance}-{revision}"'
+        if prefix is None and host_type is None and upstream is None:
+            if offset == 0 and limit is None:
+                if self._full is None or self._full[0] != revision:
+                    self._full = (revision, self._join(domains))
+                return DomainPage(etag=etag, total=len(domains), body=self._full[1])
+        else:
+            upstream_names = None if upstream is None else self.by_upstream(upstream)
+            domains = [
+                domain for domain in domains
+                if (prefix is None or domain.domain.startswith(prefix))
+                and (host_type is None or any(host.type == host_type for host in domain.hosts))
+                and (upstream_names is None or domain.domain in upstream_names)
+            ]
+        end = None if limit is None else offset + limit
+        return DomainPage(etag=etag, total=len(domains), body=self._join(domains[offset:end]))
+
+    def lines(self) -> Iterator[bytes]:
+        """Every domain as one JSON document per line"""
+        for domain in self.current()[1]:
+            yield self.serialize(domain) + b"\n"
+
+    def serialize(self, domain: Domain) -> bytes:
+        cached = self._fragments.get(domain.domain)
+        # Registry reads build new objects every revision, so unchanged domains are found by equality
+        if cached is not None and (cached[0] is domain or cached[0] == domain):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        fragment = domain.model_dump_json().encode()
+        self._fragments[domain.domain] = (domain, fragment)
+        return fragment
+
+    def _join(self, domains: list[Domain]) -> bytes:
+        current = self.current()[1]
+        if len(self._fragments) > 2 * len(current):
+            # Drop fragments of removed domains
+            names = {domain.domain for domain in current}
+            self._fragments = {name: cached for name, cached in self._fragments.items() if name in names}
+        return b"[" + b",".join(map(self.serialize, domains)) + b"]"
+
+    def stats(self) -> dict:
+        return {
+            'revision': self.revision(),
+            'cached_domains': len(self._fragments),
+            'hits': self.hits,
+            'misses': self.misses
+        }
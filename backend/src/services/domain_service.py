@@ -1,70 +1,650 @@
-from src.domain_helper import GodaddyManager, NginxManager, setup_cert, remove_cert
-from src.schemas import Domain, Host
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from src.domain_helper import (
+    CertManager,
+    DnsProvider,
+    GodaddyManager,
+    HealthChecker,
+    KeyedLocks,
+    LocalDnsProvider,
+    NginxApplier,
+    NginxManager,
+    ReloadScheduler,
+    plan_changes
+)
+from src.domain_helper.process_helper import run_in_io_executor
+from src.schemas import (
+    Domain,
+    DomainHealth,
+    DomainPlan,
+    DomainRecord,
+    DomainResult,
+    Host,
+    HostHealth,
+    HostType,
+    ProvisioningState
+)
 from src.config import settings
+from src.db import DomainStore
+from .domain_list_cache import DomainListCache, DomainPage
+from .reconciler import Reconciler
+
+logger = logging.getLogger(__name__)
+
+def create_dns_provider(
+    provider: str = settings.DNS_PROVIDER,
+    godaddy_api_key: str = settings.GODADDY_API_KEY,
+    godaddy_api_secret: str = settings.GODADDY_API_SECRET
+) -> DnsProvider:
+    """
+    Build the DNS provider selected in settings.
+    """
+    if provider == "local":
+        return LocalDnsProvider(
+            public_ip=settings.PUBLIC_IP or "127.0.0.1",
+            zone_dir=settings.DNS_ZONE_DIR or None
+        )
+    if provider == "godaddy":
+        return GodaddyManager(
+            godaddy_api_key,
+            godaddy_api_secret,
+            api_url=settings.GODADDY_API_URL,
+            timeout=settings.DNS_HTTP_TIMEOUT,
+            max_connections=settings.DNS_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.DNS_HTTP_MAX_KEEPALIVE,
+            public_ip=settings.PUBLIC_IP or None,
+            public_ip_url=settings.PUBLIC_IP_URL,
+            public_ip_ttl=settings.PUBLIC_IP_TTL,
+            rate_limit=settings.DNS_RATE_LIMIT,
+            rate_burst=settings.DNS_RATE_BURST,
+            max_retries=settings.DNS_MAX_RETRIES,
+            backoff_base=settings.DNS_BACKOFF_BASE,
+            backoff_max=settings.DNS_BACKOFF_MAX,
+            batch_window=settings.DNS_BATCH_WINDOW
+        )
+    raise ValueError(f"Unknown DNS provider: {provider}")
 
 class DomainService:
     def __init__(
         self,
         godaddy_api_key: str = settings.GODADDY_API_KEY,
         godaddy_api_secret: str = settings.GODADDY_API_SECRET,
-        email_address: str = settings.EMAIL_ADDRESS
+        email_address: str = settings.EMAIL_ADDRESS,
+        nginx_storage_mode: str = settings.NGINX_STORAGE_MODE,
+        reload_scheduler: Optional[ReloadScheduler] = None,
+        dns_provider: Optional[DnsProvider] = None,
+        store: Optional[DomainStore] = None
     ):
-        self.godaddy_manager = GodaddyManager(
-            godaddy_api_key,
-            godaddy_api_secret
+        """
+        :param store: Domain registry the Nginx config is rendered from. Without it the config is the only state.
+        """
+        self.dns_provider = dns_provider or create_dns_provider(
+            godaddy_api_key=godaddy_api_key,
+            godaddy_api_secret=godaddy_api_secret
         )
         self.email_address = email_address
-        self.nginx_manager = NginxManager()
+        self.cert_challenge_mode = settings.CERT_CHALLENGE_MODE
+        self.cert_manager = CertManager(
+            email_address,
+            live_dir=settings.CERT_LIVE_DIR,
+            max_names=settings.CERT_MAX_NAMES,
+            renew_before_days=settings.CERT_RENEW_BEFORE_DAYS,
+            renew_check_interval=settings.CERT_RENEW_CHECK_INTERVAL,
+            renewals_per_check=settings.CERT_RENEWALS_PER_CHECK,
+            renew_spread=settings.CERT_RENEW_SPREAD,
+            challenge_mode=self.cert_challenge_mode,
+            webroot=settings.ACME_WEBROOT,
+            acme_server=settings.ACME_SERVER or None,
+            on_renewed=self._reload_renewed_certs,
+            renewable=self._serves,
+            certbot_binary=settings.CERTBOT_BINARY,
+            use_sudo=settings.CERTBOT_USE_SUDO
+        )
+        self.cert_manager.load()
+        self.nginx_manager = NginxManager(
+            storage_mode=nginx_storage_mode,
+            config_path=settings.NGINX_CONFIG_PATH,
+            conf_dir=settings.NGINX_CONF_DIR,
+            acme_webroot=settings.ACME_WEBROOT if self.cert_challenge_mode == "webroot" else None,
+            cert_resolver=self.cert_manager.cert_name_for,
+            live_dir=settings.CERT_LIVE_DIR,
+            applier=NginxApplier(
+                binary=settings.NGINX_BINARY,
+                use_sudo=settings.NGINX_USE_SUDO,
+                config_path=settings.NGINX_CONFIG_PATH,
+                conf_dir=settings.NGINX_CONF_DIR,
+                history_dir=settings.NGINX_HISTORY_DIR or None,
+                history_size=settings.NGINX_HISTORY_SIZE
+            )
+        )
+        # Every reload is one transaction applying all changes saved in the model so far
+        self.reload_scheduler = reload_scheduler or ReloadScheduler(
+            self.nginx_manager.save_config_async,
+            window=settings.NGINX_RELOAD_WINDOW
+        )
+        if store is not None:
+            self.domain_list = DomainListCache(
+                store.list_domains,
+                revision=lambda: store.domains_revision,
+                by_upstream=lambda upstream: {domain.domain for domain in store.find(upstream=upstream)}
+            )
+        else:
+            self.domain_list = DomainListCache(
+                self.nginx_manager.get_current_domains,
+                revision=lambda: self.nginx_manager.revision,
+                by_upstream=self.nginx_manager.index.by_upstream
+            )
+        self.health_checker = HealthChecker(
+            lambda: (host.host for domain in self.nginx_manager.get_current_domains() for host in domain.hosts),
+            revision=lambda: self.nginx_manager.revision,
+            interval=settings.HEALTH_CHECK_INTERVAL,
+            unhealthy_interval=settings.HEALTH_CHECK_UNHEALTHY_INTERVAL,
+            timeout=settings.HEALTH_CHECK_TIMEOUT,
+            concurrency=settings.HEALTH_CHECK_CONCURRENCY,
+            path=settings.HEALTH_CHECK_PATH
+        )
+        self.reconciler = Reconciler(
+            self,
+            interval=settings.RECONCILE_INTERVAL,
+            dns_concurrency=settings.RECONCILE_DNS_CONCURRENCY,
+            dns_sweep=settings.RECONCILE_DNS_SWEEP,
+            cert_batch=settings.RECONCILE_CERT_BATCH,
+            retry_interval=settings.RECONCILE_RETRY_INTERVAL
+        )
+        self.lock = asyncio.Lock()
+        # DNS and certificate work of the same domain never overlaps, different domains run in parallel
+        self.domain_locks = KeyedLocks()
+        # Config changes of the same domain never overlap, from planning until they are live or rolled back
+        self.config_locks = KeyedLocks()
+        self.cert_batch_window = settings.CERT_BATCH_WINDOW
+        self.dns_bulk_concurrency = settings.DNS_BULK_CONCURRENCY
+        self._cert_batch: list[tuple[str, asyncio.Future]] = []
+        self._cert_batch_task: Optional[asyncio.Task] = None
+        self.store = store
+        if store is not None:
+            self._load_registry()
+
+    async def _reload_renewed_certs(self):
+        """Reload Nginx so it serves renewed certificates, although no config file changed"""
+        self.nginx_manager.request_reload()
+        await self.reload_scheduler.request_reload()
+
+    def _serves(self, domain: str) -> bool:
+        """
+        Whether a domain is still served here: configured, and in the registry its DNS not failing to point here.
+        """
+        if self.store is None:
+            return self.nginx_manager.has_domain(domain)
+        record = self.store.get(domain)
+        return record is not None and record.configured and record.dns_status != ProvisioningState.Failed
+
+    def _load_registry(self):
+        """
+        Render the registered domains into the Nginx config, or bootstrap an empty registry
+        from the domains found in the existing config.
+        """
+        if self.store.count() == 0:
+            domains = self.nginx_manager.get_current_domains()
+            self.store.save(domains)
+            for domain in domains:
+                if self.cert_manager.is_valid(domain.domain):
+                    self.store.set_status(domain.domain, cert_status=ProvisioningState.Ready)
+            logger.info("Imported Nginx config into the registry", extra={'domains': len(domains)})
+            return
+
+        revision = self.nginx_manager.revision
+        self._set_domains(self._registry_changes())
+        if self.nginx_manager.revision == revision:
+            return
+        logger.info("Rendering registry changes into the Nginx config")
+        try:
+            self.nginx_manager.save_config()
+        except Exception:
+            # Left unsaved in the model, the next transaction retries
+            logger.exception("Error applying the registry to the Nginx config")
+
+    def _registry_changes(self) -> dict[str, Optional[Domain]]:
+        """Changes rendering the registry: every registered domain, and None for managed blocks missing from it"""
+        desired: dict[str, Optional[Domain]] = {
+            domain.domain: None for domain in self.nginx_manager.get_current_domains()
+        }
+        desired.update((domain.domain, domain) for domain in self.store.list_domains())
+        return desired
+
+    async def _set_status(self, domain: str, **statuses: ProvisioningState):
+        if self.store is not None:
+            await run_in_io_executor(self.store.set_status, domain, **statuses)
+
+    async def _refresh_nginx(self):
+        """Pick up external config changes without blocking the event loop"""
+        await self.nginx_manager.refresh_if_changed_async()
 
     async def get_all_domains(self) -> list[Domain]:
         """
-        Get all domains.
+        Get all domains, from the registry when there is one.
         """
-        return self.nginx_manager.get_current_domains()
+        return list(self.domain_list.current()[1])
+
+    async def get_domain_list_etag(self) -> str:
+        """
+        Get the entity tag of the current domain list.
+        """
+        if self.store is None:
+            await self._refresh_nginx()
+        return self.domain_list.etag()
+
+    async def get_domain_page(
+        self,
+        prefix: Optional[str] = None,
+        host_type: Optional[HostType] = None,
+        upstream: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> DomainPage:
+        """
+        Get a serialized page of domains, filtered by name prefix, host type and upstream.
+        """
+        if self.store is None:
+            await self._refresh_nginx()
+        return self.domain_list.page(prefix, host_type, upstream, offset, limit)
+
+    async def get_domain(self, domain: str) -> Optional[DomainRecord]:
+        """
+        Get a single domain with its DNS and certificate status, None when it is unknown.
+        """
+        if self.store is not None:
+            return self.store.get(domain)
+        await self._refresh_nginx()
+        result = self.nginx_manager.get_domain(domain)
+        return DomainRecord.model_validate(result.model_dump()) if result else None
+
+    async def search_domains(self, upstream: Optional[str] = None, primary_domain: Optional[str] = None) -> list[Domain]:
+        """
+        Get the domains proxying to an upstream and/or under a primary domain, sorted by name.
+        """
+        if self.store is not None:
+            return self.store.find(upstream=upstream, primary_domain=primary_domain)
+        await self._refresh_nginx()
+        index = self.nginx_manager.index
+        names = None
+        if upstream is not None:
+            names = index.by_upstream(upstream)
+        if primary_domain is not None:
+            subdomains = index.by_primary_domain(primary_domain)
+            names = subdomains if names is None else names & subdomains
+        return self.nginx_manager.find_domains(names or set())
+
+    async def get_upstreams(self) -> dict[str, int]:
+        """
+        Get the number of domains per upstream.
+        """
+        if self.store is not None:
+            return self.store.upstreams()
+        await self._refresh_nginx()
+        return self.nginx_manager.index.upstreams()
 
     async def add_domain(self, domain: str, hosts: list[Host]):
         """
-        Add a new domain.
+        Add a new domain, replacing its hosts in place when it already exists.
         """
-        try:
+        await self.setup_cert(domain)
+        await self.apply_domain(Domain(domain=domain, hosts=hosts))
+
+    async def provision_dns(self, domain: str):
+        """
+        Point the DNS records of a domain at this server.
+        """
+        async with self.domain_locks.hold(domain):
             try:
-                await self.remove_domain(domain)
-            except:
-                pass
-            setup_cert(domain, self.email_address)
-            new_domain = Domain(domain=domain, hosts=hosts)
-            self.nginx_manager.add_domain(new_domain)
-            self.nginx_manager.save_config()
+                await self.dns_provider.add_records(domain)
+            except Exception:
+                await self._set_status(domain, dns_status=ProvisioningState.Failed)
+                raise
+            await self._set_status(domain, dns_status=ProvisioningState.Ready)
+
+    async def provision_cert(self, domain: str):
+        """
+        Make sure a valid certificate covers a domain, failing if certbot did not produce one.
+        Domains requested within the certificate batch window, e.g. by parallel jobs, share SAN certificates.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cert_batch.append((domain, future))
+        if self._cert_batch_task is None:
+            self._cert_batch_task = loop.create_task(self._flush_cert_batch())
+        error = await future
+        if error is not None:
+            raise RuntimeError(str(error))
+
+    async def _flush_cert_batch(self):
+        await asyncio.sleep(self.cert_batch_window)
+        self._cert_batch_task = None
+        batch, self._cert_batch = self._cert_batch, []
+        try:
+            failures = await self.provision_certs(list(dict.fromkeys(domain for domain, _ in batch)))
         except Exception as e:
-            print(f"Error adding domain {domain}: {e}")
-            await self.remove_domain(domain)
-            raise
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for domain, future in batch:
+            if not future.done():
+                future.set_result(failures.get(domain))
 
-    async def remove_domain(self, domain: str):
+    async def provision_certs(self, domains: list[str]) -> dict[str, Exception]:
         """
-        Remove an existing domain.
+        Make sure valid certificates cover domains, packing new ones into shared SAN certificates.
+        A domain already being covered by another caller is waited for, then found valid and skipped.
+        Nginx is reloaded when the new certificates must be served before any config change.
+        :return: Domains that could not be covered, with the error.
         """
-        # await self.godaddy_manager.remove_records(domain)
-        # remove_cert(domain)
-        summary = self.nginx_manager.get_hosting_summary()
-        old_domain = summary['domains'].get(domain, None)
-        if old_domain:
-            self.nginx_manager.remove_domain(old_domain)
-        self.nginx_manager.save_config()
-        
+        certs = dict(self.cert_manager.certs)
+        async with self.domain_locks.hold(*domains):
+            failures = await self.cert_manager.ensure_certs(domains)
+            for domain in domains:
+                await self._set_status(
+                    domain,
+                    cert_status=ProvisioningState.Failed if domain in failures else ProvisioningState.Ready
+                )
+        if self._needs_cert_reload(certs):
+            await self._reload_renewed_certs()
+        return failures
 
-    async def update_domain(self, domain: str, hosts: list[Host]):
+    def _needs_cert_reload(self, previous: dict) -> bool:
+        """
+        Whether lineages loaded since `previous` need a reload: standalone challenges stop Nginx,
+        and Nginx only reads renewed certificates of configured domains on reload.
+        """
+        changed = [cert for name, cert in self.cert_manager.certs.items() if previous.get(name) is not cert]
+        if not changed:
+            return False
+        if self.cert_challenge_mode != "webroot":
+            return True
+        return any(self.nginx_manager.has_domain(domain) for cert in changed for domain in cert.domains)
+
+    async def setup_cert(self, domain: str):
+        """
+        Issue a certificate with the configured ACME challenge mode, unless a valid one already covers the domain.
+        """
+        await self.provision_certs([domain])
+
+    async def apply_domain(self, domain: Domain, dry_run: bool = False) -> DomainPlan:
+        """
+        Add or replace the Nginx config of a domain and wait until it is live.
+        """
+        return await self.apply_changes({domain.domain: domain}, dry_run)
+
+    async def remove_domain(self, domain: str, dry_run: bool = False) -> DomainPlan:
+        """
+        Remove an existing domain. Its DNS records and certificate are kept.
+        """
+        return await self.apply_changes({domain: None}, dry_run)
+
+    async def update_domain(self, domain: str, hosts: list[Host], dry_run: bool = False) -> DomainPlan:
         """
         Update an existing domain with new hosts.
         """
+        return await self.apply_changes({domain: Domain(domain=domain, hosts=hosts)}, dry_run)
+
+    async def bulk_add_domains(self, domains: list[Domain]) -> AsyncIterator[DomainResult]:
+        """
+        Provision DNS of several domains at once, so record changes in the same zone share a request,
+        and certificates packed into shared SAN certificates,
+        then apply every domain that succeeded with a single config write and a single reload.
+        """
+        semaphore = asyncio.Semaphore(self.dns_bulk_concurrency)
+
+        async def provision(domain: Domain) -> Optional[Exception]:
+            async with semaphore:
+                try:
+                    await self.provision_dns(domain.domain)
+                except Exception as e:
+                    return e
+                return None
+
+        errors = await asyncio.gather(*(provision(domain) for domain in domains))
+        with_dns = []
+        for domain, error in zip(domains, errors):
+            if error is None:
+                with_dns.append(domain)
+            else:
+                yield DomainResult(domain=domain.domain, success=False, error=str(error))
+
+        failures = await self.provision_certs([domain.domain for domain in with_dns])
+        ready = []
+        for domain in with_dns:
+            if domain.domain in failures:
+                yield DomainResult(domain=domain.domain, success=False, error=str(failures[domain.domain]))
+            else:
+                ready.append(domain)
+
+        async for result in self._apply_batch({domain.domain: domain for domain in ready}):
+            yield result
+
+    async def bulk_update_domains(self, domains: list[Domain]) -> AsyncIterator[DomainResult]:
+        """
+        Replace the hosts of existing domains with a single config write and a single reload.
+        """
+        await self._refresh_nginx()
+        desired = {}
+        for domain in domains:
+            if self.nginx_manager.has_domain(domain.domain):
+                desired[domain.domain] = domain
+            else:
+                yield DomainResult(domain=domain.domain, success=False, error="Domain not found")
+
+        async for result in self._apply_batch(desired):
+            yield result
+
+    async def bulk_remove_domains(self, domains: list[str]) -> AsyncIterator[DomainResult]:
+        """
+        Remove domains with a single config write and a single reload.
+        """
+        async for result in self._apply_batch({domain: None for domain in domains}):
+            yield result
+
+    async def _apply_batch(self, desired: dict[str, Optional[Domain]]) -> AsyncIterator[DomainResult]:
+        """
+        Apply a set of domain changes in one pass and report the outcome per domain.
+        """
+        if not desired:
+            return
         try:
-            summary = self.nginx_manager.get_hosting_summary()
-            old_domain = summary['domains'].get(domain, None)
-            if old_domain:
-                self.nginx_manager.remove_domain(old_domain)
-            new_domain = Domain(domain=domain, hosts=hosts)
-            self.nginx_manager.add_domain(new_domain)
-            self.nginx_manager.save_config()
-        except:
-            await self.remove_domain(domain)
-            raise
\ No newline at end of file
+            await self.apply_changes(desired)
+        except Exception as e:
+            for name in desired:
+                yield DomainResult(domain=name, success=False, error=str(e))
+            return
+        for name in desired:
+            yield DomainResult(domain=name, success=True)
+
+    async def plan_changes(self, desired: dict[str, Optional[Domain]], existing_only: bool = False) -> DomainPlan:
+        """
+        Compare domain changes (None removes the domain) with the current config without applying them.
+        :param existing_only: Leave out domains that are not configured, like bulk updates do.
+        """
+        await self._refresh_nginx()
+        if existing_only:
+            desired = {name: domain for name, domain in desired.items() if self.nginx_manager.has_domain(name)}
+        return plan_changes(self.nginx_manager.get_domain, desired, self.nginx_manager.cert_changed)
+
+    async def apply_changes(self, desired: dict[str, Optional[Domain]], dry_run: bool = False) -> DomainPlan:
+        """
+        Apply domain changes (None removes the domain) and wait for the transaction that makes them live.
+        Only domains whose config actually changes are written; an empty plan writes and reloads nothing.
+        The model is mutated under the service lock; the transaction is awaited outside it so concurrent
+        callers share one coalesced write, validation and reload. The registry is written first, so
+        a change interrupted before the reload is rendered on the next start. On failure the changes are
+        rolled back in the registry and the model; the files on disk were never swapped or have been restored.
+        :param dry_run: Only return the plan.
+        """
+        return await self._apply(lambda: desired, dry_run)
+
+    async def apply_registry(self, ready: Callable[[str], bool]) -> DomainPlan:
+        """
+        Render the registry into the Nginx config, repairing blocks that were edited, added or removed
+        outside of the app. The registry itself is not changed, also when the transaction fails.
+        :param ready: Whether a domain missing from the config can be added, e.g. because its certificate exists.
+        """
+        def changes() -> dict[str, Optional[Domain]]:
+            return {
+                name: domain for name, domain in self._registry_changes().items()
+                if domain is None or self.nginx_manager.has_domain(name) or ready(name)
+            }
+
+        return await self._apply(changes, update_registry=False)
+
+    async def _apply(
+        self,
+        changes: Callable[[], dict[str, Optional[Domain]]],
+        dry_run: bool = False,
+        update_registry: bool = True
+    ) -> DomainPlan:
+        """
+        :param changes: Builds the desired changes under the service lock, so they cannot be stale.
+        The config locks of the changed domains are held until the transaction is live or rolled back,
+        so a rollback never overwrites a later change to the same domain. Changes to other domains
+        still share the transaction.
+        """
+        locked: frozenset[str] = frozenset()
+        while True:
+            async with self.config_locks.hold(*locked):
+                async with self.lock:
+                    await self._refresh_nginx()
+                    desired = changes()
+                    plan = plan_changes(self.nginx_manager.get_domain, desired, self.nginx_manager.cert_changed)
+                    if dry_run or plan.empty:
+                        return plan
+                    changed = {domain.domain: desired[domain.domain] for domain in plan.added}
+                    changed.update((change.domain, desired[change.domain]) for change in plan.modified)
+                    changed.update((name, None) for name in plan.removed)
+                    if not changed.keys() <= locked:
+                        # Locks are taken before the service lock, then the changes are planned again
+                        locked = frozenset(changed)
+                        continue
+                    previous = {name: self.nginx_manager.get_domain(name) for name in changed}
+                    if update_registry:
+                        await self._save_records(changed)
+                    self._set_domains(changed)
+                try:
+                    await self.reload_scheduler.request_reload(len(changed))
+                except Exception as e:
+                    logger.error("Error applying domain changes", extra={'domains': list(changed), 'error': str(e)})
+                    async with self.lock:
+                        if update_registry:
+                            await self._save_records(previous, rollback=True)
+                        self._set_domains(previous)
+                    raise
+                plan.applied = True
+                return plan
+
+    async def _save_records(self, domains: dict[str, Optional[Domain]], rollback: bool = False):
+        """
+        Write domain changes to the registry on the I/O executor. Rolling back a new domain only stops
+        rendering it, keeping the DNS and certificate status recorded while it was provisioned.
+        """
+        if self.store is None:
+            return
+        saved = [domain for domain in domains.values() if domain is not None]
+        removed = [name for name, domain in domains.items() if domain is None]
+        await run_in_io_executor(self.store.save, saved)
+        await run_in_io_executor(self.store.deactivate if rollback else self.store.delete, removed)
+
+    def _set_domains(self, domains: dict[str, Optional[Domain]]):
+        for name, domain in domains.items():
+            if domain is None:
+                self.nginx_manager.remove_domain(name)
+            else:
+                self.nginx_manager.add_domain(domain)
+
+    async def export_domains(self) -> AsyncIterator[bytes]:
+        """
+        Stream every domain as one JSON document per line.
+        """
+        for line in self.domain_list.lines():
+            yield line
+
+    def start(self):
+        """
+        Start the background certificate renewal, upstream health checks and reconciliation.
+        """
+        self.cert_manager.start()
+        if settings.HEALTH_CHECK_ENABLED:
+            self.health_checker.start()
+        if settings.RECONCILE_ENABLED:
+            self.reconciler.start()
+
+    async def aclose(self):
+        """
+        Stop background work and release pooled connections.
+        """
+        await self.cert_manager.stop()
+        await self.health_checker.stop()
+        await self.reconciler.stop()
+        await self.dns_provider.aclose()
+
+    def count_domains(self) -> int:
+        """
+        Get the number of configured domains.
+        """
+        return self.nginx_manager.count_domains()
+
+    def get_reload_stats(self) -> dict:
+        """
+        Get batching statistics of the Nginx reload scheduler.
+        """
+        return {**self.reload_scheduler.stats(), 'config_locks': self.config_locks.stats()}
+
+    def get_transaction_stats(self) -> dict:
+        """
+        Get Nginx apply transaction counters and per stage timings of recent transactions.
+        """
+        return self.nginx_manager.applier.stats()
+
+    def get_cert_stats(self) -> dict:
+        """
+        Get certificate issuance, reuse and renewal counters, and how often domain work had to wait.
+        """
+        return {**self.cert_manager.stats(), 'domain_locks': self.domain_locks.stats()}
+
+    async def get_domain_health(self, domain: str) -> Optional[DomainHealth]:
+        """
+        Get the latest health check result of every host of a domain, None when it is not configured.
+        A domain is healthy when all its probed hosts are, and unknown until one has been probed.
+        """
+        await self._refresh_nginx()
+        configured = self.nginx_manager.get_domain(domain)
+        if configured is None:
+            return None
+        hosts = [
+            HostHealth(path=host.path, host=host.host, health=self.health_checker.get(host.host))
+            for host in configured.hosts
+        ]
+        probed = [host.health.healthy for host in hosts if host.health is not None]
+        return DomainHealth(domain=domain, healthy=all(probed) if probed else None, hosts=hosts)
+
+    def get_health_stats(self) -> dict:
+        """
+        Get upstream health check counters.
+        """
+        return self.health_checker.stats()
+
+    async def reconcile(self) -> dict:
+        """
+        Run a reconciliation pass now and get what it found and repaired.
+        """
+        return await self.reconciler.run_pass()
+
+    def get_reconcile_stats(self) -> dict:
+        """
+        Get reconciliation counters and the most recent passes.
+        """
+        return self.reconciler.stats()
+
+    def get_dns_stats(self) -> dict:
+        """
+        Get throttling and retry counters of the DNS provider client.
+        """
+        return self.dns_provider.stats()
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from src.config import settings
+from src.db import JobStore
+from src.schemas import Domain, Job, JobStage, JobState, StageState
+from .domain_service import DomainService
+
+logger = logging.getLogger(__name__)
+
+PROVISIONING_STAGES = ["dns", "cert", "nginx"]
+
+class JobService:
+    def __init__(
+        self,
+        store: JobStore,
+        domain_service: DomainService,
+        concurrency: int = settings.JOB_CONCURRENCY
+    ):
+        self.store = store
+        self.domain_service = domain_service
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.workers: list[asyncio.Task] = []
+
+    async def start(self):
+        """
+        Re-queue jobs interrupted by a restart and start the worker pool.
+        """
+        for job in self.store.list_unfinished():
+            for stage in job.stages:
+                if stage.state == StageState.Running:
+                    stage.state = StageState.Pending
+            job.state = JobState.Queued
+            self.store.save(job)
+            self.queue.put_nowait(job.id)
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """
+        Stop the worker pool; unfinished jobs stay persisted and resume on the next start.
+        """
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def enqueue(self, domain: Domain) -> Job:
+        """
+        Persist a provisioning job for a domain and queue it.
+        """
+        now = datetime.now()
+        job = Job(
+            id=uuid.uuid4().hex,
+            domain=domain,
+            stages=[JobStage(name=name) for name in PROVISIONING_STAGES],
+            created_at=now,
+            updated_at=now
+        )
+        self.store.save(job)
+        await self.queue.put(job.id)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job by id.
+        """
+        return self.store.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                job = self.store.get(job_id)
+                if job and job.state in (JobState.Queued, JobState.Running):
+                    await self._run(job)
+            except Exception:
+                logger.exception("Error running job", extra={'job': job_id})
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        stage_handlers = {
+            "dns": lambda: self.domain_service.provision_dns(job.domain.domain),
+            "cert": lambda: self.domain_service.provision_cert(job.domain.domain),
+            "nginx": lambda: self.domain_service.apply_domain(job.domain)
+        }
+        self._update(job, state=JobState.Running)
+
+        for stage in job.stages:
+            if stage.state == StageState.Succeeded:
+                continue
+            stage.state = StageState.Running
+            stage.started_at = datetime.now()
+            stage.finished_at = stage.duration = stage.error = None
+            self._update(job)
+
+            started = time.perf_counter()
+            try:
+                await stage_handlers[stage.name]()
+            except Exception as e:
+                stage.state = StageState.Failed
+                stage.error = str(e)
+                stage.finished_at = datetime.now()
+                stage.duration = time.perf_counter() - started
+                logger.warning("Job stage failed", extra={
+                    'job': job.id, 'domain': job.domain.domain, 'stage': stage.name,
+                    'duration': stage.duration, 'error': stage.error
+                })
+                self._update(job, state=JobState.Failed, error=f"{stage.name}: {e}")
+                return
+            stage.state = StageState.Succeeded
+            stage.finished_at = datetime.now()
+            stage.duration = time.perf_counter() - started
+            logger.info("Job stage finished", extra={
+                'job': job.id, 'domain': job.domain.domain, 'stage': stage.name, 'duration': stage.duration
+            })
+            self._update(job)
+
+        self._update(job, state=JobState.Succeeded)
+
+    def _update(self, job: Job, state: Optional[JobState] = None, error: Optional[str] = None):
+        if state:
+            job.state = state
+        if error:
+            job.error = error
+        job.updated_at = datetime.now()
+        self.store.save(job)
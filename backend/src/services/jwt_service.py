@@ -2,10 +2,25 @@ from datetime import timedelta, datetime
 from jose import jwt
 from src.config import settings
 from src.schemas import Token
+from .token_cache import TokenCache
+
+# Shared by every request; login tokens and API keys are cached side by side
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
 
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=settings.TOKEN_EXPIRE_TIMEOUT)):
     to_encode = data.copy()
     expire = datetime.now() + expires_delta
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-    return Token(token=encoded_jwt)
\ No newline at end of file
+    return Token(token=encoded_jwt)
+
+def verify_access_token(token: str) -> dict:
+    """
+    Decode a login token, served from the cache after its first successful verification.
+    Raises `JWTError` when the token is invalid or expired.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        token_cache.put(token, payload, payload.get("exp"))
+    return payload
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from src.domain_helper.dns_provider import DEFAULT_RECORD_TYPES
+from src.domain_helper.process_helper import run_in_io_executor
+from src.schemas import Domain
+
+if TYPE_CHECKING:
+    from .domain_service import DomainService
+
+logger = logging.getLogger(__name__)
+
+SUBSYSTEMS = ("dns", "certs", "nginx")
+
+class Reconciler:
+    def __init__(
+        self,
+        service: "DomainService",
+        interval: float = 300.0,
+        dns_concurrency: int = 10,
+        dns_sweep: int = 100,
+        cert_batch: int = 50,
+        retry_interval: float = 3600.0,
+        history: int = 20
+    ):
+        """
+        Periodically compares the desired domains (the registry, or the Nginx config without one) with
+        the DNS provider, the certificate live directory and the Nginx config, and repairs drift.
+        Only missing state is added: records and certificates of removed domains are left alone,
+        since the zone and the live directory may hold entries this app did not create.
+        Every pass handles DNS, then certificates, then Nginx, the order provisioning needs.
+        A subsystem is only compared again once the desired domains or its own state changed,
+        so passes over an unchanged fleet do next to no work.
+        :param interval: Seconds between passes.
+        :param dns_concurrency: Maximum record lookups and repairs in flight.
+        :param dns_sweep: Unchanged domains whose records are looked up per pass, in rotation.
+            New domains are always looked up.
+        :param cert_batch: Maximum domains given certificates per pass, packed into SAN certificates.
+        :param retry_interval: Seconds before a domain whose repair failed is tried again.
+        :param history: Number of recent passes kept for stats.
+        """
+        self.service = service
+        self.interval = interval
+        self.dns_concurrency = dns_concurrency
+        self.dns_sweep = dns_sweep
+        self.cert_batch = cert_batch
+        self.retry_interval = retry_interval
+        self.history: deque[dict] = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._desired: list[Domain] = []
+        self._desired_key: Optional[int] = None
+        self._dns_seen: Optional[set[str]] = None
+        self._dns_sweep_position = 0
+        self._certs_synced: Optional[tuple] = None
+        self._nginx_synced: Optional[tuple] = None
+        # (subsystem, domain) -> monotonic time after which a failed repair is tried again
+        self._retry_at: dict[tuple[str, str], float] = {}
+        self.passes = 0
+        self.repaired = dict.fromkeys(SUBSYSTEMS, 0)
+        self.failed = dict.fromkeys(SUBSYSTEMS, 0)
+
+    def start(self):
+        """
+        Start the background passes.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """
+        Stop the background passes.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_pass()
+            except Exception:
+                logger.exception("Reconciliation pass failed")
+
+    async def run_pass(self) -> dict:
+        """
+        Compare and repair every subsystem once. Passes never overlap.
+        :return: Duration, checked, drifted, repaired and failed domains per subsystem.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            started = time.perf_counter()
+            desired = await self._desired_domains()
+            result = {'started_at': datetime.now().isoformat(), 'domains': len(desired)}
+            result['dns'] = await self._timed("dns", self._reconcile_dns, desired)
+            result['certs'] = await self._timed("certs", self._reconcile_certs, desired)
+            result['nginx'] = await self._timed("nginx", self._reconcile_nginx, desired)
+            result['duration'] = time.perf_counter() - started
+            self.passes += 1
+            self.history.append(result)
+            logger.info("Reconciliation pass finished", extra=result)
+            return result
+
+    async def _timed(
+        self,
+        subsystem: str,
+        reconcile: Callable[[list[Domain]], Awaitable[dict]],
+        desired: list[Domain]
+    ) -> dict:
+        started = time.perf_counter()
+        try:
+            result = await reconcile(desired)
+        except Exception as e:
+            logger.error("Reconciliation failed", extra={'subsystem': subsystem, 'error': str(e)})
+            result = {'error': str(e)}
+        self.repaired[subsystem] += result.get('repaired', 0)
+        self.failed[subsystem] += result.get('failed', 0)
+        return {**result, 'duration': time.perf_counter() - started}
+
+    async def _desired_domains(self) -> list[Domain]:
+        """The desired domains, only read again after the registry (or without one, the config) changed"""
+        store = self.service.store
+        nginx_manager = self.service.nginx_manager
+        await nginx_manager.refresh_if_changed_async()
+        # Status updates leave domains_revision alone, so they do not force a full compare
+        key = store.domains_revision if store is not None else nginx_manager.revision
+        if key != self._desired_key:
+            self._desired = store.list_domains() if store is not None else nginx_manager.get_current_domains()
+            self._desired_key = key
+        return self._desired
+
+    def _retry_due(self, subsystem: str, domain: str, now: float) -> bool:
+        return self._retry_at.get((subsystem, domain), 0.0) <= now
+
+    def _any_retry_due(self, subsystem: str, now: float) -> bool:
+        return any(key[0] == subsystem and retry_at <= now for key, retry_at in self._retry_at.items())
+
+    def _record_outcome(self, subsystem: str, domain: str, success: bool):
+        if success:
+            self._retry_at.pop((subsystem, domain), None)
+        else:
+            self._retry_at[(subsystem, domain)] = time.monotonic() + self.retry_interval
+
+    async def _reconcile_dns(self, desired: list[Domain]) -> dict:
+        """
+        Look up the records of new domains, domains due for a retry and the next slice of the sweep,
+        and add the records of those missing any.
+        """
+        names = [domain.domain for domain in desired]
+        if self._dns_seen is None:
+            # Domains known at startup were provisioned before, they are covered by the sweep
+            self._dns_seen = set(names)
+        now = time.monotonic()
+        candidates = [name for name in names if name not in self._dns_seen]
+        candidates.extend(
+            domain for (subsystem, domain), retry_at in self._retry_at.items()
+            if subsystem == "dns" and retry_at <= now
+        )
+        if names:
+            start = self._dns_sweep_position % len(names)
+            candidates.extend(names[start:start + self.dns_sweep])
+            candidates.extend(names[:max(0, start + self.dns_sweep - len(names))])
+            self._dns_sweep_position = start + self.dns_sweep
+        self._dns_seen = set(names)
+        known = set(names)
+        candidates = [
+            name for name in dict.fromkeys(candidates)
+            if name in known and self._retry_due("dns", name, now)
+        ]
+
+        semaphore = asyncio.Semaphore(self.dns_concurrency)
+        drifted = repaired = failed = 0
+
+        async def check(name: str):
+            nonlocal drifted, repaired, failed
+            async with semaphore:
+                try:
+                    records = await self.service.dns_provider.get_records(name)
+                except Exception as e:
+                    failed += 1
+                    logger.error("DNS lookup failed", extra={'domain': name, 'error': str(e)})
+                    return
+                if all(record_type in records for record_type in DEFAULT_RECORD_TYPES):
+                    self._record_outcome("dns", name, True)
+                    return
+                drifted += 1
+                try:
+                    await self.service.provision_dns(name)
+                except Exception as e:
+                    failed += 1
+                    self._record_outcome("dns", name, False)
+                    logger.error("DNS repair failed", extra={'domain': name, 'error': str(e)})
+                    return
+                repaired += 1
+                self._record_outcome("dns", name, True)
+
+        await asyncio.gather(*(check(name) for name in candidates))
+        return {'checked': len(candidates), 'drifted': drifted, 'repaired': repaired, 'failed': failed}
+
+    async def _reconcile_certs(self, desired: list[Domain]) -> dict:
+        """
+        Issue certificates for domains no lineage covers. Expiring certificates are left to the renewal loop.
+        """
+        cert_manager = self.service.cert_manager
+        await run_in_io_executor(cert_manager.refresh_if_changed)
+        now = time.monotonic()
+        if (self._desired_key, cert_manager.revision) == self._certs_synced and not self._any_retry_due("certs", now):
+            return {'skipped': True}
+
+        missing = [domain.domain for domain in desired if cert_manager.get_cert(domain.domain) is None]
+        due = [name for name in missing if self._retry_due("certs", name, now)]
+        batch = due[:self.cert_batch]
+        failures = await self.service.provision_certs(batch) if batch else {}
+        for name in batch:
+            self._record_outcome("certs", name, name not in failures)
+        if len(due) <= self.cert_batch:
+            self._certs_synced = (self._desired_key, cert_manager.revision)
+        return {
+            'checked': len(desired),
+            'drifted': len(missing),
+            'repaired': len(batch) - len(failures),
+            'failed': len(failures),
+            'deferred': len(missing) - len(batch)
+        }
+
+    async def _reconcile_nginx(self, desired: list[Domain]) -> dict:
+        """
+        Render the registry into the Nginx config when either changed. Domains without a certificate
+        are not added, their blocks would fail validation.
+        """
+        if self.service.store is None:
+            # The config is the desired state itself
+            return {'skipped': True}
+        nginx_manager = self.service.nginx_manager
+        cert_manager = self.service.cert_manager
+        await nginx_manager.refresh_if_changed_async()
+        key = (self._desired_key, nginx_manager.revision, cert_manager.revision)
+        if key == self._nginx_synced:
+            return {'skipped': True}
+
+        plan = await self.service.apply_registry(lambda name: cert_manager.get_cert(name) is not None)
+        drifted = len(plan.added) + len(plan.removed) + len(plan.modified)
+        self._nginx_synced = (self.service.store.domains_revision, nginx_manager.revision, cert_manager.revision)
+        return {
+            'checked': len(desired),
+            'drifted': drifted,
+            'repaired': drifted if plan.applied else 0,
+            'failed': 0
+        }
+
+    def stats(self) -> dict:
+        """
+        Get pass counters, totals per subsystem and the most recent passes.
+        """
+        return {
+            'running': self._task is not None,
+            'passes': self.passes,
+            'repaired': self.repaired,
+            'failed': self.failed,
+            'pending_retries': len(self._retry_at),
+            'recent': list(self.history)
+        }
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class TokenCache:
+    def __init__(self, max_size: int = 1024):
+        """
+        Bounded LRU cache of verified credentials keyed by their SHA-256, so repeated requests
+        with the same token skip decoding and signature checks. Entries are dropped once they expire.
+        :param max_size: Maximum cached credentials, 0 disables the cache.
+        """
+        self.max_size = max_size
+        # Token hash -> (expiry as a UNIX timestamp, verified payload)
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Get the payload of a cached token, None when it is unknown or expired.
+        """
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, payload: dict, expires_at: Optional[float]):
+        """
+        Cache a verified payload until `expires_at`. Tokens without an expiry are not cached.
+        """
+        if self.max_size <= 0 or expires_at is None or expires_at <= time.time():
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: bytes):
+        """
+        Drop a token by its hash, e.g. after it was revoked.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Get cache counters.
+        """
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }